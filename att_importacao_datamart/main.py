@@ -19,25 +19,77 @@ ordem_das_etapas = ['static', 'insercao_datamart', 'extracao_site', 'venv']
 for etapa in ordem_das_etapas:
     sys.path.append(os.path.join(caminho_relativo, etapa))
 
+import time
 import datetime
 from static.registrar_consultar import registers
+from static.leitor_xls_html import ler_tabela_html
+import numpy
 import pandas
 
+# Gravação de registros/registro_coluna: 'conjunto' (COPY + insert ... select
+# por ficha, numa transação) ou 'linha' (um insert e um commit por célula)
+metodo_insercao = 'conjunto'
+
 # Inicializa classe de conexão
 inst_register = registers()
 
-# Carrega todas as tabelas do schema 'monitoria' em memória
+# Carrega as tabelas do schema 'monitoria' em memória
 # Isso é feito para verificações rápidas antes de inserir
-fichas = inst_register.consultar_notas('select * from monitoria.fichas')
-registro_coluna = inst_register.consultar_notas('select * from monitoria.registro_coluna')
-colunas = inst_register.consultar_notas('select * from monitoria.colunas')
-registros = inst_register.consultar_notas('select * from monitoria.registros')
+# consultar_dataframe: lê em lotes de um cursor no servidor e monta o
+# DataFrame direto das tuplas (sem lista de dicionários intermediária)
+fichas = inst_register.consultar_dataframe('select * from monitoria.fichas')
+colunas = inst_register.consultar_dataframe('select * from monitoria.colunas')
+
+# registros e registro_coluna só são lidos na inserção linha a linha; na
+# inserção em conjunto a existência é verificada no próprio banco
+registros = pandas.DataFrame()
+registro_coluna = pandas.DataFrame()
+if metodo_insercao == 'linha':
+    registros = inst_register.consultar_dataframe('select * from monitoria.registros')
+
+    # De registro_coluna só a chave é usada (existência); o valor, que é a
+    # maior parte da tabela, fica no banco
+    registro_coluna = inst_register.consultar_dataframe('select coluna_fk, registro_fk from monitoria.registro_coluna')
+
+# Índices em memória (dict/set) montados uma vez a partir dos DataFrames e
+# atualizados a cada inserção: cada verificação de existência é O(1), em vez
+# de um .loc que varre a tabela inteira para cada célula de cada ficha
+indice_fichas = {}  # {(nome_ficha, mes, ano): id}
+indice_colunas = {}  # {(ficha_fk, nome_coluna): id}
+indice_registros = {}  # {(ficha_fk, num_monitoria): id}
+chaves_registro_coluna = set()  # {(coluna_fk, registro_fk), ...}
+
+if not fichas.empty:
+    indice_fichas = dict(zip(zip(fichas['nome_ficha'], fichas['mes'], fichas['ano']), fichas['id']))
+if not colunas.empty:
+    indice_colunas = dict(zip(zip(colunas['ficha_fk'], colunas['nome_coluna']), colunas['id']))
+if not registros.empty:
+    indice_registros = dict(zip(zip(registros['ficha_fk'], registros['num_monitoria']), registros['id']))
+if not registro_coluna.empty:
+    chaves_registro_coluna = set(zip(registro_coluna['coluna_fk'], registro_coluna['registro_fk']))
 
-# Converte listas de dicionários em DataFrames para manipulação com Pandas
-colunas = pandas.DataFrame(colunas)
-registros = pandas.DataFrame(registros)
-fichas = pandas.DataFrame(fichas)
-registro_coluna = pandas.DataFrame(registro_coluna)
+# Contagem das verificações nos índices (resumo no final)
+estatisticas_busca = {'buscas': 0, 'encontrados': 0, 'segundos': 0.0}
+
+# Totais da inserção em conjunto (resumo no final)
+estatisticas_conjunto = {'celulas': 0, 'registros': 0, 'valores': 0}
+
+
+def buscar(indice, chave):
+    """
+    Procura a chave num índice (dict → id ou None; set → True/False) e conta a busca.
+    """
+    inicio = time.perf_counter()
+    if isinstance(indice, set):
+        resultado = chave in indice
+        encontrado = resultado
+    else:
+        resultado = indice.get(chave)
+        encontrado = resultado is not None
+    estatisticas_busca['buscas'] += 1
+    estatisticas_busca['encontrados'] += encontrado
+    estatisticas_busca['segundos'] += time.perf_counter() - inicio
+    return resultado
 
 # %%
 # Configuração de caminhos e datas
@@ -67,75 +119,76 @@ def inserir_valor(ficha_dataframe, num_monitoria_fk):
         
     Lógica:
         1. Para cada linha da ficha:
-           a. Verifica se registro já existe (por num_monitoria + ficha_fk)
+           a. Verifica se registro já existe (por ficha_fk + num_monitoria)
            b. Se não existe, insere em monitoria.registros
            c. Para cada coluna da linha:
               - Verifica se já existe em monitoria.registro_coluna
               - Se não existe, insere o valor
     
     Nota:
-        Usa DataFrames em memória para verificação rápida ao invés de queries repetidas
+        As verificações usam os índices em memória (indice_registros,
+        chaves_registro_coluna), atualizados a cada inserção
     """
-    for indice, linha in ficha_dataframe.iterrows():
+    colunas_fk = ficha_dataframe.columns.tolist()
+    posicao_num_monitoria = colunas_fk.index(num_monitoria_fk)
+
+    for linha in ficha_dataframe.itertuples(index=False, name=None):
+        num_monitoria = linha[posicao_num_monitoria]
+
         # Busca ou cria registro
-        if registros.empty:
-            # Se tabela registros está vazia, insere novo
+        registro_fk = buscar(indice_registros, (ficha_fk, num_monitoria))
+        if registro_fk is None:
             registro_fk = inst_register.registro_sucesso(
                 dicionario={
-                    'num_monitoria': linha[num_monitoria_fk],
+                    'num_monitoria': num_monitoria,
                     'ficha_fk': ficha_fk
                 }, 
-                tabela='monitoria.registros'
+                tabela='monitoria.registros',
+                retornar_id=True
             )
-        else:
-            # Busca registro existente
-            resultado_busca = registros.loc[
-                (registros['ficha_fk'] == ficha_fk) & 
-                (registros['num_monitoria'] == linha[num_monitoria_fk])
-            ]
-            
-            if resultado_busca.empty:
-                # Registro não existe, insere
-                registro_fk = inst_register.registro_sucesso(
-                    dicionario={
-                        'num_monitoria': linha[num_monitoria_fk],
-                        'ficha_fk': ficha_fk
-                    }, 
-                    tabela='monitoria.registros'
-                )
-            else:
-                # Registro existe, pega o FK
-                registro_fk = resultado_busca.values[0][0]
+            indice_registros[(ficha_fk, num_monitoria)] = registro_fk
     
-        # Insere valores de cada coluna
-        for coluna_fk_valor, valor in linha.items():
-            if registro_coluna.empty:
-                # Se tabela vazia, insere direto
-                inst_register.registro_sucesso(
-                    dicionario={
-                        'coluna_fk': coluna_fk_valor,
-                        'registro_fk': registro_fk,
-                        'valor': valor
-                    }, 
-                    tabela='monitoria.registro_coluna'
-                )
-            else:
-                # Verifica se combinação coluna+registro já existe
-                resultado_busca = registro_coluna.loc[
-                    (registro_coluna['coluna_fk'] == coluna_fk_valor) & 
-                    (registro_coluna['registro_fk'] == registro_fk)
-                ]
-                
-                if resultado_busca.empty:
-                    # Não existe, insere
-                    inst_register.registro_sucesso(
-                        dicionario={
-                            'coluna_fk': coluna_fk_valor,
-                            'registro_fk': registro_fk,
-                            'valor': valor
-                        }, 
-                        tabela='monitoria.registro_coluna'
-                    )
+        # Insere valores de cada coluna que ainda não existe para o registro
+        for coluna_fk_valor, valor in zip(colunas_fk, linha):
+            if buscar(chaves_registro_coluna, (coluna_fk_valor, registro_fk)):
+                continue
+            inst_register.registro_sucesso(
+                dicionario={
+                    'coluna_fk': coluna_fk_valor,
+                    'registro_fk': registro_fk,
+                    'valor': valor
+                }, 
+                tabela='monitoria.registro_coluna'
+            )
+            chaves_registro_coluna.add((coluna_fk_valor, registro_fk))
+
+
+def inserir_valor_em_conjunto(ficha_dataframe, num_monitoria_fk):
+    """
+    Insere registros e valores de uma ficha por conjuntos (uma transação).
+    
+    Args:
+        ficha_dataframe (DataFrame): Dados da ficha com colunas já renomeadas para FK
+        num_monitoria_fk (int): FK da coluna 'NUM_MONITORIA'
+        
+    Lógica:
+        1. Monitorias repetidas no arquivo: fica a primeira (como em inserir_valor)
+        2. Formato longo (num_monitoria, coluna_fk, valor) montado com NumPy,
+           uma célula por linha, sem loop em Python
+        3. registers.carga_eav: COPY numa tabela temporária e insert ... select
+           dos registros e valores que ainda não existem
+    """
+    ficha_dataframe = ficha_dataframe.drop_duplicates(subset=[num_monitoria_fk], keep='first')
+    quantidade_linhas, quantidade_colunas = ficha_dataframe.shape
+
+    # Formato longo coluna a coluna: [todas as linhas da coluna 1, da coluna 2, ...]
+    num_monitoria = numpy.tile(ficha_dataframe[num_monitoria_fk].to_numpy(dtype=object), quantidade_colunas)
+    coluna_fk = numpy.repeat(numpy.array(ficha_dataframe.columns.tolist(), dtype=object), quantidade_linhas)
+    valor = ficha_dataframe.to_numpy(dtype=object).ravel(order='F')
+
+    contagem = inst_register.carga_eav(ficha_fk=ficha_fk, linhas=zip(num_monitoria, coluna_fk, valor))
+    for chave, quantidade in contagem.items():
+        estatisticas_conjunto[chave] += quantidade
 
 
 def leitura_excel(caminho, ficha_fk):
@@ -152,7 +205,7 @@ def leitura_excel(caminho, ficha_fk):
     Processo:
         1. Lê Excel
         2. Para cada coluna do Excel:
-           a. Verifica se coluna já existe em monitoria.colunas
+           a. Verifica se coluna já existe (indice_colunas)
            b. Se não existe, insere
            c. Renomeia coluna do DataFrame para o FK
         3. Identifica qual FK é da coluna NUM_MONITORIA
@@ -161,14 +214,9 @@ def leitura_excel(caminho, ficha_fk):
         As colunas do DataFrame são renomeadas para os IDs do banco,
         facilitando a inserção posterior
     """
-    # Lê Excel (arquivos .xls são HTML)
-    ficha_dataframe = pandas.read_html(caminho, keep_default_na=False, decimal=',', thousands='.')
-    
-    # Validação: deve ter exatamente 1 planilha
-    if len(ficha_dataframe) != 1:
-        raise AssertionError('Pandas leu o excel mas o tamanho de planilha foi diferente de 1')
-
-    ficha_dataframe = ficha_dataframe[0]
+    # Lê Excel (arquivos .xls são HTML) em streaming
+    # Levanta AssertionError se o arquivo não tiver tabela
+    ficha_dataframe = ler_tabela_html(caminho, decimal=',', milhar='.')
     
     # Obtém lista de colunas do Excel
     colunas_excel = ficha_dataframe.columns.values.tolist()
@@ -176,34 +224,17 @@ def leitura_excel(caminho, ficha_fk):
     # Para cada coluna do Excel
     for coluna in colunas_excel:
         # Busca ou cria a coluna no banco
-        if colunas.empty:
-            # Tabela vazia, insere nova coluna
+        coluna_fk = buscar(indice_colunas, (ficha_fk, coluna))
+        if coluna_fk is None:
             coluna_fk = inst_register.registro_sucesso(
                 dicionario={
                     'nome_coluna': coluna,
                     'ficha_fk': ficha_fk
                 }, 
-                tabela='monitoria.colunas'
+                tabela='monitoria.colunas',
+                retornar_id=True
             )
-        else:
-            # Busca coluna existente
-            resultado_busca = colunas.loc[
-                (colunas['ficha_fk'] == ficha_fk) & 
-                (colunas['nome_coluna'] == coluna)
-            ]
-            
-            if resultado_busca.empty:
-                # Não existe, insere
-                coluna_fk = inst_register.registro_sucesso(
-                    dicionario={
-                        'nome_coluna': coluna,
-                        'ficha_fk': ficha_fk
-                    }, 
-                    tabela='monitoria.colunas'
-                )
-            else:
-                # Existe, pega FK
-                coluna_fk = resultado_busca.values[0][0]
+            indice_colunas[(ficha_fk, coluna)] = coluna_fk
         
         # Identifica se é a coluna NUM_MONITORIA (chave primária da ficha)
         if coluna == 'NUM_MONITORIA':
@@ -227,36 +258,19 @@ for indice_lista_arquivos, ficha in enumerate(lista_de_arquivos):
     ficha = ficha.replace('{:02d}-{:04d}'.format(data_atual.month, data_atual.year), '')
     ficha = ficha.strip()
     
-    # Busca ou cria a ficha no banco
-    if fichas.empty:
-        # Tabela vazia, insere nova ficha
+    # Busca ou cria a ficha no banco (por nome + mês + ano)
+    ficha_fk = buscar(indice_fichas, (ficha, data_atual.month, data_atual.year))
+    if ficha_fk is None:
         ficha_fk = inst_register.registro_sucesso(
             dicionario={
-                'nome_ficha': ficha
+                'nome_ficha': ficha,
+                'mes': data_atual.month,
+                'ano': data_atual.year
             }, 
-            tabela='monitoria.fichas'
+            tabela='monitoria.fichas',
+            retornar_id=True
         )
-    else:
-        # Busca ficha existente (por nome + mês + ano)
-        resultado_busca = fichas.loc[
-            (fichas['nome_ficha'] == ficha) & 
-            (fichas['mes'] == data_atual.month) & 
-            (fichas['ano'] == data_atual.year)
-        ]
-        
-        if resultado_busca.empty:
-            # Não existe, insere
-            ficha_fk = inst_register.registro_sucesso(
-                dicionario={
-                    'nome_ficha': ficha,
-                    'mes': data_atual.month,
-                    'ano': data_atual.year
-                }, 
-                tabela='monitoria.fichas'
-            )
-        else:
-            # Existe, pega FK
-            ficha_fk = resultado_busca.values[0][0]
+        indice_fichas[(ficha, data_atual.month, data_atual.year)] = ficha_fk
     
     # Lê o Excel e mapeia colunas
     (dataframe, num_monitoria_fk) = leitura_excel(
@@ -265,7 +279,16 @@ for indice_lista_arquivos, ficha in enumerate(lista_de_arquivos):
     )
     
     # Insere registros e valores
-    inserir_valor(ficha_dataframe=dataframe, num_monitoria_fk=num_monitoria_fk)
+    if metodo_insercao == 'conjunto':
+        inserir_valor_em_conjunto(ficha_dataframe=dataframe, num_monitoria_fk=num_monitoria_fk)
+    else:
+        inserir_valor(ficha_dataframe=dataframe, num_monitoria_fk=num_monitoria_fk)
+
+print(f"🔎 Buscas nos índices: {estatisticas_busca['buscas']} "
+      f"({estatisticas_busca['encontrados']} encontradas) em {estatisticas_busca['segundos']:.3f}s")
+if metodo_insercao == 'conjunto':
+    print(f"✅ Inserção em conjunto: {estatisticas_conjunto['celulas']} células, "
+          f"{estatisticas_conjunto['registros']} registros e {estatisticas_conjunto['valores']} valores novos")
 
 
 """
@@ -303,7 +326,8 @@ VANTAGENS:
 - Queries complexas possíveis (joins entre tabelas)
 
 DESVANTAGENS:
-- Performance: muitas queries para inserir
+- Performance: na inserção linha a linha, um comando por célula (a inserção
+  em conjunto faz um COPY e dois insert ... select por ficha)
 - Complexidade: precisa joins para consultas simples
 - Não otimizado para análises (melhor seria star schema)
 """
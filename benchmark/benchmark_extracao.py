@@ -0,0 +1,135 @@
+"""
+Módulo: benchmark/benchmark_extracao.py
+Descrição: Mede a velocidade dos motores de extracao_site contra o Optimus simulado
+Autor: Automação e Inovação - Contact Center
+Uso:
+    python benchmark/benchmark_extracao.py
+    python benchmark/benchmark_extracao.py --motores sincrono http --fichas 40 --latencia-ms 50 --contextos 4
+
+Relatório por motor:
+- fichas/minuto e tempo total
+- tempo por etapa (medidor_esperas: opcao, popup, download, envio, http_resposta, ...)
+- requisições recebidas pelo servidor simulado
+
+Nota:
+    Cada motor roda numa pasta temporária própria (destino, staging,
+    sessão e modelo HTTP), então todos começam com login completo
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import datetime
+import tempfile
+
+# Adiciona o diretório pai ao path para permitir importar 'extracao_site' e 'benchmark'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.servidor_optimus import servidor_optimus
+
+
+def classe_do_motor(motor):
+    """
+    Importa a classe de um motor (mesmos nomes do gerenciador).
+    """
+    if motor == 'assincrono':
+        from extracao_site.main_async import main as site
+    elif motor == 'http':
+        from extracao_site.main_http import main as site
+    else:
+        from extracao_site.main import main as site
+    return site
+
+
+def motor_local(motor, url, pasta, contextos, perfil):
+    """
+    Subclasse do motor apontada para o servidor simulado e para a pasta temporária.
+
+    Args:
+        motor (str): 'sincrono', 'assincrono' ou 'http'
+        url (str): URL do servidor simulado
+        pasta (str): Pasta temporária desta execução
+        contextos (int): quantidade_de_contextos
+        perfil (str): perfil_navegador
+    """
+    site = classe_do_motor(motor)
+    atributos = {
+        'url_optimus': url,
+        'pasta_destino': os.path.join(pasta, 'destino'),
+        'pasta_staging': os.path.join(pasta, 'staging'),
+        'arquivo_sessao': os.path.join(pasta, 'sessao_optimus.json'),
+        'arquivo_modelo_exportacao': os.path.join(pasta, 'modelo_exportacao.json'),
+        'quantidade_de_contextos': contextos,
+        'perfil_navegador': perfil,
+    }
+    os.makedirs(atributos['pasta_destino'], exist_ok=True)
+    return type(f'{motor}_local', (site,), atributos)
+
+
+def medir_motor(motor, url, servidor, contextos, perfil) -> dict:
+    """
+    Executa uma extração completa e devolve as métricas.
+    """
+    pasta = tempfile.mkdtemp(prefix=f'benchmark_{motor}_')
+    try:
+        classe = motor_local(motor, url, pasta, contextos, perfil)
+        extrator = classe(data_dia_anterior=datetime.datetime.now() - datetime.timedelta(days=1))
+        servidor.requisicoes = {}
+
+        inicio = time.perf_counter()
+        extrator.extracao_site_optimus()
+        duracao = time.perf_counter() - inicio
+
+        arquivos = [nome for nome in os.listdir(classe.pasta_destino) if nome.endswith('.xls')]
+        return {
+            'motor': motor,
+            'fichas': len(arquivos),
+            'segundos': duracao,
+            'fichas_por_minuto': len(arquivos) / duracao * 60 if duracao else 0,
+            'etapas': extrator.esperas.resumo(),
+            'requisicoes': dict(servidor.requisicoes),
+        }
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def imprimir_resultado(resultado) -> None:
+    print(f"\n📊 {resultado['motor']}: {resultado['fichas']} fichas em {resultado['segundos']:.1f}s "
+          f"→ {resultado['fichas_por_minuto']:.1f} fichas/min")
+    for etapa, valores in resultado['etapas'].items():
+        print(f"   {etapa:<20} {valores['qtd']:>4}x  média {valores['media_seg']:>7.3f}s  "
+              f"máx {valores['max_seg']:>7.3f}s  total {valores['total_seg']:>8.3f}s")
+    print(f"   requisições: {sum(resultado['requisicoes'].values())} "
+          f"({', '.join(f'{caminho}={qtd}' for caminho, qtd in sorted(resultado['requisicoes'].items()))})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark dos motores de extração contra o Optimus simulado')
+    parser.add_argument('--motores', nargs='+', default=['sincrono', 'assincrono', 'http'],
+                        choices=['sincrono', 'assincrono', 'http'])
+    parser.add_argument('--fichas', type=int, default=20, help='Opções no grupo_36 (a cada 7, uma INATIVA)')
+    parser.add_argument('--linhas', type=int, default=200, help='Monitorias por ficha')
+    parser.add_argument('--latencia-ms', type=int, default=20, help='Atraso de cada página do servidor')
+    parser.add_argument('--latencia-exportacao-ms', type=int, default=200, help='Atraso para gerar cada arquivo')
+    parser.add_argument('--contextos', type=int, default=3, help='quantidade_de_contextos dos motores')
+    parser.add_argument('--perfil', default='producao', choices=['producao', 'depuracao'])
+    argumentos = parser.parse_args()
+
+    servidor = servidor_optimus(fichas=argumentos.fichas, linhas=argumentos.linhas,
+                                latencia_ms=argumentos.latencia_ms,
+                                latencia_exportacao_ms=argumentos.latencia_exportacao_ms)
+    url = servidor.iniciar()
+    print(f"🔹 Optimus simulado em {url}")
+
+    resultados = []
+    try:
+        for motor in argumentos.motores:
+            print(f"\n🔹 Motor: {motor}")
+            resultados.append(medir_motor(motor, url, servidor, argumentos.contextos, argumentos.perfil))
+    finally:
+        servidor.parar()
+
+    for resultado in resultados:
+        imprimir_resultado(resultado)
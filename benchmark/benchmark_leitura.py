@@ -0,0 +1,131 @@
+"""
+Módulo: benchmark/benchmark_leitura.py
+Descrição: Compara pandas.read_html com o leitor em streaming (static/leitor_xls_html.py)
+Autor: Automação e Inovação - Contact Center
+Uso:
+    python benchmark/benchmark_leitura.py
+    python benchmark/benchmark_leitura.py --linhas 100000 --repeticoes 3
+
+Relatório por método (fichas sintéticas do gerador_xls):
+- tempo de leitura (melhor de N repetições)
+- pico de memória: cada leitura roda num processo novo; no Linux/macOS é o
+  ru_maxrss do processo acima do que já estava em uso após os imports,
+  no Windows (sem o módulo resource) é o pico do tracemalloc
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+# Adiciona o diretório pai ao path para permitir importar 'static' e 'benchmark'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Colunas que a inserção no Datamart mantém (insercao_datamart.main.resolver_colunas)
+colunas_insercao = ['matricula', 'nome_funcionario', 'data da monitoria', 'data_ligacao', 'cod_monitoria',
+                    'num_monitoria', 'perfil_monitoria', 'nome_monitor']
+palavras_insercao = ['assertividade', 'distribuidora', 'protocolo']
+
+metodos = ['read_html', 'streaming', 'streaming_projetado']
+
+
+def projecao_insercao(cabecalho) -> list:
+    """
+    Projeção equivalente à da inserção (colunas fixas + dinâmicas).
+    """
+    cabecalho = [coluna.lower() for coluna in cabecalho]
+    indices = [cabecalho.index(coluna) for coluna in colunas_insercao]
+    for palavra in palavras_insercao:
+        indices += [indice for indice, coluna in enumerate(cabecalho) if palavra in coluna][:1]
+    return indices
+
+
+def memoria_maxima_kb() -> float:
+    """
+    ru_maxrss em KB (o macOS informa em bytes).
+    """
+    import resource
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 if sys.platform == 'darwin' else pico
+
+
+def medir_no_processo(metodo, caminho) -> dict:
+    """
+    Executado no processo filho: lê o arquivo uma vez e mede tempo e memória.
+    """
+    import pandas
+    from static.leitor_xls_html import ler_tabela_html
+
+    leitores = {
+        'read_html': lambda: pandas.read_html(caminho, keep_default_na=False, decimal=',', thousands='.')[0],
+        'streaming': lambda: ler_tabela_html(caminho, decimal=',', milhar='.'),
+        'streaming_projetado': lambda: ler_tabela_html(caminho, projetar=projecao_insercao, decimal=',', milhar='.'),
+    }
+
+    try:
+        base_kb = memoria_maxima_kb()
+        fonte = 'ru_maxrss'
+    except ImportError:
+        import tracemalloc
+        tracemalloc.start()
+        fonte = 'tracemalloc'
+
+    inicio = time.perf_counter()
+    df = leitores[metodo]()
+    segundos = time.perf_counter() - inicio
+
+    if fonte == 'ru_maxrss':
+        pico_mb = (memoria_maxima_kb() - base_kb) / 1024
+    else:
+        pico_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+
+    return {'metodo': metodo, 'segundos': segundos, 'pico_mb': pico_mb, 'fonte': fonte,
+            'linhas': df.shape[0], 'colunas': df.shape[1]}
+
+
+def medir(metodo, caminho, repeticoes) -> dict:
+    """
+    Roda o método em processos novos e fica com a melhor repetição.
+    """
+    resultados = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, os.path.abspath(__file__), '--filho', metodo, caminho],
+                               check=True, capture_output=True, text=True).stdout
+        resultados.append(json.loads(saida.strip().splitlines()[-1]))
+    return min(resultados, key=lambda resultado: resultado['segundos'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='read_html x leitor em streaming')
+    parser.add_argument('--linhas', type=int, nargs='+', default=[2000, 20000, 100000],
+                        help='Tamanhos de ficha a comparar (monitorias)')
+    parser.add_argument('--indice', type=int, default=4, help='Layout do gerador_xls (4 = mais perguntas)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--filho', nargs=2, metavar=('METODO', 'CAMINHO'), help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+
+    if argumentos.filho:
+        print(json.dumps(medir_no_processo(*argumentos.filho)))
+        sys.exit(0)
+
+    from benchmark.gerador_xls import gerar_ficha_xls, nome_da_ficha
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_leitura_') as pasta:
+        for linhas in argumentos.linhas:
+            caminho = os.path.join(pasta, f'ficha_{linhas}.xls')
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(gerar_ficha_xls(nome_da_ficha(argumentos.indice), linhas, 2025, 1, argumentos.indice))
+
+            print(f"\n📊 {linhas} monitorias ({os.path.getsize(caminho) / 1024 / 1024:.1f} MB)")
+            referencia = None
+            for metodo in metodos:
+                resultado = medir(metodo, caminho, argumentos.repeticoes)
+                referencia = referencia or resultado
+                print(f"   {metodo:<20} {resultado['segundos']:>8.3f}s "
+                      f"({referencia['segundos'] / resultado['segundos']:>4.1f}x)  "
+                      f"pico {resultado['pico_mb']:>7.1f} MB ({resultado['fonte']})  "
+                      f"{resultado['linhas']}x{resultado['colunas']}")
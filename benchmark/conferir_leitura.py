@@ -0,0 +1,144 @@
+"""
+Módulo: benchmark/conferir_leitura.py
+Descrição: Confere que o leitor em streaming (static/leitor_xls_html.py) devolve o mesmo DataFrame que pandas.read_html
+Autor: Automação e Inovação - Contact Center
+Uso:
+    python benchmark/conferir_leitura.py
+    python benchmark/conferir_leitura.py --fichas 14 --linhas 500
+
+Casos (cada um comparado com assert_frame_equal contra
+read_html(keep_default_na=False, decimal=',', thousands='.')[0]):
+- fichas do gerador_xls em todos os layouts, lidas inteiras e projetadas
+  como na inserção (benchmark_leitura.projecao_insercao)
+- células vazias (coluna numérica com vazio continua texto; linha de uma
+  célula vazia é pulada)
+- números com milhar e decimal ('1.234,56', '-0,5', '1.234.567'), inclusive
+  no meio de uma coluna de texto (o read_html tira os separadores ali também)
+- colunas só com True/False (viram bool)
+- cabeçalho repetido ("x", "x.1", ...)
+- colspan e rowspan (no cabeçalho e no corpo, inclusive rowspan que passa
+  da última linha)
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+from html import escape
+
+# Adiciona o diretório pai ao path para permitir importar 'static' e 'benchmark'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas
+from pandas.testing import assert_frame_equal
+
+from static.leitor_xls_html import ler_tabela_html
+from benchmark.gerador_xls import gerar_ficha_xls, nome_da_ficha
+from benchmark.benchmark_leitura import projecao_insercao
+
+
+def tabela_html(cabecalho, linhas) -> bytes:
+    """
+    Monta um .xls (tabela HTML em ISO-8859-1) no mesmo molde do gerador_xls.
+
+    Args:
+        cabecalho (list): Células do cabeçalho
+        linhas (list): Linhas do corpo (lista de células)
+
+    Célula:
+        Texto, ou (texto, {'colspan': n, 'rowspan': n}) para células com span
+    """
+    def celula(tag, valor):
+        texto, atributos = valor if isinstance(valor, tuple) else (valor, {})
+        extras = ''.join(f' {nome}="{quantidade}"' for nome, quantidade in atributos.items())
+        return f'<{tag}{extras}>{escape(texto)}</{tag}>'
+
+    partes = ['<html><head><meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">',
+              '<title>CONFERENCIA</title></head><body><table border="1">',
+              '<tr>' + ''.join(celula('th', valor) for valor in cabecalho) + '</tr>']
+    for linha in linhas:
+        partes.append('<tr>' + ''.join(celula('td', valor) for valor in linha) + '</tr>')
+    partes.append('</table></body></html>')
+    return '\n'.join(partes).encode('iso-8859-1', errors='replace')
+
+
+# Casos montados à mão: {nome: (cabeçalho, linhas)}
+casos = {
+    'celulas_vazias': (
+        ['MATRICULA', 'NOTA', 'NOME', 'VAZIA'],
+        [['5510001', '10', 'João', ''], ['5510002', '', '', ''], ['5510003', '7', 'Ana', '']],
+    ),
+    'milhar_e_decimal': (
+        ['INTEIRO', 'DECIMAL', 'MISTO', 'NEGATIVO', 'TEXTO'],
+        [['1.234.567', '1.234,56', '12', '-0,5', '1.2.3,4'],
+         ['12.345', '0,25', '3,5', '-1.000', 'abc'],
+         ['7', '10', '1.000', '+2,75', '1.234,56']],
+    ),
+    'coluna_unica_com_vazias': (
+        ['NOTA'],
+        [['10'], [''], ['7'], ['1.000']],
+    ),
+    'booleanos_e_especiais': (
+        ['BOOL', 'EXPOENTE', 'ZEROS', 'PONTO_FINAL', 'NAN'],
+        [['True', '1e3', '007', '5.', 'NaN'],
+         ['false', '1,5e2', '010', '12.', '1'],
+         ['TRUE', '-2E-1', '0', '3', 'x']],
+    ),
+    'cabecalho_repetido': (
+        ['PERGUNTA', 'ASSERTIVIDADE (%)', 'PERGUNTA', 'ASSERTIVIDADE (%)', 'PERGUNTA'],
+        [['SIM', '80,5', 'NÃO', '90', 'N/A'], ['NÃO', '70', 'SIM', '60,25', 'SIM']],
+    ),
+    'colspan': (
+        ['MATRICULA', ('GRUPO', {'colspan': 2}), 'NOTA'],
+        [['5510001', ('SIM', {'colspan': 2}), '10'],
+         [('5510002', {'colspan': 3}), '7'],
+         ['5510003', 'NÃO', 'N/A', '8']],
+    ),
+    'rowspan': (
+        [('MATRICULA', {'rowspan': 2}), 'NOTA', 'NOME'],
+        [['10', 'João'],
+         [('5510002', {'rowspan': 3}), '7', ('Ana', {'rowspan': 2})],
+         ['8'],
+         ['9', ('Zé', {'rowspan': 3})]],
+    ),
+}
+
+
+def comparar(caminho, projetar=None) -> None:
+    """
+    assert_frame_equal entre o leitor em streaming e o read_html.
+
+    Args:
+        caminho (str): Arquivo .xls
+        projetar (callable): Projeção do leitor; no read_html a mesma seleção
+                             é feita depois, por posição
+    """
+    esperado = pandas.read_html(caminho, keep_default_na=False, decimal=',', thousands='.')[0]
+    if projetar is not None:
+        esperado = esperado.iloc[:, projetar([str(coluna) for coluna in esperado.columns])]
+        esperado = esperado.reset_index(drop=True)
+    obtido = ler_tabela_html(caminho, projetar=projetar, decimal=',', milhar='.')
+    assert_frame_equal(obtido, esperado)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Leitor em streaming x pandas.read_html')
+    parser.add_argument('--fichas', type=int, default=12, help='Fichas do gerador_xls (layouts variam com o índice)')
+    parser.add_argument('--linhas', type=int, default=300, help='Monitorias por ficha')
+    argumentos = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='conferir_leitura_') as pasta:
+        for indice in range(argumentos.fichas):
+            caminho = os.path.join(pasta, f'ficha_{indice}.xls')
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(gerar_ficha_xls(nome_da_ficha(indice), argumentos.linhas, 2025, 1, indice))
+            comparar(caminho)
+            comparar(caminho, projetar=projecao_insercao)
+        print(f"✅ {argumentos.fichas} fichas do gerador_xls iguais ao read_html (inteiras e projetadas)")
+
+        for nome, (cabecalho, linhas) in casos.items():
+            caminho = os.path.join(pasta, f'{nome}.xls')
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(tabela_html(cabecalho, linhas))
+            comparar(caminho)
+            print(f"✅ {nome}: igual ao read_html")
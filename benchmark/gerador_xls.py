@@ -0,0 +1,137 @@
+"""
+Módulo: benchmark/gerador_xls.py
+Descrição: Gera fichas de monitoria sintéticas no formato exportado pelo Optimus
+Autor: Automação e Inovação - Contact Center
+Uso: Compartilhado pelo servidor simulado (benchmark/servidor_optimus.py) e pelos benchmarks de leitura
+"""
+
+import os
+import random
+import datetime
+from html import escape
+
+
+# Colunas fixas da exportação (mesmos nomes que insercao_datamart.main.leitura procura)
+colunas_fixas = ['MATRICULA', 'NOME_FUNCIONARIO', 'DATA DA MONITORIA', 'DATA_LIGACAO', 'COD_MONITORIA',
+                 'NUM_MONITORIA', 'PERFIL_MONITORIA', 'NOME_MONITOR']
+
+nomes = ['João da Silva', 'Maria Conceição', 'Antônio Araújo', 'Luíza Gonçalves', 'José Ribeiro',
+         'Ana Paula Simões', 'Francisco Brandão', 'Márcia Lúcia']
+perfis = ['RECEPTIVO', 'ATIVO', 'COBRANÇA', 'OUVIDORIA']
+distribuidoras = ['EQTL MA', 'EQTL PA', 'EQTL PI', 'EQTL AL', 'EQTL GO', 'EQTL AP', 'CEEE']
+
+
+def layout_da_ficha(indice) -> list:
+    """
+    Colunas de uma ficha (varia com o índice, como no Optimus).
+
+    Args:
+        indice (int): Índice da ficha
+
+    Returns:
+        list: Cabeçalho completo, na ordem do arquivo
+
+    Variações:
+    - 3 a 7 perguntas entre as colunas fixas e a assertividade
+    - Sem DISTRIBUIDORA a cada 3 fichas, sem PROTOCOLO a cada 4
+    """
+    perguntas = [f'PERGUNTA {numero} - ITEM AVALIADO {numero}' for numero in range(1, 3 + indice % 5)]
+    colunas = list(colunas_fixas) + perguntas + ['ASSERTIVIDADE (%)']
+    if indice % 3 != 2:
+        colunas.append('DISTRIBUIDORA')
+    if indice % 4 != 3:
+        colunas.append('PROTOCOLO')
+    return colunas
+
+
+def valor_da_coluna(coluna, linha, indice, ano, mes, aleatorio) -> str:
+    """
+    Valor textual de uma célula (datas dd/mm/aaaa, decimal com vírgula).
+    """
+    if coluna == 'MATRICULA':
+        return str(5510000 + aleatorio.randint(0, 9999))
+    if coluna == 'NOME_FUNCIONARIO':
+        return aleatorio.choice(nomes)
+    if coluna == 'DATA DA MONITORIA':
+        momento = datetime.datetime(ano, mes, 1 + linha % 28, 8 + linha % 10, linha % 60)
+        return momento.strftime('%d/%m/%Y %H:%M')
+    if coluna == 'DATA_LIGACAO':
+        return datetime.date(ano, mes, 1 + (linha * 7) % 28).strftime('%d/%m/%Y')
+    if coluna == 'COD_MONITORIA':
+        return str(900 + indice)
+    if coluna == 'NUM_MONITORIA':
+        return str((ano * 100 + mes) * 1000000 + indice * 10000 + linha)
+    if coluna == 'PERFIL_MONITORIA':
+        return aleatorio.choice(perfis)
+    if coluna == 'NOME_MONITOR':
+        return aleatorio.choice(nomes)
+    if coluna == 'ASSERTIVIDADE (%)':
+        return '{:.2f}'.format(aleatorio.uniform(40, 100)).replace('.', ',')
+    if coluna == 'DISTRIBUIDORA':
+        return aleatorio.choice(distribuidoras)
+    if coluna == 'PROTOCOLO':
+        return str(aleatorio.randint(10 ** 9, 10 ** 10 - 1))
+    return aleatorio.choice(['SIM', 'NÃO', 'N/A'])
+
+
+def gerar_ficha_xls(nome_ficha, linhas, ano, mes, indice=0) -> bytes:
+    """
+    Gera o conteúdo de um .xls exportado (tabela HTML em ISO-8859-1).
+
+    Args:
+        nome_ficha (str): Nome da ficha (título da planilha)
+        linhas (int): Quantidade de monitorias
+        ano (int): Ano de referência
+        mes (int): Mês de referência
+        indice (int): Índice da ficha (layout e semente dos dados)
+
+    Returns:
+        bytes: Arquivo pronto para gravar/enviar
+
+    Nota:
+        Mesma semente → mesmo conteúdo, para comparar execuções
+    """
+    aleatorio = random.Random(f'{nome_ficha}-{ano}-{mes}')
+    colunas = layout_da_ficha(indice)
+
+    partes = ['<html><head><meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">',
+              f'<title>{escape(nome_ficha)}</title></head><body><table border="1">',
+              '<tr>' + ''.join(f'<th>{escape(coluna)}</th>' for coluna in colunas) + '</tr>']
+    for linha in range(linhas):
+        celulas = (escape(valor_da_coluna(coluna, linha, indice, ano, mes, aleatorio)) for coluna in colunas)
+        partes.append('<tr>' + ''.join(f'<td>{celula}</td>' for celula in celulas) + '</tr>')
+    partes.append('</table></body></html>')
+    return '\n'.join(partes).encode('iso-8859-1', errors='replace')
+
+
+def gravar_fichas_xls(pasta, quantidade, linhas, ano, mes) -> list:
+    """
+    Grava fichas sintéticas com o nome padrão "MM-AAAA Nome da Ficha.xls".
+
+    Args:
+        pasta (str): Pasta de destino
+        quantidade (int): Quantidade de fichas
+        linhas (int): Monitorias por ficha
+        ano (int): Ano de referência
+        mes (int): Mês de referência
+
+    Returns:
+        list: Caminhos gravados
+    """
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    for indice in range(quantidade):
+        nome_ficha = nome_da_ficha(indice)
+        caminho = os.path.join(pasta, '{:02d}-{:04d} {}.xls'.format(mes, ano, nome_ficha))
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(gerar_ficha_xls(nome_ficha, linhas, ano, mes, indice))
+        caminhos.append(caminho)
+    return caminhos
+
+
+def nome_da_ficha(indice) -> str:
+    """
+    Nome sintético de uma ficha (a cada 7 fichas, uma INATIVA).
+    """
+    nome = 'FICHA TESTE {:03d}'.format(indice)
+    return nome + ' - INATIVA' if indice % 7 == 6 else nome
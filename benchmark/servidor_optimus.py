@@ -0,0 +1,344 @@
+"""
+Módulo: benchmark/servidor_optimus.py
+Descrição: Servidor local que simula as telas do Optimus usadas pela extração
+Autor: Automação e Inovação - Contact Center
+Uso: Benchmark e testes de regressão dos motores de extracao_site sem acessar 10.6.1.160
+
+Telas simuladas:
+- /                 → página inicial com o link "Entrar" (abre o popup de login)
+- /login            → formulário txtLogin/txtSenha
+- /principal        → menu (ids 1 → 16 → 20 → 853, dois elementos 853) e iframe navMain
+- /exportacao       → rdItem_*, calendário (datepickerGoPrev/Next + meses),
+                      grupo_2/6/32/36 com chkTodos* e as imagens "Selecionar"
+- /exportar         → popup que dispara o download
+- /exportacao.xls   → o arquivo (tabela HTML, gerador_xls)
+
+Uso avulso:
+    python benchmark/servidor_optimus.py --porta 8080 --fichas 30 --linhas 500 --latencia-ms 50
+"""
+
+import os
+import sys
+import json
+import time
+import secrets
+import argparse
+import datetime
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Adiciona o diretório pai ao path para permitir importar 'benchmark'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.gerador_xls import gerar_ficha_xls, nome_da_ficha
+
+
+pagina_inicial = """<html><head><link rel="stylesheet" href="/estilo.css"></head><body>
+<img src="/img/logo.gif">
+<a href="#" onclick="window.open('/login', 'login'); return false;">Entrar</a>
+</body></html>"""
+
+pagina_login = """<html><head><link rel="stylesheet" href="/estilo.css"></head><body>
+<form method="post" action="/login">
+<input name="txtLogin" type="text"> <input name="txtSenha" type="password">
+<button type="submit">Entrar</button>
+</form></body></html>"""
+
+pagina_principal = """<html><head><link rel="stylesheet" href="/estilo.css"></head><body>
+<a id="1" href="#" onclick="document.getElementById('sub1').style.display='block'; return false;">Monitoria</a>
+<div id="sub1" style="display:none">
+  <a id="16" href="#" onclick="document.getElementById('sub16').style.display='block'; return false;">Relatórios</a>
+</div>
+<div id="sub16" style="display:none">
+  <a id="20" href="#" onclick="document.getElementById('sub20').style.display='block'; return false;">Exportações</a>
+</div>
+<div id="sub20" style="display:none">
+  <span id="853">Exportar monitorias (atalho)</span>
+  <a id="853" href="#" onclick="document.getElementsByName('navMain')[0].src='/exportacao'; return false;">Exportar monitorias</a>
+</div>
+<iframe name="navMain" src="/inicio" width="100%" height="600"></iframe>
+</body></html>"""
+
+pagina_exportacao = """<html><head><link rel="stylesheet" href="/estilo.css"></head><body>
+<input type="checkbox" id="rdItem_121"> <input type="checkbox" id="rdItem_150">
+<input type="checkbox" id="rdItem_85"> <input type="checkbox" id="rdItem_201">
+<input type="checkbox" id="rdItem_166">
+<table><tr><th class="datepickerGoPrev">&lt;</th><th id="ano"></th><th class="datepickerGoNext">&gt;</th></tr></table>
+<div id="meses"></div>
+<div id="grupos"></div>
+<img alt="Selecionar" src="/img/selecionar.gif">
+<img alt="Selecionar" src="/img/selecionar.gif" onclick="exportar()">
+<script>
+var FICHAS = __FICHAS__;
+var LATENCIA = __LATENCIA__;
+var MESES = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez'];
+var anoExibido = new Date().getFullYear();
+var selecionado = null;
+
+function desenharAno() { document.getElementById('ano').textContent = anoExibido; }
+document.querySelector('.datepickerGoPrev').onclick = function () { anoExibido--; desenharAno(); };
+document.querySelector('.datepickerGoNext').onclick = function () { anoExibido++; desenharAno(); };
+document.getElementById('meses').innerHTML = MESES.map(function (m, i) {
+    return '<a href="#" onclick="escolherMes(' + (i + 1) + '); return false;">' + m + '</a>';
+}).join(' ');
+desenharAno();
+
+function escolherMes(mes) {
+    selecionado = [anoExibido, mes];
+    // O Optimus recarrega os grupos do período escolhido
+    document.getElementById('grupos').innerHTML = '';
+    setTimeout(desenharGrupos, LATENCIA);
+}
+
+function desenharGrupos() {
+    var html = '';
+    [2, 6, 32].forEach(function (g) {
+        html += '<select name="grupo_' + g + '" multiple><option value="1">OPÇÃO ' + g + '</option></select>' +
+                '<input type="checkbox" name="chkTodos' + g + '">';
+    });
+    html += '<select name="grupo_36">' + FICHAS.map(function (f) {
+        return '<option value="' + f[0] + '">  ' + f[1] + '  </option>';
+    }).join('') + '</select>';
+    document.getElementById('grupos').innerHTML = html;
+}
+
+function exportar() {
+    var ficha = document.querySelector('select[name="grupo_36"]');
+    if (!selecionado || !ficha) { alert('Selecione o período'); return; }
+    window.open('/exportar?ano=' + selecionado[0] + '&mes=' + selecionado[1] + '&grupo_36=' + ficha.value,
+                '_blank');
+}
+</script></body></html>"""
+
+pagina_popup = """<html><body>Gerando exportação...
+<script>
+window.addEventListener('load', function () {
+    setTimeout(function () { window.location.href = '/exportacao.xls' + window.location.search; }, __ESPERA__);
+});
+</script></body></html>"""
+
+# GIF 1x1 transparente (recurso que o perfil 'producao' bloqueia)
+gif_vazio = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00,'
+             b'\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+
+class manipulador_optimus(BaseHTTPRequestHandler):
+    """
+    Requisições do servidor simulado (configuração em self.server.optimus).
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, formato, *args) -> None:
+        # Silencioso: o benchmark mede tempo, não imprime cada requisição
+        pass
+
+    def responder(self, status, corpo, tipo='text/html; charset=utf-8', cabecalhos=None) -> None:
+        if isinstance(corpo, str):
+            corpo = corpo.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def logado(self) -> bool:
+        cookies = self.headers.get('Cookie', '')
+        sessoes = [parte.split('=', 1)[1] for parte in cookies.split('; ') if parte.startswith('SESSAO_OPTIMUS=')]
+        return any(self.server.optimus.sessao_valida(sessao) for sessao in sessoes)
+
+    def do_GET(self) -> None:
+        optimus = self.server.optimus
+        url = urlsplit(self.path)
+        optimus.contar(url.path)
+
+        if url.path == '/estilo.css':
+            return self.responder(200, 'body { font-family: sans-serif; }', 'text/css')
+        if url.path.startswith('/img/'):
+            return self.responder(200, gif_vazio, 'image/gif')
+
+        optimus.aguardar_latencia()
+        if url.path == '/':
+            return self.responder(200, pagina_inicial)
+        if url.path == '/login':
+            return self.responder(200, pagina_login)
+        if url.path == '/inicio':
+            return self.responder(200, '<html><body>Bem-vindo</body></html>')
+
+        # Demais telas exigem sessão: sem ela o Optimus volta para o login
+        if not self.logado():
+            if url.path == '/exportacao.xls':
+                return self.responder(302, '', cabecalhos={'Location': '/login'})
+            return self.responder(200, pagina_login)
+
+        if url.path == '/principal':
+            return self.responder(200, pagina_principal)
+        if url.path == '/exportacao':
+            pagina = pagina_exportacao.replace('__FICHAS__', json.dumps(optimus.opcoes_fichas()))
+            return self.responder(200, pagina.replace('__LATENCIA__', str(optimus.latencia_ms)))
+        if url.path == '/exportar':
+            return self.responder(200, pagina_popup.replace('__ESPERA__', str(optimus.espera_popup_ms)))
+        if url.path == '/exportacao.xls':
+            return self.exportar(parse_qs(url.query))
+        return self.responder(404, 'não encontrado')
+
+    def do_POST(self) -> None:
+        optimus = self.server.optimus
+        url = urlsplit(self.path)
+        optimus.contar(url.path)
+        corpo = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('latin-1')
+        optimus.aguardar_latencia()
+
+        if url.path == '/login':
+            campos = parse_qs(corpo)
+            if not campos.get('txtLogin') or not campos.get('txtSenha'):
+                return self.responder(200, pagina_login)
+            sessao = optimus.nova_sessao()
+            return self.responder(302, '', cabecalhos={'Location': '/principal',
+                                                       'Set-Cookie': f'SESSAO_OPTIMUS={sessao}; Path=/'})
+        return self.responder(404, 'não encontrado')
+
+    def exportar(self, campos) -> None:
+        """
+        Gera o .xls da ficha pedida (grupo_36) no mês pedido.
+        """
+        optimus = self.server.optimus
+        try:
+            ano, mes = int(campos['ano'][0]), int(campos['mes'][0])
+            indice = int(campos['grupo_36'][0]) - optimus.valor_inicial
+        except (KeyError, ValueError):
+            return self.responder(400, 'parâmetros inválidos')
+        if not 0 <= indice < optimus.fichas:
+            return self.responder(404, 'ficha inexistente')
+
+        time.sleep(optimus.latencia_exportacao_ms / 1000)
+        corpo = optimus.arquivo_ficha(indice, ano, mes)
+        return self.responder(200, corpo, 'application/vnd.ms-excel',
+                              {'Content-Disposition': 'attachment; filename="exportacao.xls"'})
+
+
+class servidor_optimus:
+    """
+    Servidor HTTP simulado do Optimus, executado numa thread.
+
+    Configuração:
+        fichas (int): Opções no grupo_36 (a cada 7, uma INATIVA)
+        linhas (int): Monitorias por arquivo exportado
+        latencia_ms (int): Atraso de cada página e da recarga dos grupos
+        latencia_exportacao_ms (int): Atraso extra para gerar cada arquivo
+        espera_popup_ms (int): Tempo entre o popup carregar e o download começar
+        validade_sessao_seg (int): Expiração das sessões (0 = não expira)
+
+    Exemplo:
+        servidor = servidor_optimus(fichas=20, linhas=300, latencia_ms=30)
+        url = servidor.iniciar()   # "http://127.0.0.1:<porta>/"
+        ...
+        servidor.parar()
+    """
+
+    valor_inicial = 1000
+
+    def __init__(self, porta=0, fichas=20, linhas=200, latencia_ms=0, latencia_exportacao_ms=0,
+                 espera_popup_ms=100, validade_sessao_seg=0) -> None:
+        self.porta = porta
+        self.fichas = fichas
+        self.linhas = linhas
+        self.latencia_ms = latencia_ms
+        self.latencia_exportacao_ms = latencia_exportacao_ms
+        self.espera_popup_ms = espera_popup_ms
+        self.validade_sessao_seg = validade_sessao_seg
+        self.sessoes = {}
+        self.requisicoes = {}
+        self._arquivos = {}
+        self._trava = threading.Lock()
+        self._http = None
+        self._thread = None
+
+    def aguardar_latencia(self) -> None:
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms / 1000)
+
+    def contar(self, caminho) -> None:
+        with self._trava:
+            self.requisicoes[caminho] = self.requisicoes.get(caminho, 0) + 1
+
+    def nova_sessao(self) -> str:
+        sessao = secrets.token_hex(16)
+        with self._trava:
+            self.sessoes[sessao] = datetime.datetime.now()
+        return sessao
+
+    def sessao_valida(self, sessao) -> bool:
+        with self._trava:
+            inicio = self.sessoes.get(sessao)
+        if inicio is None:
+            return False
+        if not self.validade_sessao_seg:
+            return True
+        return (datetime.datetime.now() - inicio).total_seconds() <= self.validade_sessao_seg
+
+    def opcoes_fichas(self) -> list:
+        """
+        Returns:
+            list: [valor, nome] das opções do grupo_36
+        """
+        return [[str(self.__class__.valor_inicial + indice), nome_da_ficha(indice)] for indice in range(self.fichas)]
+
+    def arquivo_ficha(self, indice, ano, mes) -> bytes:
+        """
+        Conteúdo exportado de uma ficha (gerado uma vez e guardado em memória).
+        """
+        chave = (indice, ano, mes)
+        with self._trava:
+            corpo = self._arquivos.get(chave)
+        if corpo is None:
+            corpo = gerar_ficha_xls(nome_da_ficha(indice), self.linhas, ano, mes, indice)
+            with self._trava:
+                self._arquivos[chave] = corpo
+        return corpo
+
+    def iniciar(self) -> str:
+        """
+        Sobe o servidor numa thread.
+
+        Returns:
+            str: URL base (equivalente a main.url_optimus)
+        """
+        self._http = ThreadingHTTPServer(('127.0.0.1', self.porta), manipulador_optimus)
+        self._http.daemon_threads = True
+        self._http.optimus = self
+        self._thread = threading.Thread(target=self._http.serve_forever, name='servidor_optimus', daemon=True)
+        self._thread.start()
+        return f'http://127.0.0.1:{self._http.server_address[1]}/'
+
+    def parar(self) -> None:
+        """
+        Encerra o servidor.
+        """
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor simulado do Optimus')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--fichas', type=int, default=20)
+    parser.add_argument('--linhas', type=int, default=200)
+    parser.add_argument('--latencia-ms', type=int, default=0)
+    parser.add_argument('--latencia-exportacao-ms', type=int, default=0)
+    argumentos = parser.parse_args()
+
+    servidor = servidor_optimus(porta=argumentos.porta, fichas=argumentos.fichas, linhas=argumentos.linhas,
+                                latencia_ms=argumentos.latencia_ms,
+                                latencia_exportacao_ms=argumentos.latencia_exportacao_ms)
+    print(f"🔹 Optimus simulado em {servidor.iniciar()} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.parar()
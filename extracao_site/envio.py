@@ -0,0 +1,148 @@
+"""
+Módulo: extracao_site/envio.py
+Descrição: Envio em segundo plano das fichas baixadas para o compartilhamento de rede
+Autor: Automação e Inovação - Contact Center
+Uso: Os downloads caem primeiro no disco local; este módulo copia para o UNC sem travar a extração
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class envio_compartilhamento:
+    """
+    Pool de threads que copia os arquivos do staging local para a pasta de destino.
+
+    Para cada arquivo:
+    1. Calcula o SHA-256 no disco local (rápido)
+    2. Copia para "<destino>.parcial" no compartilhamento
+    3. Renomeia para o nome final com os.replace (atômico no mesmo volume),
+       então a importação nunca enxerga um .xls pela metade
+    4. Registra no manifesto e apaga o arquivo local
+
+    A extração continua imediatamente após enviar(); aguardar() bloqueia
+    até todos os envios serem confirmados.
+
+    Callback:
+        Se ao_confirmar estiver definido, é chamado com (destino, mes, ficha)
+        a cada arquivo confirmado no compartilhamento (e para os que o
+        manifesto já tinha, via notificar()). É como a importação em
+        pipeline (gerenciador/pipeline.py) recebe cada ficha pronta.
+    """
+
+    def __init__(self, pasta_local, pasta_destino, quantidade_threads, manifesto, esperas) -> None:
+        """
+        Args:
+            pasta_local (str): Pasta de staging no disco local
+            pasta_destino (str): Pasta final (compartilhamento de rede)
+            quantidade_threads (int): Cópias simultâneas para o compartilhamento
+            manifesto: manifesto_downloads onde cada envio confirmado é registrado
+            esperas: medidor_esperas para registrar o tempo de cada envio
+        """
+        self.pasta_local = pasta_local
+        self.pasta_destino = pasta_destino
+        self.quantidade_threads = quantidade_threads
+        self.manifesto = manifesto
+        self.esperas = esperas
+        self.ao_confirmar = None
+        self._executor = None
+        self._futuros = {}
+        self._trava = threading.Lock()
+
+    def caminho_local(self, file_name) -> str:
+        """
+        Caminho do arquivo no staging local (cria a pasta se necessário).
+
+        Args:
+            file_name (str): Nome final do arquivo
+
+        Returns:
+            str: Caminho em pasta_local
+        """
+        os.makedirs(self.pasta_local, exist_ok=True)
+        return os.path.join(self.pasta_local, file_name)
+
+    def _copiar(self, caminho_local, mes, ficha) -> str:
+        """
+        Copia um arquivo para o compartilhamento (executado no pool).
+
+        Returns:
+            str: Caminho final no compartilhamento
+        """
+        with self.esperas.medir('envio'):
+            sha256 = hashlib.sha256()
+            with open(caminho_local, 'rb') as arquivo:
+                for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                    sha256.update(bloco)
+
+            destino = os.path.join(self.pasta_destino, os.path.basename(caminho_local))
+            arquivo_temporario = destino + '.parcial'
+            shutil.copyfile(caminho_local, arquivo_temporario)
+            os.replace(arquivo_temporario, destino)
+
+        self.manifesto.registrar(mes=mes, ficha=ficha, caminho=destino, sha256=sha256.hexdigest())
+        os.remove(caminho_local)
+        print(f" Arquivo enviado: {os.path.basename(destino)}")
+        self.notificar(destino=destino, mes=mes, ficha=ficha)
+        return destino
+
+    def notificar(self, destino, mes, ficha) -> None:
+        """
+        Avisa o callback ao_confirmar que um arquivo está pronto no destino.
+
+        Args:
+            destino (str): Caminho final no compartilhamento
+            mes (str): Mês de referência ("MM-AAAA")
+            ficha (str): Nome da ficha
+        """
+        if self.ao_confirmar is not None:
+            self.ao_confirmar(destino, mes, ficha)
+
+    def enviar(self, caminho_local, mes, ficha):
+        """
+        Agenda o envio de um arquivo do staging para o compartilhamento.
+
+        Args:
+            caminho_local (str): Arquivo já salvo em pasta_local
+            mes (str): Mês de referência ("MM-AAAA")
+            ficha (str): Nome da ficha
+
+        Returns:
+            concurrent.futures.Future: Resolve com o caminho final
+        """
+        with self._trava:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.quantidade_threads,
+                                                    thread_name_prefix='envio')
+            futuro = self._executor.submit(self._copiar, caminho_local, mes, ficha)
+            self._futuros[futuro] = ficha
+        return futuro
+
+    def aguardar(self) -> None:
+        """
+        Bloqueia até todos os envios terminarem e encerra o pool.
+
+        Raises:
+            AssertionError: Se algum envio falhou (o arquivo local é mantido
+                            no staging e a ficha fica fora do manifesto)
+        """
+        with self._trava:
+            executor, futuros = self._executor, self._futuros
+            self._executor, self._futuros = None, {}
+
+        if executor is None:
+            return
+
+        wait(list(futuros))
+        executor.shutdown()
+
+        erros = []
+        for futuro, ficha in futuros.items():
+            if futuro.exception() is not None:
+                print(f" Erro ao enviar {ficha}: {str(futuro.exception())}")
+                erros.append(ficha)
+        if erros:
+            raise AssertionError(f'Falha ao enviar {len(erros)} fichas para o compartilhamento: {erros}')
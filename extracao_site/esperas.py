@@ -0,0 +1,146 @@
+"""
+Módulo: extracao_site/esperas.py
+Descrição: Esperas orientadas a eventos do Playwright com medição de tempo
+Autor: Automação e Inovação - Contact Center
+Uso: Substitui os time.sleep fixos do loop de fichas em extracao_site/main.py
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+class medidor_esperas:
+    """
+    Camada de espera que aguarda o sinal real de prontidão de cada etapa.
+
+    Ao invés de pausas fixas (time.sleep(3)), cada método espera o evento
+    correspondente do Playwright e registra quanto tempo a espera levou.
+
+    Etapas registradas:
+    - opcao: opção da ficha presente no select grupo_36
+    - popup: popup de exportação com estado 'load'
+    - download_inicio: evento 'download' disparado pelo popup
+    - download_conclusao: download.path() concluído (arquivo completo)
+    - ficha_total: tempo total de uma ficha (do select ao arquivo salvo)
+
+    Nota:
+        Thread-safe: uma única instância é compartilhada entre os workers
+    """
+
+    def __init__(self) -> None:
+        """
+        Inicializa o medidor.
+
+        Atributos:
+            tempos: Dicionário {etapa: [segundos, segundos, ...]}
+        """
+        self.tempos = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, etapa, segundos) -> None:
+        """
+        Registra a duração de uma etapa.
+
+        Args:
+            etapa (str): Nome da etapa
+            segundos (float): Duração medida
+        """
+        with self._trava:
+            self.tempos.setdefault(etapa, []).append(segundos)
+
+    @contextmanager
+    def medir(self, etapa):
+        """
+        Context manager que mede o bloco e registra na etapa informada.
+
+        Exemplo:
+            with esperas.medir('popup'):
+                page.wait_for_load_state('load')
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def aguardar_opcao(self, select_element, valor, timeout=0) -> None:
+        """
+        Aguarda a opção da ficha existir no select antes de selecionar.
+
+        Args:
+            select_element: Locator do select grupo_36
+            valor (str): value da opção
+            timeout (int): Limite em ms (0 = sem limite)
+
+        Nota:
+            state='attached' porque <option> não é considerado "visível"
+            pelo Playwright enquanto o select está fechado
+        """
+        with self.medir('opcao'):
+            select_element.locator(f"option[value={json.dumps(valor)}]").first.wait_for(state="attached", timeout=timeout)
+
+    def aguardar_popup(self, popup_info, timeout=0):
+        """
+        Obtém o popup capturado e aguarda o estado 'load'.
+
+        Args:
+            popup_info: Resultado de page.expect_popup()
+            timeout (int): Limite em ms para as esperas do popup (0 = sem limite)
+
+        Returns:
+            page: Página do popup carregada
+        """
+        with self.medir('popup'):
+            page_popup = popup_info.value
+            page_popup.set_default_timeout(timeout)
+            page_popup.wait_for_load_state("load")
+        return page_popup
+
+    def aguardar_download(self, page_popup):
+        """
+        Aguarda o popup disparar o download e o arquivo terminar de baixar.
+
+        Args:
+            page_popup: Página do popup de exportação
+
+        Returns:
+            download: Objeto Download já concluído (save_as apenas copia)
+        """
+        with self.medir('download_inicio'):
+            download = page_popup.wait_for_event("download")
+
+        # download.path() bloqueia até o navegador terminar de gravar o arquivo
+        with self.medir('download_conclusao'):
+            download.path()
+
+        return download
+
+    def resumo(self) -> dict:
+        """
+        Consolida os tempos registrados por etapa.
+
+        Returns:
+            dict: {etapa: {'qtd', 'total_seg', 'media_seg', 'max_seg'}}
+        """
+        with self._trava:
+            tempos = {etapa: list(lista) for etapa, lista in self.tempos.items()}
+
+        return {
+            etapa: {
+                'qtd': len(lista),
+                'total_seg': round(sum(lista), 3),
+                'media_seg': round(sum(lista) / len(lista), 3),
+                'max_seg': round(max(lista), 3),
+            }
+            for etapa, lista in tempos.items() if lista
+        }
+
+    def imprimir_resumo(self) -> None:
+        """
+        Imprime o resumo de tempos por etapa (latência real por ficha).
+        """
+        for etapa, valores in self.resumo().items():
+            print(f"⏱️ {etapa}: {valores['qtd']}x | média {valores['media_seg']}s | "
+                  f"máx {valores['max_seg']}s | total {valores['total_seg']}s")
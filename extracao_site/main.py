@@ -1,6 +1,6 @@
 """
 Módulo: extracao_site/main.py
-Versão: 1.0.2
+Versão: 1.1.0
 Descrição: Automatiza extração de fichas de monitoria do sistema Optimus usando Playwright
 Autor: Automação e Inovação - Contact Center
 Colaboradores: Ricardo Gomes (TATE5507392); Everton Barreto (U5511121)
@@ -8,10 +8,24 @@ Sistema: Optimus (10.6.1.160)
 """
 
 import os
+import sys
+import argparse
 import datetime
 import time
+import queue
+import random
+import threading
 from playwright.sync_api import sync_playwright
 
+# Adiciona o diretório pai ao path para permitir importar 'extracao_site' e 'static'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extracao_site.esperas import medidor_esperas
+from extracao_site.sessao import sessao_optimus
+from extracao_site.manifesto import manifesto_downloads
+from extracao_site.rede import filtro_rede
+from extracao_site.envio import envio_compartilhamento
+
 
 class main:
     """
@@ -25,6 +39,17 @@ class main:
     5. Baixa cada ficha como arquivo .xls
     
     Tecnologia: Playwright (automação de navegador)
+    
+    Paralelismo:
+        As fichas são distribuídas numa fila compartilhada entre
+        'quantidade_de_contextos' navegadores logados. Cada worker seleciona
+        a ficha no grupo_36 da sua própria página e salva o download.
+
+    Backfill:
+        extracao_site_optimus(meses=[...]) extrai vários meses na mesma
+        execução. Cada item da fila leva o seu mês e o worker só troca o
+        mês no calendário quando o item muda de mês, reaproveitando o
+        mesmo navegador logado (sem novo login por mês).
     """
     
     # Lista de abreviações dos meses para navegação no site
@@ -34,47 +59,118 @@ class main:
     usuario_optimus = '5510004'
     senha_optimus = 'SFJ@n26ina00@'
 
+    # Endereço do Optimus e pasta de destino dos arquivos baixados
+    url_optimus = "http://10.6.1.160/"
+    pasta_destino = r"\\EQTSPDSRCL01\planejamento_e_trafego\Automacao e Inovacao\Fichas_monitorias"
+
+    # Script executado no select grupo_36: [[value, texto, inativa], ...]
+    script_opcoes_fichas = """s => Array.from(s.options).map(o => [
+        o.value, o.text.trim(), o.disabled || o.text.toUpperCase().includes('INATIVA')
+    ])"""
+
+    # Quantidade de navegadores logados consumindo a fila de fichas
+    # 1 = comportamento serial original
+    quantidade_de_contextos = 3
+
+    # Cache da sessão logada (storage_state + link direto da exportação)
+    # Reutilizado entre execuções/retentativas enquanto estiver válido
+    arquivo_sessao = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessao_optimus.json')
+    validade_sessao_minutos = 120
+    timeout_validacao_sessao_ms = 15000
+
+    # Manifesto dos downloads (na pasta_destino): permite retomar a extração
+    arquivo_manifesto = 'manifesto_downloads.json'
+
+    # Staging local: o download cai no disco local e é enviado ao
+    # compartilhamento em segundo plano (sem travar a próxima ficha)
+    pasta_staging = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'staging')
+    quantidade_de_envios_simultaneos = 4
+
+    # Retentativa por ficha: limite, backoff exponencial com jitter e
+    # tempo máximo de cada espera da ficha (0 = sem limite, nunca falha)
+    tentativas_por_ficha = 3
+    backoff_base_seg = 2
+    backoff_maximo_seg = 30
+    timeout_ficha_ms = 180000
+
+    # Perfis do navegador:
+    # 'producao'   → headless e bloqueio de imagens/fontes/CSS/analytics
+    # 'depuracao'  → navegador visível, sem bloqueio (mostra o que seria economizado)
+    perfis_navegador = {
+        'producao': {'headless': True, 'bloquear_recursos': True},
+        'depuracao': {'headless': False, 'bloquear_recursos': False},
+    }
+    perfil_navegador = 'producao'
+
     def __init__(self, data_dia_anterior) -> None:
         """
         Inicializa o extrator.
         
         Args:
             data_dia_anterior (datetime): Data de referência para extração
+                                          (None = ontem)
             
         Atributos:
             tempo_espera: Timestamp para medição de tempo
             caminho_relativo: Diretório do script
             data_atual: Datetime agora
-            dia_anterior: Data D-1 (referência para os dados)
+            dia_anterior: Data de referência (D-1 por padrão); mês padrão da extração
+            esperas: Medidor das esperas por evento (tempo real por etapa)
+            sessao: Cache da sessão logada do Optimus
+            manifesto: Registro das fichas já baixadas (retomada)
+            filtro_rede: Bloqueio de recursos e contagem de requisições/bytes
+            envio: Pool que copia o staging local para pasta_destino
+            cache_fichas: Fichas ativas por mês de referência {"MM-AAAA": [(valor, nome)]}
+            estado_paginas: Mês selecionado em cada página {page: {'ano_exibido', 'mes'}}
         """
         self.tempo_espera = time.time()
         self.caminho_relativo = os.path.dirname(__file__)
         self.data_atual = datetime.datetime.now()
-        self.dia_anterior = self.data_atual - datetime.timedelta(days=1)
+        if data_dia_anterior is None:
+            data_dia_anterior = self.data_atual - datetime.timedelta(days=1)
+        self.dia_anterior = data_dia_anterior
+        self.esperas = medidor_esperas()
+        self.sessao = sessao_optimus(arquivo=self.__class__.arquivo_sessao,
+                                     validade_minutos=self.__class__.validade_sessao_minutos)
+        self.manifesto = manifesto_downloads(arquivo=os.path.join(self.__class__.pasta_destino,
+                                                                  self.__class__.arquivo_manifesto))
+        self.perfil = self.__class__.perfis_navegador[self.__class__.perfil_navegador]
+        self.filtro_rede = filtro_rede(bloquear=self.perfil['bloquear_recursos'])
+        self.envio = envio_compartilhamento(pasta_local=self.__class__.pasta_staging,
+                                            pasta_destino=self.__class__.pasta_destino,
+                                            quantidade_threads=self.__class__.quantidade_de_envios_simultaneos,
+                                            manifesto=self.manifesto,
+                                            esperas=self.esperas)
+        self.cache_fichas = {}
+        self._trava_fichas = threading.Lock()
+        self.estado_paginas = {}
 
-    def configuracao_playwright(self, p):
+    def configuracao_playwright(self, p, storage_state=None):
         """
         Configura e inicializa o navegador Playwright.
         
         Args:
             p: Instância do Playwright
+            storage_state (dict): Sessão salva a restaurar no contexto (opcional)
             
         Returns:
             page: Objeto de página do navegador
             
         Configurações:
-        - headless=False: Navegador visível (útil para debug)
+        - headless: Conforme perfil_navegador (producao=True, depuracao=False)
         - accept_downloads=True: Permite downloads automáticos
+        - filtro_rede: Bloqueia imagens/fontes/CSS/analytics no perfil producao
         - timeout=0: Sem timeout (espera indefinida)
         
         Nota:
-            headless=False é importante para ambientes que não suportam
+            Use perfil_navegador = 'depuracao' em ambientes que não suportam
             modo headless ou quando precisa visualizar a execução
         """
-        browser = p.chromium.launch(headless=False)
+        browser = p.chromium.launch(headless=self.perfil['headless'])
         
         # Cria contexto com permissão para downloads
-        context1 = browser.new_context(accept_downloads=True)
+        context1 = browser.new_context(accept_downloads=True, storage_state=storage_state)
+        self.filtro_rede.instalar(context1)
         
         # Cria nova página
         page = context1.new_page()
@@ -95,11 +191,11 @@ class main:
             page1: Nova página que abre após clicar (popup)
             
         Comportamento:
-        - Acessa http://10.6.1.160/
+        - Acessa url_optimus (http://10.6.1.160/)
         - Aguarda popup abrir (janela de login)
         - Retorna a página do popup
         """
-        page.goto("http://10.6.1.160/")
+        page.goto(self.__class__.url_optimus)
         
         # expect_popup captura a nova janela que vai abrir
         with page.expect_popup() as popup_info:
@@ -164,15 +260,121 @@ class main:
         # Pega o segundo elemento com id=853 (nth=1 é zero-indexed, então 2º elemento)
         page.locator("id=853 >> nth=1").click()
 
-    def checagem_inicial_da_tela_exporta_monitorias(self, page):
+    @staticmethod
+    def intervalo_de_meses(inicio, fim) -> list:
+        """
+        Lista os meses de um intervalo (inclusive nas duas pontas).
+        
+        Args:
+            inicio (date): Qualquer dia do primeiro mês
+            fim (date): Qualquer dia do último mês
+            
+        Returns:
+            list: datetime do dia 1 de cada mês, em ordem crescente
+        """
+        meses = []
+        ano, mes = inicio.year, inicio.month
+        while (ano, mes) <= (fim.year, fim.month):
+            meses.append(datetime.datetime(ano, mes, 1))
+            ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+        return meses
+
+    def planejar_calendario(self, ano_exibido, referencia) -> tuple:
+        """
+        Planeja a navegação no calendário de meses da exportação.
+        
+        Args:
+            ano_exibido (int): Ano que o calendário mostra no momento
+            referencia (date): Mês desejado
+            
+        Returns:
+            tuple: (seta, cliques, abreviação do mês)
+                   seta = classe do <th> (datepickerGoPrev/datepickerGoNext)
+                   cliques = quantas vezes clicar na seta para chegar no ano
+        """
+        deslocamento = referencia.year - ano_exibido
+        seta = 'datepickerGoPrev' if deslocamento < 0 else 'datepickerGoNext'
+        return seta, abs(deslocamento), self.__class__.meses[referencia.month - 1]
+
+    def selecionar_mes(self, page, referencia) -> None:
+        """
+        Seleciona o mês de referência no calendário da página.
+        
+        Args:
+            page: Página de exportação
+            referencia (date): Mês desejado
+            
+        Nota:
+            O ano exibido pelo calendário de cada página fica em
+            self.estado_paginas, então a troca de mês clica na seta só o
+            necessário (nenhum clique se o ano já é o mesmo). Se a página
+            já está no mês pedido, nada é feito.
+        """
+        estado = self.estado_paginas.setdefault(page, {'ano_exibido': self.data_atual.year, 'mes': None})
+        if estado['mes'] == (referencia.year, referencia.month):
+            return
+
+        seta, cliques, mes = self.planejar_calendario(estado['ano_exibido'], referencia)
+        frame = page.frame_locator("iframe[name=\"navMain\"]")
+        for _ in range(cliques):
+            frame.locator("th[class=\"" + seta + "\"]").click()
+        frame.locator("a:has-text(\"" + mes + "\")").click()
+
+        estado['ano_exibido'] = referencia.year
+        estado['mes'] = (referencia.year, referencia.month)
+
+    def marcar_grupos(self, page) -> None:
+        """
+        Marca "Todos" nos grupos de operações e aguarda o grupo_36.
+        
+        Nota:
+            Chamado também depois de cada troca de mês, pois o Optimus
+            recarrega os grupos para o novo período
+        """
+        # Marca "Todos" nos grupos de operações
+        # Cada .wait_for() garante que o select carregou antes de marcar
+        
+        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_2\"]").wait_for()
+        page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos2\"]").check()
+        
+        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_6\"]").wait_for()
+        page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos6\"]").check()
+        
+        # Grupo 15 comentado (desabilitado)
+        # page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_15\"]").wait_for()
+        # page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos15\"]").check()
+        
+        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_32\"]").wait_for()
+        page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos32\"]").check()
+        
+        # Aguarda o select principal (grupo_36) carregar
+        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]").wait_for()
+
+    def trocar_mes(self, page, referencia) -> None:
+        """
+        Troca o mês de uma página já configurada (backfill).
+        
+        Args:
+            page: Página de exportação com os filtros configurados
+            referencia (date): Mês desejado
+        """
+        estado = self.estado_paginas.get(page)
+        if estado is not None and estado['mes'] == (referencia.year, referencia.month):
+            return
+        print(f"🔹 Trocando para o mês {self.mes_referencia(referencia)}")
+        self.selecionar_mes(page=page, referencia=referencia)
+        self.marcar_grupos(page=page)
+
+    def checagem_inicial_da_tela_exporta_monitorias(self, page, referencia=None):
         """
         Configura todos os filtros na tela de exportação de monitorias.
         
         Args:
             page: Página de exportação
+            referencia (date): Mês a selecionar (None = mês de dia_anterior)
             
         Configurações aplicadas:
-        1. Seleciona mês anterior
+        1. Seleciona o mês de referência (setas do calendário conforme o ano)
         2. Marca checkboxes de tipos de ficha:
            - rdItem_121
            - rdItem_150
@@ -189,16 +391,15 @@ class main:
             Todos os seletores usam .frame_locator("iframe[name=\"navMain\"]")
             porque o conteúdo está dentro de um iframe
         """
-        # Obtém abreviação do mês anterior
-        mes = self.__class__.meses[self.dia_anterior.month - 1]
-        
-        # Se o mês é de ano anterior, clica na seta de voltar no calendário
-        if self.dia_anterior.year != datetime.datetime.now().year:
-            page.frame_locator("iframe[name=\"navMain\"]").locator("th[class=\"datepickerGoPrev\"]").click()
+        if referencia is None:
+            referencia = self.dia_anterior
+
+        # Tela recém-aberta: o calendário mostra o ano atual
+        self.estado_paginas[page] = {'ano_exibido': self.data_atual.year, 'mes': None}
         
         # Marca checkboxes de tipos de ficha
         page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_121").check()
-        page.frame_locator("iframe[name=\"navMain\"]").locator("a:has-text(\"" + mes + "\")").click()
+        self.selecionar_mes(page=page, referencia=referencia)
         page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_150").check()
         page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_121").check()
         page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_85").check()
@@ -208,160 +409,531 @@ class main:
         # Checkbox comentado (desabilitado)
         # page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkFiltarOpPrincipal\"]").check()
         
-        # Marca "Todos" nos grupos de operações
-        # Cada .wait_for() garante que o select carregou antes de marcar
+        self.marcar_grupos(page=page)
+
+    def obtendo_lista_de_fichas(self, select_element) -> list:
+        """
+        Extrai as opções do select grupo_36 numa única chamada ao navegador.
         
-        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_2\"]").wait_for()
-        page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos2\"]").check()
+        Args:
+            select_element: Locator do <select> grupo_36
+            
+        Returns:
+            list: Tuplas (valor, nome, inativa) de todas as opções
+            
+        Processamento:
+            Um único evaluate percorre select.options e devolve o value,
+            o texto sem espaços nas pontas e se a ficha é INATIVA
+            (texto contém "INATIVA" ou opção desabilitada)
+        """
+        opcoes = select_element.evaluate(self.__class__.script_opcoes_fichas)
+        return [(str(valor), str(nome), bool(inativa)) for valor, nome, inativa in opcoes]
+
+    def fichas_ativas(self, opcoes) -> list:
+        """
+        Filtra as opções ativas do grupo_36.
         
-        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_6\"]").wait_for()
-        page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos6\"]").check()
+        Args:
+            opcoes (list): Tuplas (valor, nome, inativa) de obtendo_lista_de_fichas
+            
+        Returns:
+            list: Tuplas (valor, nome) das fichas ativas
+        """
+        return [(valor, nome) for valor, nome, inativa in opcoes if nome and not inativa]
+
+    def lista_de_fichas_do_mes(self, select_element, referencia=None) -> list:
+        """
+        Lista de fichas ativas do mês de referência, com cache por mês.
         
-        # Grupo 15 comentado (desabilitado)
-        # page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_15\"]").wait_for()
-        # page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos15\"]").check()
+        Args:
+            select_element: Locator do <select> grupo_36 (só usado sem cache)
+            referencia (date): Mês já selecionado na página (None = dia_anterior)
+            
+        Returns:
+            list: Tuplas (valor, nome) das fichas ativas
+            
+        Nota:
+            Passadas repetidas no mesmo mês (workers, retentativas dentro
+            da execução) reaproveitam a lista sem consultar a página de novo
+        """
+        mes = self.mes_referencia(referencia)
+        with self._trava_fichas:
+            if mes not in self.cache_fichas:
+                self.cache_fichas[mes] = self.fichas_ativas(self.obtendo_lista_de_fichas(select_element=select_element))
+            return list(self.cache_fichas[mes])
+
+    def reutilizar_sessao(self, page, sessao) -> bool:
+        """
+        Tenta abrir a tela de exportação direto com a sessão salva.
         
-        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_32\"]").wait_for()
-        page.frame_locator("iframe[name=\"navMain\"]").locator("input[name=\"chkTodos32\"]").check()
+        Args:
+            page: Página de um contexto criado com o storage_state salvo
+            sessao (dict): Dados carregados por self.sessao.carregar()
+            
+        Returns:
+            bool: True se a tela de exportação abriu (sessão ainda válida)
+            
+        Validação:
+        - Se a página principal voltar para o formulário de login, expirou
+        - Se o iframe navMain não carregar a exportação no tempo limite, expirou
+        """
+        if not sessao.get('url_principal') or not sessao.get('url_exportacao'):
+            return False
+
+        timeout = self.__class__.timeout_validacao_sessao_ms
+        try:
+            page.goto(sessao['url_principal'], timeout=timeout)
+            if page.locator("input[name=\"txtLogin\"]").count() > 0:
+                return False
+
+            frame_exportacao = page.frame(name="navMain")
+            if frame_exportacao is None:
+                return False
+
+            # Link direto da exportação (pula o menu 1 → 16 → 20 → 853)
+            frame_exportacao.goto(sessao['url_exportacao'], timeout=timeout)
+            page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_121").wait_for(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def preparar_pagina_exportacao(self, p, referencia=None):
+        """
+        Abre um navegador logado e deixa a tela de exportação pronta.
         
-        # Aguarda o select principal (grupo_36) carregar
-        page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]").wait_for()
+        Args:
+            p: Instância do Playwright
+            referencia (date): Mês selecionado inicialmente (None = dia_anterior)
+            
+        Returns:
+            page: Página logada com os filtros já configurados
+            
+        Fluxo:
+        1. Se existe sessão salva e válida, abre direto a exportação
+        2. Senão (ou se o servidor expirou a sessão), faz login completo
+           e navegação pelo menu, salvando a nova sessão
+        3. Configura os filtros
+        
+        Nota:
+            Cada worker da fila chama este método com seu próprio
+            Playwright, então cada um tem navegador e sessão independentes
+        """
+        page = None
+        sessao = self.sessao.carregar()
+        if sessao is not None:
+            print("🔹 Reutilizando sessão salva...")
+            page = self.configuracao_playwright(p=p, storage_state=sessao['storage_state'])
+            if not self.reutilizar_sessao(page=page, sessao=sessao):
+                print("🔹 Sessão expirada, refazendo login...")
+                self.sessao.invalidar()
+                page.context.browser.close()
+                page = None
 
-    def obtendo_lista_de_fichas(self, select_element) -> list:
+        if page is None:
+            print("🔹 Configurando navegador...")
+            page = self.configuracao_playwright(p=p)
+            
+            print("🔹 Acessando Optimus...")
+            page = self.primeira_pagina_optimus(page=page)
+            
+            print("🔹 Fazendo login...")
+            self.login_optimus(page=page)
+            
+            print("🔹 Navegando menu...")
+            self.menu_optimus(page=page)
+
+            # Aguarda a exportação carregar antes de guardar o link direto
+            page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_121").wait_for()
+            self.sessao.salvar(page=page)
+            
+        print("🔹 Configurando filtros...")
+        self.checagem_inicial_da_tela_exporta_monitorias(page=page, referencia=referencia)
+        return page
+
+    def mes_referencia(self, referencia=None) -> str:
+        """
+        Args:
+            referencia (date): Mês desejado (None = mês de dia_anterior)
+            
+        Returns:
+            str: Mês de referência no formato do nome dos arquivos ("MM-AAAA")
         """
-        Extrai lista de fichas disponíveis do elemento select.
+        if referencia is None:
+            referencia = self.dia_anterior
+        return '{:02d}-{:04d}'.format(referencia.month, referencia.year)
+
+    def nome_arquivo_ficha(self, ficha, referencia=None) -> str:
+        """
+        Monta o nome do arquivo de uma ficha.
+        
+        Args:
+            ficha (str): Nome da ficha no grupo_36
+            referencia (date): Mês da ficha (None = mês de dia_anterior)
+            
+        Returns:
+            str: "MM-AAAA Nome da Ficha.xls" (sem barras no nome)
+        """
+        file_name = self.mes_referencia(referencia) + ' ' + ficha + '.xls'
+        return str(file_name).replace('/', '')
+
+    def caminho_destino(self, ficha, referencia=None) -> str:
+        """
+        Returns:
+            str: Caminho completo do arquivo da ficha em pasta_destino
+        """
+        return os.path.join(self.__class__.pasta_destino, self.nome_arquivo_ficha(ficha, referencia))
+
+    def fichas_pendentes(self, lista_de_fichas, referencia=None) -> list:
+        """
+        Remove da lista as fichas já baixadas e conferidas hoje (manifesto).
         
         Args:
-            select_element: Elemento <select> do Playwright
+            lista_de_fichas (list): Tuplas (valor, nome) das fichas ativas
+            referencia (date): Mês das fichas (None = mês de dia_anterior)
             
         Returns:
-            list: Lista de nomes de fichas (excluindo INATIVAS)
+            list: Tuplas (valor, nome) que ainda precisam ser baixadas
             
-        Processamento:
-        1. Obtém todo o texto interno do select
-        2. Separa por quebras de linha
-        3. Remove caracteres não alfanuméricos no início/fim
-        4. Filtra fichas que contêm "INATIVA"
+        Uso:
+            Numa retentativa do gerenciador, só as fichas que faltaram
+            são baixadas de novo
+        """
+        pendentes = []
+        for valor, ficha in lista_de_fichas:
+            caminho = self.caminho_destino(ficha, referencia)
+            if self.manifesto.ja_baixada(mes=self.mes_referencia(referencia), caminho=caminho):
+                # Já está no compartilhamento: avisa a importação em pipeline
+                self.envio.notificar(destino=caminho, mes=self.mes_referencia(referencia), ficha=ficha)
+            else:
+                pendentes.append((valor, ficha))
+        if len(pendentes) != len(lista_de_fichas):
+            print(f"🔹 {self.mes_referencia(referencia)}: {len(lista_de_fichas) - len(pendentes)} "
+                  f"fichas já baixadas hoje (manifesto), pulando")
+        return pendentes
+
+    def baixar_ficha(self, page, valor, ficha, referencia=None):
+        """
+        Seleciona uma ficha no grupo_36 e salva o download.
+        
+        Args:
+            page: Página de exportação (já com filtros configurados)
+            valor (str): value da <option> da ficha (seleção estável)
+            ficha (str): Nome da ficha (usado no nome do arquivo)
+            referencia (date): Mês da ficha (None = mês de dia_anterior)
+            
+        Passos:
+        0. Troca o mês da página se a ficha é de outro mês (backfill)
+        1. Aguarda a opção existir e seleciona a ficha no dropdown
+        2. Clica em "Selecionar" e aguarda o popup carregar
+        3. Aguarda o download concluir e salva no staging local
+        4. Agenda o envio para pasta_destino (segundo plano) e fecha o popup
         
-        Lógica de limpeza:
-            Playwright retorna o texto com caracteres especiais e espaços,
-            então precisa limpar o início e fim de cada opção
+        Nota:
+            Não há pausas fixas: cada passo espera o evento real do
+            Playwright e o tempo de cada espera fica em self.esperas
         """
-        # Obtém todo texto interno do select
-        option_elements = select_element.all_inner_texts()
-        option_elements = str(option_elements)
+        if referencia is None:
+            referencia = self.dia_anterior
+        self.trocar_mes(page=page, referencia=referencia)
+
+        print(f"🔹 Processando: {self.mes_referencia(referencia)} {ficha}")
+        inicio_ficha = time.perf_counter()
+
+        # Aguarda a opção e seleciona a ficha no dropdown
+        select_element = page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]")
+        timeout = self.__class__.timeout_ficha_ms
+        self.esperas.aguardar_opcao(select_element=select_element, valor=valor, timeout=timeout)
+        select_element.select_option(value=valor)
+
+        # Prepara para fechar possível dialog/alert
+        page.once("dialog", lambda dialog: dialog.dismiss())
         
-        # Separa por quebras de linha
-        option_elements = option_elements.split('\\n')
+        # Clica no botão "Selecionar" e aguarda popup
+        with page.expect_popup(timeout=timeout) as popup_info:
+            page.frame_locator("iframe[name=\"navMain\"]").locator("img[alt=\"Selecionar\"]").nth(1).click()
+
+        # Obtém página do popup já carregada
+        page_1 = self.esperas.aguardar_popup(popup_info=popup_info, timeout=timeout)
+
+        try:
+            # Aguarda download iniciar e concluir
+            download = self.esperas.aguardar_download(page_popup=page_1)
+            
+            # Monta nome do arquivo: "MM-AAAA Nome da Ficha.xls"
+            file_name = self.nome_arquivo_ficha(ficha, referencia)
+
+            # Salva no disco local; o envio ao compartilhamento (e o
+            # registro no manifesto) segue em segundo plano
+            caminho_local = self.envio.caminho_local(file_name)
+            download.save_as(caminho_local)
+            self.envio.enviar(caminho_local=caminho_local, mes=self.mes_referencia(referencia), ficha=ficha)
+            self.esperas.registrar('ficha_total', time.perf_counter() - inicio_ficha)
+            print(f" Arquivo salvo: {file_name}")
+            
+        finally:
+            # Fecha popup (o erro, se houver, segue para a retentativa)
+            page_1.close()
+
+    def tempo_backoff(self, tentativa) -> float:
+        """
+        Espera antes da próxima tentativa de uma ficha.
         
-        # Remove caracteres não alfanuméricos do INÍCIO da primeira linha
-        while ''.join(filter(str.isalnum, option_elements[0][0])) == '':
-            option_elements[0] = option_elements[0][1:]
+        Args:
+            tentativa (int): Número da tentativa que falhou (1, 2, ...)
+            
+        Returns:
+            float: Segundos = base * 2^(tentativa-1), limitado ao máximo,
+                   com jitter entre 50% e 100% (evita que os workers
+                   batam no Optimus todos ao mesmo tempo)
+        """
+        espera = min(self.__class__.backoff_maximo_seg, self.__class__.backoff_base_seg * 2 ** (tentativa - 1))
+        return espera * random.uniform(0.5, 1.0)
 
-        # Remove caracteres não alfanuméricos do FINAL da última linha
-        while ''.join(filter(str.isalnum, option_elements[len(option_elements) - 1][
-            len(option_elements[len(option_elements) - 1]) - 1])) == '':
-            option_elements[len(option_elements) - 1] = option_elements[len(option_elements) - 1][
-                                                        :len(option_elements[len(option_elements) - 1]) - 1]
+    def executar_com_retentativa(self, funcao, ficha, excecoes_sem_retentativa=()):
+        """
+        Executa o download de uma ficha com retentativas e backoff.
+        
+        Args:
+            funcao (callable): Função sem argumentos que baixa a ficha
+            ficha (str): Nome da ficha (para os logs)
+            excecoes_sem_retentativa (tuple): Exceções propagadas na hora
+            
+        Returns:
+            Retorno de funcao()
+            
+        Raises:
+            Exception: A última exceção, após tentativas_por_ficha falhas
+        """
+        tentativas = self.__class__.tentativas_por_ficha
+        for tentativa in range(1, tentativas + 1):
+            try:
+                return funcao()
+            except excecoes_sem_retentativa:
+                raise
+            except Exception as e:
+                print(f" Erro ao baixar {ficha} (tentativa {tentativa}/{tentativas}): {str(e)}")
+                if tentativa == tentativas:
+                    raise
+                time.sleep(self.tempo_backoff(tentativa))
 
-        # Filtra apenas fichas ativas (remove as que contêm "INATIVA")
-        lista_fichas = [str(linha) for linha in option_elements if not 'INATIVA'.upper() in linha.upper()]
+    def processar_fila(self, page, fila, falhas):
+        """
+        Consome a fila compartilhada de fichas até esvaziar.
+        
+        Args:
+            page: Página de exportação deste worker
+            fila (queue.Queue): Fila com as tuplas (referencia, valor, nome) das fichas
+            falhas (list): Fichas que esgotaram as tentativas (repescagem no fim)
+        """
+        while True:
+            try:
+                referencia, valor, ficha = fila.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self.executar_com_retentativa(
+                    funcao=lambda: self.baixar_ficha(page=page, valor=valor, ficha=ficha, referencia=referencia),
+                    ficha=ficha)
+            except Exception:
+                falhas.append((referencia, valor, ficha))
+            finally:
+                fila.task_done()
 
-        return lista_fichas
+    def worker_extracao(self, fila, erros, falhas):
+        """
+        Worker executado em thread: abre seu próprio navegador e consome a fila.
+        
+        Args:
+            fila (queue.Queue): Fila compartilhada de fichas
+            erros (list): Lista onde o worker registra a exceção, se houver
+            falhas (list): Fichas que esgotaram as tentativas
+            
+        Nota:
+            A API síncrona do Playwright não pode ser compartilhada entre
+            threads, por isso cada worker abre seu próprio sync_playwright()
+        """
+        try:
+            with sync_playwright() as p:
+                page = self.preparar_pagina_exportacao(p=p)
+                self.processar_fila(page=page, fila=fila, falhas=falhas)
+        except Exception as e:
+            print(f" Erro no worker {threading.current_thread().name}: {str(e)}")
+            erros.append(e)
 
-    def extracao_site_optimus(self):
+    def extracao_site_optimus(self, meses=None):
         """
         Método principal que executa todo o fluxo de extração.
         
+        Args:
+            meses (list): Meses a extrair (backfill), qualquer dia de cada mês.
+                          None = só o mês de dia_anterior (execução diária)
+        
         Fluxo completo:
         1. Inicia Playwright
-        2. Configura navegador
-        3. Acessa Optimus
-        4. Faz login
-        5. Navega até tela de exportação
-        6. Configura filtros
-        7. Obtém lista de fichas
-        8. Para cada ficha:
-           a. Seleciona a ficha
-           b. Clica em "Selecionar"
-           c. Captura download
-           d. Salva com nome padronizado
+        2. Reutiliza a sessão salva ou, se expirada:
+           configura navegador, acessa Optimus, faz login e navega o menu
+        3. Configura filtros
+        4. Para cada mês, obtém a lista de fichas, descarta as já baixadas
+           hoje (manifesto) e coloca o restante (mês, ficha) numa fila
+           compartilhada, agrupado por mês
+        5. Inicia (quantidade_de_contextos - 1) workers extras, cada um
+           com seu próprio navegador (reaproveitando a sessão salva)
+        6. Todos os workers (incluindo a página principal) consomem a fila:
+           a. Troca o mês da página, se o item é de outro mês
+           b. Seleciona a ficha
+           c. Clica em "Selecionar"
+           d. Captura download
+           e. Salva no staging local com nome padronizado
+           f. Envia ao compartilhamento em segundo plano (manifesto)
+           Cada ficha tem até tentativas_por_ficha tentativas com backoff;
+           as que esgotarem vão para a repescagem ao final da passada
+        7. Aguarda todos os envios serem confirmados
         
         Formato do arquivo:
             "MM-AAAA Nome da Ficha.xls"
             Exemplo: "01-2025 FICHA RECEPTIVO.xls"
         
         Diretório destino:
-            C:\\Users\\sautomaeqtls\\Documents\\Docs monitorias
+            pasta_destino (compartilhamento de rede)
+            
+        Raises:
+            AssertionError: Se algum worker falhou e sobraram fichas na fila,
+                            se alguma ficha falhou mesmo após a repescagem
+                            ou se algum envio ao compartilhamento falhou
         """
         print("🔹 Iniciando extração...")
+        referencias = self.referencias_da_extracao(meses)
         
-        with sync_playwright() as p:
-            print("🔹 Configurando navegador...")
-            page = self.configuracao_playwright(p=p)
-            
-            print("🔹 Acessando Optimus...")
-            page = self.primeira_pagina_optimus(page=page)
-            
-            print("🔹 Fazendo login...")
-            self.login_optimus(page=page)
-            
-            print("🔹 Navegando menu...")
-            self.menu_optimus(page=page)
-            
-            print("🔹 Configurando filtros...")
-            self.checagem_inicial_da_tela_exporta_monitorias(page=page)
+        try:
+            self.extracao_com_navegador(referencias=referencias)
+        finally:
+            # A execução só termina com todos os envios confirmados
+            self.envio.aguardar()
+
+        self.esperas.imprimir_resumo()
+        self.filtro_rede.imprimir_resumo()
+        print("✅ Extração concluída!")
+
+    def referencias_da_extracao(self, meses=None) -> list:
+        """
+        Normaliza os meses pedidos para a extração.
+        
+        Args:
+            meses (list): date/datetime de qualquer dia de cada mês (None = dia_anterior)
             
-            print("🔹 Obtendo lista de fichas")
+        Returns:
+            list: datetime do dia 1 de cada mês, sem repetição e em ordem crescente
+        """
+        if not meses:
+            meses = [self.dia_anterior]
+        unicos = sorted({(mes.year, mes.month) for mes in meses})
+        return [datetime.datetime(ano, mes, 1) for ano, mes in unicos]
+
+    def extracao_com_navegador(self, referencias=None):
+        """
+        Parte da extração que usa o navegador (login, lista e fila de fichas).
+        
+        Args:
+            referencias (list): Meses a extrair (None = mês de dia_anterior)
+        """
+        if not referencias:
+            referencias = self.referencias_da_extracao()
+
+        with sync_playwright() as p:
+            page = self.preparar_pagina_exportacao(p=p, referencia=referencias[0])
             select_element = page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]")
-            lista_de_fichas = self.obtendo_lista_de_fichas(select_element=select_element)
             
-            print(f"🔹 Encontradas {len(lista_de_fichas)} fichas:")
-            print(lista_de_fichas)
+            # Fila compartilhada entre todos os workers, agrupada por mês
+            # (cada worker troca o calendário só quando o mês do item muda)
+            fila = queue.Queue()
+            for referencia in referencias:
+                print(f"🔹 Obtendo lista de fichas de {self.mes_referencia(referencia)}")
+                self.trocar_mes(page=page, referencia=referencia)
+                lista_de_fichas = self.lista_de_fichas_do_mes(select_element=select_element, referencia=referencia)
+                
+                print(f"🔹 Encontradas {len(lista_de_fichas)} fichas:")
+                print([ficha for valor, ficha in lista_de_fichas])
+                lista_de_fichas = self.fichas_pendentes(lista_de_fichas=lista_de_fichas, referencia=referencia)
+                for valor, ficha in lista_de_fichas:
+                    fila.put((referencia, valor, ficha))
 
-            # Loop principal: processa cada ficha
-            for ficha in lista_de_fichas:
-                print(f"🔹 Processando: {ficha}")
-                time.sleep(3)  # Pausa para estabilizar
+            # Workers extras (não faz sentido abrir mais navegadores que fichas)
+            quantidade_workers = min(self.__class__.quantidade_de_contextos, fila.qsize()) - 1
+            erros = []
+            falhas = []
+            workers = [
+                threading.Thread(target=self.worker_extracao, args=(fila, erros, falhas),
+                                 name=f'worker_{contagem + 1}')
+                for contagem in range(max(quantidade_workers, 0))
+            ]
+            for worker in workers:
+                worker.start()
+            print(f"🔹 Workers em paralelo: {len(workers) + 1}")
 
-                # Seleciona a ficha no dropdown
-                page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]").select_option(ficha)
+            try:
+                # A página principal também consome a fila
+                self.processar_fila(page=page, fila=fila, falhas=falhas)
+            finally:
+                for worker in workers:
+                    worker.join()
 
-                # Prepara para fechar possível dialog/alert
-                page.once("dialog", lambda dialog: dialog.dismiss())
-                
-                # Clica no botão "Selecionar" e aguarda popup
-                with page.expect_popup() as popup_info:
-                    page.frame_locator("iframe[name=\"navMain\"]").locator("img[alt=\"Selecionar\"]").nth(1).click()
-
-                time.sleep(3)
-
-                # Obtém página do popup
-                page_1 = popup_info.value
-                page_1.set_default_timeout(0)
-
-                try:
-                    # Aguarda download iniciar
-                    with page_1.expect_download() as download_info:
-                        page_1.wait_for_event("download")
-
-                    download = download_info.value
-                    
-                    # Monta nome do arquivo: "MM-AAAA Nome da Ficha.xls"
-                    file_name = '{:02d}-{:04d}'.format(self.dia_anterior.month,
-                                                       self.dia_anterior.year) + ' ' + ficha + '.xls'
-                    
-                    destination_folder_path = r"\\EQTSPDSRCL01\planejamento_e_trafego\Automacao e Inovacao\Fichas_monitorias"
-                    time.sleep(3)
-
-                    # Salva arquivo (remove barras do nome se houver)
-                    download.save_as(os.path.join(destination_folder_path, str(file_name).replace('/', '')))
-                    print(f" Arquivo salvo: {file_name}")
-                    
-                except Exception as e:
-                    print(f" Erro ao baixar {ficha}: {str(e)}")
-                    
-                # Fecha popup
-                page_1.close()
-            
-            print("✅ Extração concluída!")
+            # Falha de um worker só é erro se deixou fichas sem processar
+            if erros and not fila.empty():
+                raise AssertionError(f'Workers falharam e restaram {fila.qsize()} fichas: {erros}')
+
+            if falhas:
+                self.repescagem(p=p, page=page, falhas=falhas)
+
+    def repescagem(self, p, page, falhas):
+        """
+        Tenta de novo, ao final da passada, as fichas que esgotaram as tentativas.
+        
+        Args:
+            p: Instância do Playwright
+            page: Página principal (descartada, pode estar num estado ruim)
+            falhas (list): Tuplas (referencia, valor, nome) que falharam
+            
+        Raises:
+            AssertionError: Se alguma ficha continuar falhando (o arquivo
+                            ficaria faltando; o manifesto garante que a
+                            retentativa do gerenciador baixe só essas)
+        """
+        print(f"🔹 Repescagem de {len(falhas)} fichas")
+        page.context.browser.close()
+        page = self.preparar_pagina_exportacao(p=p, referencia=falhas[0][0])
+
+        restantes = []
+        for referencia, valor, ficha in falhas:
+            try:
+                self.executar_com_retentativa(
+                    funcao=lambda: self.baixar_ficha(page=page, valor=valor, ficha=ficha, referencia=referencia),
+                    ficha=ficha)
+            except Exception:
+                restantes.append(self.nome_arquivo_ficha(ficha, referencia))
+
+        if restantes:
+            raise AssertionError(f'{len(restantes)} fichas falharam após a repescagem: {restantes}')
+
+
+def ler_mes(texto):
+    """
+    Converte "MM-AAAA" (formato dos arquivos) em datetime do dia 1.
+    """
+    return datetime.datetime.strptime(texto, '%m-%Y')
+
+
+if __name__ == '__main__':
+    # Uso avulso (backfill):
+    #   python extracao_site/main.py --inicio 01-2025 --fim 06-2025
+    #   python extracao_site/main.py --meses 03-2025 05-2025
+    parser = argparse.ArgumentParser(description='Extração das fichas de monitoria do Optimus')
+    parser.add_argument('--inicio', type=ler_mes, help='Primeiro mês do intervalo (MM-AAAA)')
+    parser.add_argument('--fim', type=ler_mes, help='Último mês do intervalo (MM-AAAA, padrão = início)')
+    parser.add_argument('--meses', type=ler_mes, nargs='+', help='Meses avulsos (MM-AAAA)')
+    argumentos = parser.parse_args()
+
+    meses = list(argumentos.meses or [])
+    if argumentos.inicio is not None:
+        meses += main.intervalo_de_meses(argumentos.inicio, argumentos.fim or argumentos.inicio)
+
+    main(data_dia_anterior=None).extracao_site_optimus(meses=meses or None)
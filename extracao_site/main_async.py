@@ -0,0 +1,443 @@
+"""
+Módulo: extracao_site/main_async.py
+Descrição: Motor assíncrono de extração das fichas do Optimus (playwright.async_api)
+Autor: Automação e Inovação - Contact Center
+Sistema: Optimus (10.6.1.160)
+Uso: Alternativa ao motor síncrono com o mesmo ponto de entrada extracao_site_optimus()
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+from playwright.async_api import async_playwright
+
+# Adiciona o diretório pai ao path para permitir importar 'extracao_site' e 'static'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extracao_site.main import main as main_sincrono
+
+
+class main(main_sincrono):
+    """
+    Extrator assíncrono: um único processo de navegador com vários contextos.
+
+    Diferenças para o motor síncrono (extracao_site/main.py):
+    - Um só Chromium; cada contexto é uma página logada (pool de páginas)
+    - As fichas são disparadas juntas com asyncio; o pool de páginas limita
+      quantas estão em andamento (quantidade_de_contextos)
+    - A página é liberada para a próxima ficha assim que o download termina;
+      a gravação no staging local é limitada por um semáforo
+      (quantidade_de_gravacoes_simultaneas) e o envio ao compartilhamento
+      de rede roda em segundo plano no pool de envio (extracao_site/envio.py)
+    - Os contextos extras reaproveitam o storage_state do primeiro (sem novo login)
+
+    Herda do motor síncrono: configurações, cache de sessão, medidor de
+    esperas, nome dos arquivos e a lista de fichas (script e cache por mês).
+    """
+
+    # Máximo de gravações simultâneas no compartilhamento de rede
+    quantidade_de_gravacoes_simultaneas = 4
+
+    def extracao_site_optimus(self, meses=None):
+        """
+        Ponto de entrada (mesma assinatura do motor síncrono).
+
+        Args:
+            meses (list): Meses a extrair (backfill); None = mês de dia_anterior
+
+        Executa o fluxo assíncrono num event loop próprio.
+        """
+        asyncio.run(self.extracao_site_optimus_async(referencias=self.referencias_da_extracao(meses)))
+
+    async def nova_pagina(self, browser, storage_state=None):
+        """
+        Cria um contexto com downloads habilitados, filtro de rede e uma página sem timeout.
+
+        Args:
+            browser: Navegador assíncrono
+            storage_state (dict): Sessão a restaurar no contexto (opcional)
+
+        Returns:
+            page: Página do novo contexto
+        """
+        context = await browser.new_context(accept_downloads=True, storage_state=storage_state)
+        await self.filtro_rede.instalar_async(context)
+        page = await context.new_page()
+        page.set_default_timeout(0)
+        return page
+
+    async def reutilizar_sessao_async(self, page, sessao) -> bool:
+        """
+        Versão assíncrona de reutilizar_sessao (abre a exportação direto).
+
+        Returns:
+            bool: True se a tela de exportação abriu
+        """
+        if not sessao.get('url_principal') or not sessao.get('url_exportacao'):
+            return False
+
+        timeout = self.__class__.timeout_validacao_sessao_ms
+        try:
+            await page.goto(sessao['url_principal'], timeout=timeout)
+            if await page.locator("input[name=\"txtLogin\"]").count() > 0:
+                return False
+
+            frame_exportacao = page.frame(name="navMain")
+            if frame_exportacao is None:
+                return False
+
+            await frame_exportacao.goto(sessao['url_exportacao'], timeout=timeout)
+            await page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_121").wait_for(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def login_completo_async(self, browser):
+        """
+        Login completo: página inicial → popup Entrar → login → menu.
+
+        Args:
+            browser: Navegador assíncrono
+
+        Returns:
+            page: Página principal (popup de login) na tela de exportação
+        """
+        page = await self.nova_pagina(browser=browser)
+        await page.goto(self.__class__.url_optimus)
+
+        async with page.expect_popup() as popup_info:
+            await page.locator("text=Entrar").click()
+        page = await popup_info.value
+
+        await page.locator("input[name=\"txtLogin\"]").fill(self.__class__.usuario_optimus)
+        await page.locator("input[name=\"txtSenha\"]").fill(self.__class__.senha_optimus)
+        async with page.expect_navigation():
+            await page.locator("text=Entrar").click()
+
+        # Mesmo retry do motor síncrono: aguarda o submenu ficar clicável
+        while True:
+            await page.locator("a[id=\"1\"]").click()
+            try:
+                await page.locator("[id=\"\\31 6\"]").click(timeout=300)
+                break
+            except Exception:
+                pass
+
+        await page.locator("[id=\"\\32 0\"]").click()
+        await page.locator("id=853 >> nth=1").click()
+        await page.frame_locator("iframe[name=\"navMain\"]").locator("#rdItem_121").wait_for()
+        return page
+
+    async def selecionar_mes_async(self, page, referencia) -> None:
+        """
+        Versão assíncrona de selecionar_mes (mesmo plano e estado por página).
+        """
+        estado = self.estado_paginas.setdefault(page, {'ano_exibido': self.data_atual.year, 'mes': None})
+        if estado['mes'] == (referencia.year, referencia.month):
+            return
+
+        seta, cliques, mes = self.planejar_calendario(estado['ano_exibido'], referencia)
+        frame = page.frame_locator("iframe[name=\"navMain\"]")
+        for _ in range(cliques):
+            await frame.locator("th[class=\"" + seta + "\"]").click()
+        await frame.locator("a:has-text(\"" + mes + "\")").click()
+
+        estado['ano_exibido'] = referencia.year
+        estado['mes'] = (referencia.year, referencia.month)
+
+    async def marcar_grupos_async(self, page) -> None:
+        """
+        Versão assíncrona de marcar_grupos (chkTodos 2/6/32 e espera do grupo_36).
+        """
+        frame = page.frame_locator("iframe[name=\"navMain\"]")
+        for grupo in [2, 6, 32]:
+            await frame.locator(f"select[name=\"grupo_{grupo}\"]").wait_for()
+            await frame.locator(f"input[name=\"chkTodos{grupo}\"]").check()
+
+        await frame.locator("select[name=\"grupo_36\"]").wait_for()
+
+    async def trocar_mes_async(self, page, referencia) -> None:
+        """
+        Versão assíncrona de trocar_mes (backfill).
+        """
+        estado = self.estado_paginas.get(page)
+        if estado is not None and estado['mes'] == (referencia.year, referencia.month):
+            return
+        print(f"🔹 Trocando para o mês {self.mes_referencia(referencia)}")
+        await self.selecionar_mes_async(page=page, referencia=referencia)
+        await self.marcar_grupos_async(page=page)
+
+    async def checagem_inicial_async(self, page, referencia=None):
+        """
+        Versão assíncrona de checagem_inicial_da_tela_exporta_monitorias.
+
+        Mesma sequência: mês, rdItem_*, chkTodos dos grupos 2/6/32 e
+        espera do grupo_36.
+        """
+        if referencia is None:
+            referencia = self.dia_anterior
+        frame = page.frame_locator("iframe[name=\"navMain\"]")
+
+        # Tela recém-aberta: o calendário mostra o ano atual
+        self.estado_paginas[page] = {'ano_exibido': self.data_atual.year, 'mes': None}
+
+        await frame.locator("#rdItem_121").check()
+        await self.selecionar_mes_async(page=page, referencia=referencia)
+        for item in ['#rdItem_150', '#rdItem_121', '#rdItem_85', '#rdItem_201', '#rdItem_166']:
+            await frame.locator(item).check()
+
+        await self.marcar_grupos_async(page=page)
+
+    async def preparar_pagina_async(self, browser, sessao, referencia=None):
+        """
+        Deixa uma página logada na exportação, com os filtros configurados.
+
+        Args:
+            browser: Navegador assíncrono
+            sessao (dict | None): Sessão a reutilizar (do arquivo ou do 1º contexto)
+            referencia (date): Mês selecionado inicialmente (None = dia_anterior)
+
+        Returns:
+            page: Página pronta para selecionar fichas
+        """
+        page = None
+        if sessao is not None:
+            page = await self.nova_pagina(browser=browser, storage_state=sessao['storage_state'])
+            if not await self.reutilizar_sessao_async(page=page, sessao=sessao):
+                print("🔹 Sessão expirada, refazendo login...")
+                self.sessao.invalidar()
+                await page.context.close()
+                page = None
+
+        if page is None:
+            page = await self.login_completo_async(browser=browser)
+            frame_exportacao = page.frame(name="navMain")
+            self.sessao.gravar(storage_state=await page.context.storage_state(),
+                               url_principal=page.url,
+                               url_exportacao=frame_exportacao.url if frame_exportacao else None)
+
+        await self.checagem_inicial_async(page=page, referencia=referencia)
+        return page
+
+    async def baixar_ficha_async(self, page, valor, ficha, referencia):
+        """
+        Seleciona a ficha, aguarda o popup e o download concluir.
+
+        Args:
+            page: Página de exportação
+            valor (str): value da <option> da ficha
+            ficha (str): Nome da ficha
+            referencia (date): Mês da ficha (troca o calendário se preciso)
+
+        Returns:
+            download: Download concluído (a gravação é feita depois)
+
+        Raises:
+            Exception: Qualquer falha (ou timeout_ficha_ms) segue para a retentativa
+        """
+        await self.trocar_mes_async(page=page, referencia=referencia)
+        print(f"🔹 Processando: {self.mes_referencia(referencia)} {ficha}")
+        timeout = self.__class__.timeout_ficha_ms
+        select_element = page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]")
+
+        with self.esperas.medir('opcao'):
+            await select_element.locator(f"option[value={json.dumps(valor)}]").first.wait_for(state="attached",
+                                                                                            timeout=timeout)
+        await select_element.select_option(value=valor)
+
+        page.once("dialog", lambda dialog: asyncio.ensure_future(dialog.dismiss()))
+
+        async with page.expect_popup(timeout=timeout) as popup_info:
+            await page.frame_locator("iframe[name=\"navMain\"]").locator("img[alt=\"Selecionar\"]").nth(1).click()
+
+        with self.esperas.medir('popup'):
+            page_1 = await popup_info.value
+            page_1.set_default_timeout(timeout)
+            await page_1.wait_for_load_state("load")
+
+        try:
+            with self.esperas.medir('download_inicio'):
+                download = await page_1.wait_for_event("download")
+            with self.esperas.medir('download_conclusao'):
+                await download.path()
+        finally:
+            await page_1.close()
+        return download
+
+    async def gravar_download_async(self, download, ficha, referencia, semaforo, inicio_ficha):
+        """
+        Grava o download no staging local e agenda o envio ao compartilhamento.
+
+        Args:
+            download: Download concluído
+            ficha (str): Nome da ficha
+            referencia (date): Mês da ficha
+            semaforo (asyncio.Semaphore): Limita gravações simultâneas no disco
+            inicio_ficha (float): perf_counter do início da ficha
+        """
+        file_name = self.nome_arquivo_ficha(ficha, referencia)
+        caminho_local = self.envio.caminho_local(file_name)
+        async with semaforo:
+            with self.esperas.medir('gravacao'):
+                await download.save_as(caminho_local)
+        self.envio.enviar(caminho_local=caminho_local, mes=self.mes_referencia(referencia), ficha=ficha)
+        self.esperas.registrar('ficha_total', time.perf_counter() - inicio_ficha)
+        print(f" Arquivo salvo: {file_name}")
+
+    async def substituir_pagina_async(self, browser, page, sessao, referencia, gravacoes):
+        """
+        Troca por uma página nova a página de uma tentativa que falhou.
+
+        Args:
+            browser: Navegador assíncrono
+            page: Página da tentativa (pode ter ficado num estado ruim)
+            sessao (dict): Sessão do primeiro contexto
+            referencia (date): Mês selecionado na página nova
+            gravacoes (list): Gravações em andamento; o contexto antigo só é
+                              fechado depois delas (fechar apaga os downloads)
+
+        Returns:
+            page: Página nova (ou a antiga, se não der para preparar outra)
+        """
+        try:
+            nova_pagina = await self.preparar_pagina_async(browser=browser, sessao=sessao, referencia=referencia)
+        except Exception as e:
+            print(f" Erro ao recriar a página: {str(e)}")
+            return page
+
+        pendentes = list(gravacoes)
+
+        async def descartar():
+            await asyncio.gather(*pendentes, return_exceptions=True)
+            self.estado_paginas.pop(page, None)
+            await page.context.close()
+
+        gravacoes.append(asyncio.create_task(descartar()))
+        return nova_pagina
+
+    async def extracao_site_optimus_async(self, referencias=None):
+        """
+        Fluxo assíncrono completo.
+
+        Args:
+            referencias (list): Meses a extrair (None = mês de dia_anterior)
+
+        Fluxo:
+        1. Abre um único Chromium
+        2. Prepara a primeira página (sessão salva ou login completo)
+        3. Obtém a lista de fichas de cada mês (as páginas trocam de mês
+           sob demanda, sem novo login)
+        4. Prepara os contextos extras em paralelo com a sessão do primeiro
+        5. Dispara todas as fichas; cada uma pega uma página livre do pool,
+           baixa e devolve a página; a gravação segue em segundo plano.
+           Cada ficha tem até tentativas_por_ficha tentativas com backoff
+           (a página volta ao pool durante a espera); a gravação que falha
+           conta como tentativa falha e a página de um download que falhou
+           é trocada por uma nova
+        6. Repescagem das fichas que esgotaram as tentativas (já com páginas novas)
+        7. Aguarda todas as gravações e fecha o navegador
+        """
+        print("🔹 Iniciando extração (assíncrona)...")
+        if not referencias:
+            referencias = self.referencias_da_extracao()
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=self.perfil['headless'])
+
+            page = await self.preparar_pagina_async(browser=browser, sessao=self.sessao.carregar(),
+                                                    referencia=referencias[0])
+
+            select_element = page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]")
+            lista_de_fichas = []
+            for referencia in referencias:
+                print(f"🔹 Obtendo lista de fichas de {self.mes_referencia(referencia)}")
+                await self.trocar_mes_async(page=page, referencia=referencia)
+                mes = self.mes_referencia(referencia)
+                if mes not in self.cache_fichas:
+                    opcoes = await select_element.evaluate(self.__class__.script_opcoes_fichas)
+                    self.cache_fichas[mes] = self.fichas_ativas([(str(v), str(n), bool(i)) for v, n, i in opcoes])
+                fichas_do_mes = list(self.cache_fichas[mes])
+                print(f"🔹 Encontradas {len(fichas_do_mes)} fichas:")
+                print([ficha for valor, ficha in fichas_do_mes])
+                fichas_do_mes = await asyncio.to_thread(self.fichas_pendentes, fichas_do_mes, referencia)
+                lista_de_fichas += [(referencia, valor, ficha) for valor, ficha in fichas_do_mes]
+
+            # Sessão do primeiro contexto reaproveitada pelos demais
+            frame_exportacao = page.frame(name="navMain")
+            sessao = {
+                'storage_state': await page.context.storage_state(),
+                'url_principal': page.url,
+                'url_exportacao': frame_exportacao.url if frame_exportacao else None,
+            }
+            quantidade_extras = max(min(self.__class__.quantidade_de_contextos, len(lista_de_fichas)) - 1, 0)
+            paginas_extras = await asyncio.gather(
+                *(self.preparar_pagina_async(browser=browser, sessao=sessao, referencia=referencias[0])
+                  for _ in range(quantidade_extras))
+            )
+
+            # Pool de páginas livres: limita as fichas em andamento
+            paginas = asyncio.Queue()
+            for pagina in [page, *paginas_extras]:
+                paginas.put_nowait(pagina)
+            print(f"🔹 Contextos em paralelo: {paginas.qsize()}")
+
+            semaforo_gravacao = asyncio.Semaphore(self.__class__.quantidade_de_gravacoes_simultaneas)
+            gravacoes = []
+
+            async def processar(referencia, valor, ficha) -> bool:
+                tentativas = self.__class__.tentativas_por_ficha
+                for tentativa in range(1, tentativas + 1):
+                    pagina = await paginas.get()
+                    inicio_ficha = time.perf_counter()
+                    try:
+                        download = await self.baixar_ficha_async(page=pagina, valor=valor, ficha=ficha,
+                                                                 referencia=referencia)
+                    except Exception as e:
+                        print(f" Erro ao baixar {ficha} (tentativa {tentativa}/{tentativas}): {str(e)}")
+                        download = None
+                        pagina = await self.substituir_pagina_async(browser=browser, page=pagina, sessao=sessao,
+                                                                    referencia=referencia, gravacoes=gravacoes)
+                    finally:
+                        paginas.put_nowait(pagina)
+
+                    if download is not None:
+                        # A página já voltou ao pool; só esta ficha espera a gravação
+                        gravacao = asyncio.create_task(
+                            self.gravar_download_async(download=download, ficha=ficha, referencia=referencia,
+                                                       semaforo=semaforo_gravacao, inicio_ficha=inicio_ficha))
+                        gravacoes.append(gravacao)
+                        try:
+                            await gravacao
+                            return True
+                        except Exception as e:
+                            print(f" Erro ao gravar {ficha} (tentativa {tentativa}/{tentativas}): {str(e)}")
+                    if tentativa < tentativas:
+                        await asyncio.sleep(self.tempo_backoff(tentativa))
+                return False
+
+            try:
+                sucessos = await asyncio.gather(*(processar(*item) for item in lista_de_fichas))
+
+                # Repescagem: fichas que esgotaram as tentativas, uma de cada vez
+                falhas = [item for item, sucesso in zip(lista_de_fichas, sucessos) if not sucesso]
+                restantes = []
+                if falhas:
+                    print(f"🔹 Repescagem de {len(falhas)} fichas")
+                for referencia, valor, ficha in falhas:
+                    if not await processar(referencia, valor, ficha):
+                        restantes.append(self.nome_arquivo_ficha(ficha, referencia))
+                if restantes:
+                    raise AssertionError(f'{len(restantes)} fichas falharam após a repescagem: {restantes}')
+            finally:
+                # Downloads são apagados ao fechar o contexto: aguarda gravar antes
+                # (falhas de gravação já contaram como tentativas em processar)
+                await asyncio.gather(*gravacoes, return_exceptions=True)
+                await browser.close()
+                # A execução só termina com todos os envios confirmados
+                await asyncio.to_thread(self.envio.aguardar)
+
+            self.esperas.imprimir_resumo()
+            self.filtro_rede.imprimir_resumo()
+            print("✅ Extração concluída!")
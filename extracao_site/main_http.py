@@ -0,0 +1,432 @@
+"""
+Módulo: extracao_site/main_http.py
+Descrição: Modo sem navegador: reenvia a requisição de exportação do Optimus por HTTP
+Autor: Automação e Inovação - Contact Center
+Sistema: Optimus (10.6.1.160)
+Uso: Alternativa aos motores Playwright com o mesmo ponto de entrada extracao_site_optimus()
+"""
+
+import os
+import sys
+import json
+import time
+import datetime
+import threading
+import http.client
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
+from playwright.sync_api import sync_playwright
+
+# Adiciona o diretório pai ao path para permitir importar 'extracao_site' e 'static'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extracao_site.main import main as main_sincrono
+
+
+class sessao_expirada(Exception):
+    """
+    O Optimus respondeu com a tela de login (ou redirecionou) ao invés do arquivo.
+    """
+
+
+class main(main_sincrono):
+    """
+    Extrator por reenvio HTTP da exportação.
+
+    O navegador só serve para gerar uma requisição de exportação por ficha
+    (mês, rdItem_*, chkTodos* e a ficha no grupo_36). Este modo:
+
+    1. Captura uma vez a requisição real que gerou o download da 1ª ficha
+       (método, URL, cabeçalhos, corpo do formulário e cookies), junto com
+       o valor de cada ficha no grupo_36 → "modelo de exportação"
+    2. Reenvia essa requisição para cada ficha trocando apenas o campo
+       grupo_36, com conexões HTTP keep-alive reaproveitadas por thread
+    3. Grava a resposta direto no staging local, em blocos (sem carregar na
+       memória), e envia ao compartilhamento em segundo plano
+
+    O modelo fica salvo em arquivo_modelo_exportacao e é reaproveitado nas
+    retentativas do mesmo mês enquanto a sessão for válida; se o Optimus
+    devolver a tela de login, o modelo é recapturado com o navegador.
+
+    Teste local:
+        Como url_optimus/pasta_destino são atributos de classe, basta
+        apontá-los para um servidor local que devolva respostas gravadas.
+    """
+
+    # Campo do formulário que identifica a ficha
+    campo_ficha = 'grupo_36'
+
+    # Conexões HTTP simultâneas (uma por thread, reaproveitadas)
+    quantidade_de_conexoes = 4
+    timeout_http_seg = 300
+    tamanho_bloco_bytes = 1024 * 1024
+
+    # Modelo de exportação capturado (contém cookies de autenticação)
+    arquivo_modelo_exportacao = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modelo_exportacao.json')
+
+    # Cabeçalhos que não devem ser copiados da requisição capturada
+    cabecalhos_ignorados = ['host', 'cookie', 'content-length', 'connection', 'accept-encoding']
+
+    def __init__(self, data_dia_anterior) -> None:
+        """
+        Inicializa o extrator HTTP.
+
+        Atributos adicionais:
+            _local: Armazena a conexão HTTP de cada thread
+            _conexoes: Todas as conexões abertas (fechadas ao final)
+        """
+        super().__init__(data_dia_anterior)
+        self._local = threading.local()
+        self._conexoes = []
+        self._trava = threading.Lock()
+
+    def carregar_modelo(self):
+        """
+        Lê o modelo de exportação salvo, se for do mesmo mês e ainda válido.
+
+        Returns:
+            dict | None: Modelo ou None
+        """
+        if not os.path.exists(self.__class__.arquivo_modelo_exportacao):
+            return None
+        try:
+            with open(self.__class__.arquivo_modelo_exportacao, 'r', encoding='utf-8') as arquivo:
+                modelo = json.load(arquivo)
+            carimbo = datetime.datetime.fromisoformat(modelo['carimbo'])
+        except Exception:
+            return None
+
+        if modelo.get('mes') != self.mes_referencia():
+            return None
+        if datetime.datetime.now() - carimbo > datetime.timedelta(minutes=self.__class__.validade_sessao_minutos):
+            return None
+        return modelo
+
+    def salvar_modelo(self, modelo) -> None:
+        """
+        Grava o modelo de exportação (escrita atômica).
+        """
+        arquivo_temporario = self.__class__.arquivo_modelo_exportacao + '.tmp'
+        with open(arquivo_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(modelo, arquivo)
+        os.replace(arquivo_temporario, self.__class__.arquivo_modelo_exportacao)
+
+    def invalidar_modelo(self) -> None:
+        """
+        Remove o modelo salvo (sessão expirada no servidor).
+        """
+        try:
+            os.remove(self.__class__.arquivo_modelo_exportacao)
+        except FileNotFoundError:
+            pass
+
+    def capturar_modelo_exportacao(self):
+        """
+        Usa o navegador uma única vez para capturar a requisição de exportação.
+
+        Returns:
+            tuple: (modelo, ficha já baixada pelo navegador)
+
+        Passos:
+        1. Abre a exportação (sessão salva ou login completo) e aplica os filtros
+        2. Lê as fichas (value e nome de cada <option> do grupo_36)
+        3. Baixa a 1ª ficha pelo navegador, registrando todas as requisições
+        4. A requisição cuja URL é a do download é a exportação
+        """
+        with sync_playwright() as p:
+            page = self.preparar_pagina_exportacao(p=p)
+
+            print("🔹 Obtendo lista de fichas")
+            select_element = page.frame_locator("iframe[name=\"navMain\"]").locator("select[name=\"grupo_36\"]")
+            fichas = [[valor, ficha] for valor, ficha in self.lista_de_fichas_do_mes(select_element=select_element)]
+            print(f"🔹 Encontradas {len(fichas)} fichas")
+
+            if not fichas:
+                raise AssertionError('Nenhuma ficha ativa encontrada no grupo_36')
+
+            # Registra as requisições enquanto a 1ª ficha é baixada pelo navegador
+            requisicoes = []
+            page.context.on("request", requisicoes.append)
+
+            valor, ficha = fichas[0]
+            select_element.select_option(value=valor)
+            page.once("dialog", lambda dialog: dialog.dismiss())
+            with page.expect_popup() as popup_info:
+                page.frame_locator("iframe[name=\"navMain\"]").locator("img[alt=\"Selecionar\"]").nth(1).click()
+            page_1 = self.esperas.aguardar_popup(popup_info=popup_info)
+            download = self.esperas.aguardar_download(page_popup=page_1)
+            caminho_local = self.envio.caminho_local(self.nome_arquivo_ficha(ficha))
+            download.save_as(caminho_local)
+            self.envio.enviar(caminho_local=caminho_local, mes=self.mes_referencia(), ficha=ficha)
+            print(f" Arquivo salvo: {self.nome_arquivo_ficha(ficha)}")
+
+            requisicao = [r for r in requisicoes if r.url == download.url]
+            if not requisicao:
+                raise AssertionError(f'Requisição de exportação não encontrada para {download.url}')
+            requisicao = requisicao[-1]
+
+            cabecalhos = {
+                chave: valor for chave, valor in requisicao.all_headers().items()
+                if not chave.startswith(':') and chave.lower() not in self.__class__.cabecalhos_ignorados
+            }
+            modelo = {
+                'carimbo': datetime.datetime.now().isoformat(),
+                'mes': self.mes_referencia(),
+                'metodo': requisicao.method,
+                'url': requisicao.url,
+                'cabecalhos': cabecalhos,
+                'corpo': requisicao.post_data,
+                'cookies': '; '.join(f"{c['name']}={c['value']}" for c in page.context.cookies()),
+                'fichas': fichas,
+            }
+            page_1.close()
+
+        self.salvar_modelo(modelo=modelo)
+        return (modelo, ficha)
+
+    def trocar_ficha(self, campos, valor_ficha) -> str:
+        """
+        Troca o valor do campo da ficha numa string application/x-www-form-urlencoded.
+
+        Args:
+            campos (str): Corpo do formulário ou query string capturados
+            valor_ficha (str): value da <option> da ficha
+
+        Returns:
+            str: Campos com grupo_36 = valor_ficha
+
+        Nota:
+            latin-1 preserva os bytes originais (o Optimus não usa UTF-8)
+        """
+        pares = parse_qsl(campos or '', keep_blank_values=True, encoding='latin-1')
+        pares = [(chave, valor_ficha if chave == self.__class__.campo_ficha else valor) for chave, valor in pares]
+        return urlencode(pares, encoding='latin-1')
+
+    def conexao_http(self, url):
+        """
+        Retorna a conexão keep-alive desta thread (cria na primeira chamada).
+
+        Args:
+            url: Resultado de urlsplit da URL de exportação
+        """
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            classe = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+            conexao = classe(url.hostname, url.port, timeout=self.__class__.timeout_http_seg)
+            self._local.conexao = conexao
+            with self._trava:
+                self._conexoes.append(conexao)
+        return conexao
+
+    def descartar_conexao(self) -> None:
+        """
+        Fecha a conexão desta thread (a próxima chamada abre outra).
+        """
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            conexao.close()
+        self._local.conexao = None
+
+    def fechar_conexoes(self) -> None:
+        """
+        Fecha as conexões de todas as threads.
+        """
+        with self._trava:
+            for conexao in self._conexoes:
+                conexao.close()
+            self._conexoes = []
+        self._local = threading.local()
+
+    def baixar_ficha_http(self, modelo, ficha, valor_ficha):
+        """
+        Reenvia a exportação para uma ficha e grava a resposta no disco.
+
+        Args:
+            modelo (dict): Modelo de exportação capturado
+            ficha (str): Nome da ficha (usado no nome do arquivo)
+            valor_ficha (str): value da ficha no grupo_36
+
+        Raises:
+            sessao_expirada: Se o Optimus devolver login/redirecionamento
+            AssertionError: Se o status HTTP não for 200
+        """
+        inicio_ficha = time.perf_counter()
+        url = urlsplit(modelo['url'])
+        corpo = None
+        if modelo['metodo'].upper() == 'GET':
+            url = url._replace(query=self.trocar_ficha(url.query, valor_ficha))
+        else:
+            corpo = self.trocar_ficha(modelo['corpo'], valor_ficha).encode('latin-1')
+
+        caminho = urlunsplit(('', '', url.path or '/', url.query, ''))
+        cabecalhos = dict(modelo['cabecalhos'])
+        cabecalhos['Cookie'] = modelo['cookies']
+
+        # Uma nova tentativa se a conexão keep-alive foi fechada pelo servidor
+        for tentativa in range(2):
+            conexao = self.conexao_http(url)
+            try:
+                with self.esperas.medir('http_resposta'):
+                    conexao.request(modelo['metodo'], caminho, body=corpo, headers=cabecalhos)
+                    resposta = conexao.getresponse()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                self.descartar_conexao()
+                if tentativa == 1:
+                    raise
+
+        if resposta.status in (301, 302, 303, 401, 403):
+            resposta.read()
+            raise sessao_expirada(f'HTTP {resposta.status} ao exportar {ficha}')
+        if resposta.status != 200:
+            resposta.read()
+            raise AssertionError(f'HTTP {resposta.status} ao exportar {ficha}')
+
+        file_name = self.nome_arquivo_ficha(ficha)
+        caminho_local = self.envio.caminho_local(file_name)
+        arquivo_temporario = caminho_local + '.parcial'
+
+        # Grava em blocos direto no disco; o 1º bloco é checado contra a tela de login
+        with self.esperas.medir('http_gravacao'):
+            with open(arquivo_temporario, 'wb') as arquivo:
+                bloco = resposta.read(self.__class__.tamanho_bloco_bytes)
+                if b'txtLogin' in bloco:
+                    resposta.read()
+                    arquivo.close()
+                    os.remove(arquivo_temporario)
+                    raise sessao_expirada(f'Tela de login recebida ao exportar {ficha}')
+                while bloco:
+                    arquivo.write(bloco)
+                    bloco = resposta.read(self.__class__.tamanho_bloco_bytes)
+            os.replace(arquivo_temporario, caminho_local)
+
+        self.envio.enviar(caminho_local=caminho_local, mes=self.mes_referencia(), ficha=ficha)
+
+        self.esperas.registrar('ficha_total', time.perf_counter() - inicio_ficha)
+        print(f" Arquivo salvo: {file_name}")
+
+    def baixar_ficha_http_com_retentativa(self, modelo, ficha, valor_ficha):
+        """
+        baixar_ficha_http com a política de retentativa do extrator.
+
+        Nota:
+            Após uma falha a conexão desta thread é descartada (pode ter
+            ficado no meio de uma resposta). sessao_expirada não é repetida:
+            sobe direto para recapturar o modelo
+        """
+        def tentar():
+            try:
+                return self.baixar_ficha_http(modelo, ficha, valor_ficha)
+            except Exception:
+                self.descartar_conexao()
+                raise
+
+        return self.executar_com_retentativa(funcao=tentar, ficha=ficha,
+                                             excecoes_sem_retentativa=(sessao_expirada,))
+
+    def reenviar_fichas(self, modelo, ja_baixadas):
+        """
+        Reenvia a exportação de todas as fichas do modelo em paralelo.
+
+        Args:
+            modelo (dict): Modelo de exportação
+            ja_baixadas (set): Fichas que não precisam ser reenviadas
+
+        Raises:
+            sessao_expirada: Propagada para recapturar o modelo
+            AssertionError: Se alguma ficha falhou mesmo após a repescagem
+
+        Nota:
+            Cada ficha tem até tentativas_por_ficha tentativas com backoff;
+            as que esgotarem são repetidas uma a uma ao final da passada.
+            Com sessao_expirada, as fichas ainda não iniciadas são canceladas
+        """
+        fichas = [(valor, ficha) for valor, ficha in modelo['fichas'] if ficha not in ja_baixadas]
+        fichas = self.fichas_pendentes(lista_de_fichas=fichas)
+        print(f"🔹 Reenviando {len(fichas)} fichas por HTTP ({self.__class__.quantidade_de_conexoes} conexões)")
+
+        falhas = []
+        with ThreadPoolExecutor(max_workers=self.__class__.quantidade_de_conexoes) as executor:
+            futuros = {
+                executor.submit(self.baixar_ficha_http_com_retentativa, modelo, ficha, valor): (valor, ficha)
+                for valor, ficha in fichas
+            }
+            for futuro, (valor, ficha) in futuros.items():
+                try:
+                    futuro.result()
+                    ja_baixadas.add(ficha)
+                except sessao_expirada:
+                    # Cancela as fichas ainda na fila: rodariam com a sessão morta
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+                except Exception:
+                    falhas.append((valor, ficha))
+
+        # Repescagem: fichas que esgotaram as tentativas, uma de cada vez
+        restantes = []
+        if falhas:
+            print(f"🔹 Repescagem de {len(falhas)} fichas")
+        for valor, ficha in falhas:
+            try:
+                self.baixar_ficha_http_com_retentativa(modelo, ficha, valor)
+                ja_baixadas.add(ficha)
+            except sessao_expirada:
+                raise
+            except Exception:
+                restantes.append(ficha)
+
+        if restantes:
+            raise AssertionError(f'{len(restantes)} fichas falharam por HTTP após a repescagem: {restantes}')
+
+    def extracao_site_optimus(self, meses=None):
+        """
+        Ponto de entrada (mesma assinatura dos motores Playwright).
+
+        Args:
+            meses (list): Meses a extrair (backfill); None = mês de dia_anterior
+
+        Fluxo (para cada mês):
+        1. Usa o modelo salvo, se válido; senão captura com o navegador
+        2. Reenvia a exportação para as fichas restantes
+        3. Se o Optimus expirou a sessão de um modelo salvo, recaptura uma vez
+
+        Nota:
+            O modelo é do mês selecionado na tela, então cada mês do backfill
+            captura o seu (o navegador reaproveita a sessão salva, sem login)
+        """
+        print("🔹 Iniciando extração (HTTP)...")
+
+        try:
+            for referencia in self.referencias_da_extracao(meses):
+                self.dia_anterior = referencia
+                print(f"🔹 Mês de referência: {self.mes_referencia()}")
+                self.extracao_do_mes()
+        finally:
+            self.fechar_conexoes()
+            # A execução só termina com todos os envios confirmados
+            self.envio.aguardar()
+
+        self.esperas.imprimir_resumo()
+        self.filtro_rede.imprimir_resumo()
+        print("✅ Extração concluída!")
+
+    def extracao_do_mes(self) -> None:
+        """
+        Extração HTTP de um mês (o mês de self.dia_anterior).
+        """
+        ja_baixadas = set()
+        modelo = self.carregar_modelo()
+        if modelo is not None:
+            try:
+                self.reenviar_fichas(modelo=modelo, ja_baixadas=ja_baixadas)
+            except sessao_expirada:
+                print("🔹 Sessão expirada, recapturando modelo com o navegador...")
+                self.invalidar_modelo()
+                self.sessao.invalidar()
+                self.fechar_conexoes()
+                modelo = None
+
+        if modelo is None:
+            modelo, ficha = self.capturar_modelo_exportacao()
+            ja_baixadas.add(ficha)
+            self.reenviar_fichas(modelo=modelo, ja_baixadas=ja_baixadas)
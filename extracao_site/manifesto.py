@@ -0,0 +1,132 @@
+"""
+Módulo: extracao_site/manifesto.py
+Descrição: Manifesto dos downloads de fichas para retomar extrações interrompidas
+Autor: Automação e Inovação - Contact Center
+Uso: Permite que a retentativa do gerenciador baixe apenas as fichas que faltaram
+"""
+
+import os
+import json
+import hashlib
+import datetime
+import threading
+
+
+class manifesto_downloads:
+    """
+    Registro (JSON) de cada ficha baixada, gravado junto aos arquivos.
+
+    Conteúdo de cada entrada (chave = nome do arquivo):
+    - mes: Mês de referência ("MM-AAAA")
+    - ficha: Nome da ficha
+    - tamanho_bytes: Tamanho do arquivo salvo
+    - sha256: Hash do conteúdo
+    - carimbo: Momento do download
+    - data_execucao: Dia da execução (a ficha é baixada de novo no dia seguinte,
+      pois o mês de referência continua recebendo monitorias)
+
+    Verificação:
+        Uma ficha só é considerada baixada se a entrada for de hoje e o
+        arquivo existir com o mesmo tamanho e o mesmo hash.
+    """
+
+    def __init__(self, arquivo) -> None:
+        """
+        Args:
+            arquivo (str): Caminho do arquivo JSON do manifesto
+
+        Nota:
+            O arquivo só é lido no primeiro uso, para não acessar o
+            compartilhamento de rede ao instanciar o extrator
+        """
+        self.arquivo = arquivo
+        self.entradas = None
+        self._trava = threading.Lock()
+
+    def _carregar(self) -> None:
+        """
+        Lê o manifesto do disco (uma vez). Arquivo ausente ou corrompido = vazio.
+        """
+        if self.entradas is not None:
+            return
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as arquivo:
+                self.entradas = json.load(arquivo)
+        except Exception:
+            self.entradas = {}
+
+    def _gravar(self) -> None:
+        """
+        Grava o manifesto (arquivo temporário + os.replace).
+        """
+        arquivo_temporario = self.arquivo + '.tmp'
+        with open(arquivo_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.entradas, arquivo, ensure_ascii=False, indent=1)
+        os.replace(arquivo_temporario, self.arquivo)
+
+    @staticmethod
+    def calcular_hash(caminho) -> str:
+        """
+        Calcula o SHA-256 de um arquivo lendo em blocos.
+
+        Args:
+            caminho (str): Arquivo
+
+        Returns:
+            str: Hash hexadecimal
+        """
+        sha256 = hashlib.sha256()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                sha256.update(bloco)
+        return sha256.hexdigest()
+
+    def registrar(self, mes, ficha, caminho, sha256=None) -> None:
+        """
+        Registra uma ficha baixada.
+
+        Args:
+            mes (str): Mês de referência ("MM-AAAA")
+            ficha (str): Nome da ficha
+            caminho (str): Arquivo salvo
+            sha256 (str): Hash já calculado (opcional, senão lê o arquivo)
+        """
+        if sha256 is None:
+            sha256 = self.calcular_hash(caminho)
+        agora = datetime.datetime.now()
+        entrada = {
+            'mes': mes,
+            'ficha': ficha,
+            'tamanho_bytes': os.path.getsize(caminho),
+            'sha256': sha256,
+            'carimbo': agora.isoformat(),
+            'data_execucao': agora.date().isoformat(),
+        }
+
+        with self._trava:
+            self._carregar()
+            self.entradas[os.path.basename(caminho)] = entrada
+            self._gravar()
+
+    def ja_baixada(self, mes, caminho) -> bool:
+        """
+        Verifica se a ficha já foi baixada e conferida hoje.
+
+        Args:
+            mes (str): Mês de referência ("MM-AAAA")
+            caminho (str): Caminho onde a ficha seria salva
+
+        Returns:
+            bool: True se pode pular o download
+        """
+        with self._trava:
+            self._carregar()
+            entrada = self.entradas.get(os.path.basename(caminho))
+
+        if entrada is None or entrada.get('mes') != mes:
+            return False
+        if entrada.get('data_execucao') != datetime.date.today().isoformat():
+            return False
+        if not os.path.exists(caminho) or os.path.getsize(caminho) != entrada.get('tamanho_bytes'):
+            return False
+        return self.calcular_hash(caminho) == entrada.get('sha256')
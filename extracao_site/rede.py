@@ -0,0 +1,135 @@
+"""
+Módulo: extracao_site/rede.py
+Descrição: Bloqueio de recursos de rede desnecessários no navegador do Optimus
+Autor: Automação e Inovação - Contact Center
+Uso: Instalado em cada contexto Playwright pelos motores de extracao_site
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+
+class filtro_rede:
+    """
+    Intercepta as requisições do contexto e bloqueia o que a exportação não usa.
+
+    Bloqueado (quando bloquear=True):
+    - Tipos de recurso: imagens, fontes, CSS, mídia, beacons
+    - Domínios de analytics/rastreamento
+
+    Permitido:
+    - Documentos, scripts e XHR/fetch (o fluxo de exportação depende deles)
+
+    Relatório:
+    - Requisições bloqueadas por tipo (o que deixou de ser baixado)
+    - Requisições e bytes recebidos (Content-Length) do que passou
+    - Com bloquear=False (perfil de depuração) nada é bloqueado, mas o
+      relatório mostra quantas requisições/bytes seriam economizados
+
+    Nota:
+        Thread-safe: uma instância é compartilhada entre os contextos
+    """
+
+    # Tipos de recurso (request.resource_type) dispensáveis para a exportação
+    tipos_bloqueados = ['image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest', 'ping']
+
+    # Trechos de domínio de analytics/rastreamento
+    dominios_bloqueados = ['google-analytics', 'googletagmanager', 'doubleclick', 'hotjar', 'clarity.ms',
+                           'facebook', 'analytics']
+
+    def __init__(self, bloquear) -> None:
+        """
+        Args:
+            bloquear (bool): True = aborta as requisições dispensáveis
+        """
+        self.bloquear = bloquear
+        self.bloqueadas = {}
+        self.permitidas = 0
+        self.bytes_recebidos = 0
+        self.bloqueaveis_bytes = 0
+        self._trava = threading.Lock()
+
+    def dispensavel(self, request) -> bool:
+        """
+        Indica se a requisição não é necessária para a exportação.
+
+        Args:
+            request: Requisição Playwright
+
+        Returns:
+            bool: True se pode ser bloqueada
+        """
+        if request.resource_type in self.__class__.tipos_bloqueados:
+            return True
+        host = urlsplit(request.url).hostname or ''
+        return any(dominio in host for dominio in self.__class__.dominios_bloqueados)
+
+    def _registrar_bloqueio(self, request) -> None:
+        with self._trava:
+            self.bloqueadas[request.resource_type] = self.bloqueadas.get(request.resource_type, 0) + 1
+
+    def _registrar_resposta(self, response) -> None:
+        """
+        Contabiliza requisições e bytes que passaram (evento 'response').
+        """
+        try:
+            tamanho = int(response.headers.get('content-length', 0))
+        except ValueError:
+            tamanho = 0
+        with self._trava:
+            self.permitidas += 1
+            self.bytes_recebidos += tamanho
+            if self.dispensavel(response.request):
+                self.bloqueaveis_bytes += tamanho
+                self.bloqueadas[response.request.resource_type] = \
+                    self.bloqueadas.get(response.request.resource_type, 0) + 1
+
+    def rota(self, route) -> None:
+        """
+        Handler de rota (API síncrona).
+        """
+        if self.dispensavel(route.request):
+            self._registrar_bloqueio(route.request)
+            route.abort()
+        else:
+            route.continue_()
+
+    async def rota_async(self, route) -> None:
+        """
+        Handler de rota (API assíncrona).
+        """
+        if self.dispensavel(route.request):
+            self._registrar_bloqueio(route.request)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def instalar(self, context) -> None:
+        """
+        Instala o filtro num contexto da API síncrona.
+        """
+        if self.bloquear:
+            context.route("**/*", self.rota)
+        context.on("response", self._registrar_resposta)
+
+    async def instalar_async(self, context) -> None:
+        """
+        Instala o filtro num contexto da API assíncrona.
+        """
+        if self.bloquear:
+            await context.route("**/*", self.rota_async)
+        context.on("response", self._registrar_resposta)
+
+    def imprimir_resumo(self) -> None:
+        """
+        Imprime o que foi economizado (ou seria, no perfil de depuração).
+        """
+        with self._trava:
+            total_bloqueadas = sum(self.bloqueadas.values())
+            por_tipo = ', '.join(f'{tipo}={quantidade}' for tipo, quantidade in sorted(self.bloqueadas.items()))
+            if self.bloquear:
+                print(f"🌐 Requisições bloqueadas: {total_bloqueadas} ({por_tipo})")
+            else:
+                print(f"🌐 Bloqueio desligado: {total_bloqueadas} requisições dispensáveis "
+                      f"({por_tipo}) somando {self.bloqueaveis_bytes / 1024:.0f} KB")
+            print(f"🌐 Requisições carregadas: {self.permitidas} | {self.bytes_recebidos / 1024:.0f} KB recebidos")
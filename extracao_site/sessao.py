@@ -0,0 +1,113 @@
+"""
+Módulo: extracao_site/sessao.py
+Descrição: Cache da sessão logada do Optimus (storage_state + link direto da exportação)
+Autor: Automação e Inovação - Contact Center
+Uso: Evita repetir login e navegação de menu a cada execução/retentativa do gerenciador
+"""
+
+import os
+import json
+import datetime
+import threading
+
+
+class sessao_optimus:
+    """
+    Persiste e recupera a sessão do Optimus entre execuções.
+
+    Conteúdo do arquivo (JSON):
+    - carimbo: Momento em que a sessão foi salva
+    - storage_state: Cookies/localStorage do contexto Playwright
+    - url_principal: Página principal após o login (contém o iframe navMain)
+    - url_exportacao: Endereço do iframe navMain na tela de exportação
+
+    Validade:
+        A sessão só é devolvida se tiver menos de 'validade_minutos'.
+        Mesmo dentro da validade o servidor pode ter expirado a sessão,
+        por isso quem usa deve confirmar que a tela abriu (ver
+        main.reutilizar_sessao) e chamar invalidar() se não abriu.
+
+    Atenção:
+        O arquivo contém os cookies de autenticação. Não versionar.
+    """
+
+    def __init__(self, arquivo, validade_minutos) -> None:
+        """
+        Args:
+            arquivo (str): Caminho do arquivo JSON da sessão
+            validade_minutos (int): Idade máxima para reutilizar a sessão
+        """
+        self.arquivo = arquivo
+        self.validade_minutos = validade_minutos
+        self._trava = threading.Lock()
+
+    def carregar(self):
+        """
+        Lê a sessão salva se ainda estiver dentro da validade.
+
+        Returns:
+            dict | None: Dados da sessão ou None (inexistente, vencida ou corrompida)
+        """
+        with self._trava:
+            if not os.path.exists(self.arquivo):
+                return None
+            try:
+                with open(self.arquivo, 'r', encoding='utf-8') as arquivo:
+                    sessao = json.load(arquivo)
+                carimbo = datetime.datetime.fromisoformat(sessao['carimbo'])
+            except Exception:
+                return None
+
+        idade = datetime.datetime.now() - carimbo
+        if idade > datetime.timedelta(minutes=self.validade_minutos):
+            return None
+        return sessao
+
+    def salvar(self, page) -> None:
+        """
+        Salva a sessão de uma página que está na tela de exportação.
+
+        Args:
+            page: Página logada (API síncrona), com o iframe navMain já na exportação
+        """
+        frame_exportacao = page.frame(name="navMain")
+        self.gravar(storage_state=page.context.storage_state(),
+                    url_principal=page.url,
+                    url_exportacao=frame_exportacao.url if frame_exportacao else None)
+
+    def gravar(self, storage_state, url_principal, url_exportacao) -> None:
+        """
+        Grava os dados da sessão no arquivo.
+
+        Args:
+            storage_state (dict): Estado do contexto Playwright
+            url_principal (str): Página principal após o login
+            url_exportacao (str): Endereço do iframe navMain na exportação
+
+        Nota:
+            Separado de salvar() para o motor assíncrono, que obtém os
+            mesmos dados com await. Escrita atômica (arquivo temporário +
+            os.replace) para que outro worker nunca leia um JSON pela metade
+        """
+        sessao = {
+            'carimbo': datetime.datetime.now().isoformat(),
+            'storage_state': storage_state,
+            'url_principal': url_principal,
+            'url_exportacao': url_exportacao,
+        }
+
+        with self._trava:
+            arquivo_temporario = self.arquivo + '.tmp'
+            with open(arquivo_temporario, 'w', encoding='utf-8') as arquivo:
+                json.dump(sessao, arquivo)
+            os.replace(arquivo_temporario, self.arquivo)
+
+    def invalidar(self) -> None:
+        """
+        Remove a sessão salva (usado quando o servidor já a expirou).
+        """
+        with self._trava:
+            try:
+                os.remove(self.arquivo)
+            except FileNotFoundError:
+                pass
@@ -18,117 +18,178 @@ ordem_das_etapas = ['static', 'insercao_datamart', 'extracao_site', 'venv']
 for etapa in ordem_das_etapas:
     sys.path.append(os.path.join(caminho_relativo, etapa))
 
-try:
-    # Imports dos módulos principais
-    from extracao_site.main import main as site
-    from insercao_datamart.main import main as insercao
-    from static.tratamento_excecao import tratamento_excecao
+import time
+import datetime
+
+# Motor de extração do site:
+# 'sincrono'   → extracao_site/main.py (sync_playwright + threads)
+# 'assincrono' → extracao_site/main_async.py (async_playwright, um navegador)
+# 'http'       → extracao_site/main_http.py (reenvio HTTP, navegador só na captura)
+motor_extracao = 'sincrono'
+
+# Modo de execução das etapas:
+# 'sequencial' → extrai todas as fichas e só depois importa a pasta
+# 'pipeline'   → importa cada ficha assim que ela chega ao compartilhamento
+#                (gerenciador/pipeline.py), com fila limitada a tamanho_fila_pipeline
+modo_execucao = 'pipeline'
+tamanho_fila_pipeline = 8
+
+# Tabela de histórico das execuções
+tabela = 'public.hist_bases'
+
+
+def importar_extrator():
+    """
+    Importa a classe do motor de extração configurado em motor_extracao.
+    """
+    if motor_extracao == 'assincrono':
+        from extracao_site.main_async import main as site
+    elif motor_extracao == 'http':
+        from extracao_site.main_http import main as site
+    else:
+        from extracao_site.main import main as site
+    return site
+
+
+def etapa_liberada(nome_do_relatorio):
+    """
+    Verifica se a etapa pode executar (não executou hoje ou tem tentativas disponíveis).
+
+    Returns:
+        registers | None: Registrador da etapa (com qtd_tentativa) ou None se não executa
+    """
     from static.registrar_consultar import registers
-    import time
-    import datetime
 
-    # ETAPA 1: EXTRAÇÃO DO SITE
-    
-    tabela = 'public.hist_bases'
-    nome_do_relatorio = 'optimus_monitoria_site'
+    inst_registers = registers()
+    if inst_registers.procurar_historico_execucao(nome_do_relatorio=nome_do_relatorio):
+        return inst_registers
+    return None
+
+
+def executar_etapa(inst_registers, nome_do_relatorio, funcao, inicio=None):
+    """
+    Executa uma etapa e registra o resultado em hist_bases.
+
+    Args:
+        inst_registers: Registrador retornado por etapa_liberada
+        nome_do_relatorio (str): Identificador da etapa em hist_bases
+        funcao (callable): Execução da etapa (sem argumentos)
+        inicio (float): time.time() do início da etapa (None = agora);
+                        no pipeline a importação começa junto com a extração
+    """
+    from static.tratamento_excecao import tratamento_excecao
 
     # Dicionário base para registro de histórico
     dicionario = {
         'carimbo_tempo': datetime.datetime.now(),
         'nome_do_relatorio': nome_do_relatorio,
-        'tempo_de_extracao_seg': time.time()  # Marca início
+        'tempo_de_extracao_seg': time.time() if inicio is None else inicio  # Marca início
     }
+    dicionario['tentativa'] = inst_registers.qtd_tentativa
 
-    # Data de referência: D-1
-    data_dia_anterior = dicionario['carimbo_tempo'] - datetime.timedelta(days=1)
+    try:
+        # EXECUÇÃO da etapa
+        funcao()
 
-    # Instancia o extrator do site
-    inst_main_extracao = site(data_dia_anterior)
+        # Calcula tempo de execução
+        dicionario['tempo_de_extracao_seg'] = time.time() - dicionario['tempo_de_extracao_seg']
 
-    # Instancia o registrador
-    inst_registers = registers()
+        # Marca como concluído
+        dicionario['concluido'] = True
 
-    # Verifica se pode executar (não executou hoje ou tem tentativas disponíveis)
-    if inst_registers.procurar_historico_execucao(nome_do_relatorio=nome_do_relatorio):
-        dicionario['tentativa'] = inst_registers.qtd_tentativa
-        
-        try:
-            # EXECUÇÃO: Extrai fichas do site Optimus
-            # NOTA: Linha comentada no código original (não executa)
-            inst_main_extracao.extracao_site_optimus()
-            
-            # Calcula tempo de execução
-            dicionario['tempo_de_extracao_seg'] = time.time() - dicionario['tempo_de_extracao_seg']
-            
-            # Marca como concluído
-            dicionario['concluido'] = True
-            
-            # Registra sucesso no histórico
-            inst_registers.registro_sucesso(dicionario=dicionario, tabela=tabela)
-            
-        except:
-            # Captura erro detalhado
-            str_erro = tratamento_excecao()
-            
-            # Calcula tempo até o erro
-            dicionario['tempo_de_extracao_seg'] = time.time() - dicionario['tempo_de_extracao_seg']
-            
-            # Adiciona informações do erro
-            dicionario['msg_erro'] = str_erro
-            dicionario['tentativa'] = inst_registers.qtd_tentativa + 1
-            
-            # Registra falha no histórico
-            inst_registers.registro_sucesso(dicionario=dicionario, tabela=tabela)
-
-    # ETAPA 2: IMPORTAÇÃO PARA DATAMART
-    
-    tabela = 'public.hist_bases'
-    nome_do_relatorio = 'fichas_importacao'
-
-    # Novo dicionário para segunda etapa
-    dicionario = {
-        'carimbo_tempo': datetime.datetime.now(),
-        'nome_do_relatorio': nome_do_relatorio,
-        'tempo_de_extracao_seg': time.time()
-    }
+        # Registra sucesso no histórico
+        inst_registers.registro_sucesso(dicionario=dicionario, tabela=tabela)
 
-    # Instancia o importador
-    inst_main_extracao = insercao(data_extracao=data_dia_anterior)
+    except:
+        # Captura erro detalhado
+        str_erro = tratamento_excecao()
 
-    # Nova instância do registrador
-    inst_registers = registers()
+        # Calcula tempo até o erro
+        dicionario['tempo_de_extracao_seg'] = time.time() - dicionario['tempo_de_extracao_seg']
 
-    # Verifica se pode executar
-    if inst_registers.procurar_historico_execucao(nome_do_relatorio=nome_do_relatorio):
-        dicionario['tentativa'] = inst_registers.qtd_tentativa
-        
-        try:
-            # EXECUÇÃO: Processa fichas e insere no Datamart
-            inst_main_extracao.run()
-            
-            # Calcula tempo de execução
-            dicionario['tempo_de_extracao_seg'] = time.time() - dicionario['tempo_de_extracao_seg']
-            
-            # Marca como concluído
-            dicionario['concluido'] = True
-            
-            # Registra sucesso
-            inst_registers.registro_sucesso(dicionario=dicionario, tabela=tabela)
-            
-        except:
-            # Captura erro
-            str_erro = tratamento_excecao()
-            
-            # Calcula tempo até erro
-            dicionario['tempo_de_extracao_seg'] = time.time() - dicionario['tempo_de_extracao_seg']
-            
-            # Adiciona informações do erro
-            dicionario['msg_erro'] = str_erro
-            dicionario['tentativa'] = inst_registers.qtd_tentativa + 1
-            
-            # Registra falha
-            inst_registers.registro_sucesso(dicionario=dicionario, tabela=tabela)
-
-except Exception as excecao:
-    # Captura exceções não tratadas (erros nos imports, etc)
-    print(excecao)
\ No newline at end of file
+        # Adiciona informações do erro
+        dicionario['msg_erro'] = str_erro
+        dicionario['tentativa'] = inst_registers.qtd_tentativa + 1
+
+        # Registra falha no histórico
+        inst_registers.registro_sucesso(dicionario=dicionario, tabela=tabela)
+
+
+def execucao_sequencial(inst_main_extracao, registro_extracao, registro_insercao, data_dia_anterior):
+    """
+    ETAPA 1 (extração do site) e depois ETAPA 2 (importação para o Datamart).
+    """
+    from insercao_datamart.main import main as insercao
+
+    if registro_extracao is not None:
+        # EXECUÇÃO: Extrai fichas do site Optimus
+        executar_etapa(registro_extracao, 'optimus_monitoria_site', inst_main_extracao.extracao_site_optimus)
+
+    if registro_insercao is not None:
+        # Instancia o importador (lista a pasta já com as fichas extraídas)
+        inst_main_insercao = insercao(data_extracao=data_dia_anterior)
+
+        # EXECUÇÃO: Processa fichas e insere no Datamart
+        executar_etapa(registro_insercao, 'fichas_importacao', inst_main_insercao.run)
+
+
+def execucao_pipeline(inst_main_extracao, registro_extracao, registro_insercao, data_dia_anterior):
+    """
+    ETAPAS 1 e 2 em paralelo: cada ficha confirmada no compartilhamento
+    é carregada no Datamart enquanto a extração continua.
+
+    Os dois registros de hist_bases continuam separados:
+    - optimus_monitoria_site: termina com a extração
+    - fichas_importacao: termina quando a última ficha é carregada
+    """
+    from insercao_datamart.main import main as insercao
+    from gerenciador.pipeline import pipeline_carga
+
+    inicio_insercao = time.time()
+    inst_main_insercao = insercao(data_extracao=data_dia_anterior)
+    pipeline = pipeline_carga(importador=inst_main_insercao, tamanho_fila=tamanho_fila_pipeline)
+
+    # O envio ao compartilhamento alimenta a fila da importação
+    inst_main_extracao.envio.ao_confirmar = pipeline.receber
+    pipeline.iniciar()
+
+    try:
+        executar_etapa(registro_extracao, 'optimus_monitoria_site', inst_main_extracao.extracao_site_optimus)
+    finally:
+        # Sempre encerra o consumidor (a varredura final carrega o que faltou)
+        inst_main_extracao.envio.ao_confirmar = None
+        executar_etapa(registro_insercao, 'fichas_importacao', pipeline.finalizar, inicio=inicio_insercao)
+
+
+def main():
+    """
+    Executa o RPA: extração do site e importação para o Datamart.
+    """
+    site = importar_extrator()
+
+    # Data de referência: D-1
+    data_dia_anterior = datetime.datetime.now() - datetime.timedelta(days=1)
+
+    # Instancia o extrator do site
+    inst_main_extracao = site(data_dia_anterior)
+
+    # Verifica quais etapas podem executar hoje
+    registro_extracao = etapa_liberada('optimus_monitoria_site')
+    registro_insercao = etapa_liberada('fichas_importacao')
+
+    if modo_execucao == 'pipeline' and registro_extracao is not None and registro_insercao is not None:
+        execucao_pipeline(inst_main_extracao, registro_extracao, registro_insercao, data_dia_anterior)
+    else:
+        execucao_sequencial(inst_main_extracao, registro_extracao, registro_insercao, data_dia_anterior)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as excecao:
+        # Captura exceções não tratadas (erros nos imports, etc)
+        print(excecao)
+    finally:
+        # Fecha as conexões do pool compartilhado do banco
+        if 'static.postgresql' in sys.modules:
+            sys.modules['static.postgresql'].pool_postgresql.fechar_todos()
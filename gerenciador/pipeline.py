@@ -0,0 +1,126 @@
+"""
+Módulo: gerenciador/pipeline.py
+Descrição: Importação em pipeline: cada ficha é carregada no Datamart assim que chega ao compartilhamento
+Autor: Automação e Inovação - Contact Center
+Uso: gerenciador/main.py com modo_execucao = 'pipeline'
+"""
+
+import os
+import queue
+import threading
+
+
+class pipeline_carga:
+    """
+    Produtor/consumidor entre a extração do site e a inserção no Datamart.
+
+    Produtor:
+        O envio ao compartilhamento (extracao_site/envio.py) chama receber()
+        a cada ficha confirmada, inclusive as que o manifesto já tinha.
+
+    Consumidor:
+        Uma thread prepara a carga (preparar_carga) e carrega cada arquivo
+        da fila (carregar_arquivo) enquanto a extração segue baixando.
+
+    Fila limitada:
+        Com tamanho_fila arquivos esperando, receber() bloqueia o envio até
+        o banco consumir; a extração não acumula trabalho sem limite.
+
+    Final:
+        finalizar() faz uma varredura da pasta e carrega as fichas do mês
+        que não passaram pela fila (ex.: extração interrompida), como a
+        importação sequencial faria, e encerra o consumidor.
+    """
+
+    # Marcador de fim da fila
+    _fim = None
+
+    def __init__(self, importador, tamanho_fila=8) -> None:
+        """
+        Args:
+            importador: Instância de insercao_datamart.main.main
+            tamanho_fila (int): Máximo de arquivos aguardando a carga
+        """
+        self.importador = importador
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.recebidos = set()
+        self.carregados = []
+        self.erro = None
+        self._trava = threading.Lock()
+        self._consumidor = None
+
+    def iniciar(self) -> None:
+        """
+        Inicia a thread consumidora.
+        """
+        self._consumidor = threading.Thread(target=self.consumir, name='pipeline_carga')
+        self._consumidor.start()
+
+    def receber(self, destino, mes, ficha) -> None:
+        """
+        Callback do envio: coloca o arquivo confirmado na fila.
+
+        Args:
+            destino (str): Caminho final no compartilhamento
+            mes (str): Mês de referência ("MM-AAAA")
+            ficha (str): Nome da ficha
+
+        Nota:
+            Arquivos de outro mês (backfill) ou repetidos são ignorados
+        """
+        nome_arquivo = os.path.basename(destino)
+        if not self.importador.arquivo_do_mes(nome_arquivo):
+            return
+        with self._trava:
+            if nome_arquivo in self.recebidos:
+                return
+            self.recebidos.add(nome_arquivo)
+        self.fila.put(destino)
+
+    def consumir(self) -> None:
+        """
+        Thread consumidora: prepara a carga e carrega cada arquivo da fila.
+
+        Nota:
+            Após um erro a fila continua sendo esvaziada (sem carregar),
+            para o envio nunca ficar bloqueado em receber()
+        """
+        try:
+            self.importador.preparar_carga()
+        except Exception as e:
+            self.erro = e
+
+        while True:
+            caminho = self.fila.get()
+            try:
+                if caminho is self.__class__._fim:
+                    return
+                if self.erro is None:
+                    self.importador.carregar_arquivo(caminho)
+                    self.carregados.append(caminho)
+            except Exception as e:
+                print(f" Erro ao carregar {os.path.basename(caminho)}: {str(e)}")
+                self.erro = e
+            finally:
+                self.fila.task_done()
+
+    def finalizar(self) -> None:
+        """
+        Carrega o que faltou na pasta, encerra o consumidor e imprime o resumo.
+
+        Raises:
+            AssertionError: Se a preparação ou a carga de algum arquivo falhou
+        """
+        try:
+            for caminho in self.importador.listar_arquivos():
+                self.receber(destino=caminho, mes=None, ficha=None)
+        finally:
+            self.fila.put(self.__class__._fim)
+            self._consumidor.join()
+
+        if self.erro is not None:
+            self.importador.cancelar_carga()
+            raise AssertionError(f'Falha na importação em pipeline: {str(self.erro)}')
+
+        print(f"🔹 Pipeline: {len(self.carregados)} arquivos carregados")
+        self.importador.finalizar_carga()
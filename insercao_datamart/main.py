@@ -7,13 +7,19 @@ Fluxo: Leitura Excel → Tratamento → Padronização → Inserção no Postgre
 
 import os
 import sys
+import hashlib
+import datetime
 import pandas
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Adiciona o diretório pai ao path para permitir importar 'static'
 # Necessário porque a estrutura tem pastas separadas (static, insercao_datamart, etc)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from static.registrar_consultar import registers
+from static.leitor_xls_html import ler_tabela_html
+from static.cache_leitura import cache_leitura
+from static.registro_layouts import registro_layouts
 
 class main:
     """
@@ -25,17 +31,76 @@ class main:
     3. Tratar tipos de dados (datas, números)
     4. Padronizar nomes de colunas
     5. Inserir no banco Datamart
+    
+    Modos de carga:
+    - 'incremental': insere só as monitorias (num_monitoria) que ainda não
+      estão no banco para a ficha/mês; nada é apagado
+    - 'completo': recarrega o mês inteiro; reconcilia monitorias alteradas
+      ou excluídas no Optimus. Com recarga_completa = 'staging', o mês é
+      montado numa tabela de staging e trocado numa única transação no
+      final (o mês antigo continua visível até lá); com 'apagar', o mês é
+      apagado (resetando_mes) antes da inserção
+    - 'upsert': cada linha ganha um hash_linha; só monitorias novas ou com
+      hash diferente são gravadas (chave_monitoria) e as que sumiram da ficha
+      são apagadas; o que não mudou não é reescrito. Precisa da migração
+      insercao_datamart/migracao_upsert.py (uma vez)
+    Sem modo explícito, vale modo_padrao, exceto no dia_reconciliacao_completa
+    e no último dia do mês da data_extracao (fechamento), que rodam 'completo'
+    
+    Paralelismo:
+        No run(), leitura e transformação de cada arquivo rodam em
+        processos_leitura processos (transformar_em_processo); a gravação
+        no banco fica só no processo principal
     """
     
     # Caminho onde os arquivos Excel são salvos pela extração
     caminho_relativo = r'\\EQTSPDSRCL01\planejamento_e_trafego\Automacao e Inovacao\Fichas_monitorias'
+
+    # Modo padrão da carga diária e dia da semana (0 = segunda ... 6 = domingo)
+    # em que roda a reconciliação completa do mês (também no último dia do mês)
+    modo_padrao = 'incremental'
+    dia_reconciliacao_completa = 6
+
+    # Chave de uma monitoria na tabela: repetidas no arquivo ficam com a última
+    # ocorrência em todos os modos (e é o índice único do modo upsert)
+    chave_monitoria = ['num_monitoria', 'tipo_da_ficha', 'ano', 'mes']
+
+    # Recarga do modo completo: 'staging' (troca do mês numa transação) ou 'apagar'
+    recarga_completa = 'staging'
+
+    # Cache local (Parquet) das fichas já lidas; mudar versao_leitura
+    # sempre que leitura() passar a devolver outro resultado (a chave também leva versao_layouts)
+    pasta_cache_leitura = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_leitura')
+    tamanho_cache_leitura_mb = 512
+    versao_leitura = '1'
+
+    # Registro dos layouts já resolvidos (assinatura do cabeçalho → colunas mantidas);
+    # mudar versao_layouts sempre que resolver_colunas ou as listas abaixo mudarem
+    arquivo_registro_layouts = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'registro_layouts.json')
+    versao_layouts = '1'
+
+    # Fichas conhecidas com colunas repetidas: fica a primeira ocorrência
+    fichas_com_assertividade_repetida = ['CNR - COBE - REGIONAL 2022', 'CNR - SCOB - REGIONAL 2022']
+    fichas_com_distribuidora_repetida = ['FICHA - HABILIDADE DE TRATAMENTO 2025 - NOTA RC',
+                                         'FICHA DA REC. HABILIDADE DE TRATAMENTO - NOTA RC']
+
+    # Gravação no banco: 'copy' (COPY em massa, uma transação por arquivo)
+    # ou 'linha' (um INSERT e um commit por monitoria)
+    metodo_insercao = 'copy'
+
+    # Processos que leem e transformam os arquivos em paralelo no run() (1 = sem paralelismo)
+    processos_leitura = 4
     
-    def __init__(self, data_extracao) -> None:
+    def __init__(self, data_extracao, modo=None, somente_leitura=False) -> None:
         """
         Inicializa o processador de fichas.
         
         Args:
             data_extracao (datetime): Data de referência para buscar os arquivos
+            modo (str): 'incremental', 'completo' ou 'upsert' (None = modo_do_dia())
+            somente_leitura (bool): Instância dos processos de leitura: não lista
+                                    a pasta, não conecta ao banco e não grava o
+                                    registro de layouts
             
         Lógica:
         - Lista todos os arquivos .xls do diretório
@@ -43,69 +108,88 @@ class main:
         - Padrão de nome: "MM-AAAA Nome da Ficha.xls"
         """
         self.data_atual = data_extracao
+        self.lista_de_arquivos = [] if somente_leitura else self.listar_arquivos()
         
+        self.conexao = None if somente_leitura else registers()  # Instância para comunicação com banco
+        self.colunas = ''  # Será preenchida na primeira iteração
+        self.tabela = 'public.fichas_monitoria'  # Tabela destino
+        self.tabela_carga = self.tabela  # Onde as linhas são gravadas (staging na recarga completa)
+        self.particao = None  # Partição do mês (troca por detach/attach)
+        self.modo = modo or self.modo_do_dia()
+        if self.modo not in ('incremental', 'completo', 'upsert'):
+            raise AssertionError(f'Modo de carga inválido: {self.modo}')
+        self.ja_carregadas = {}  # {tipo_da_ficha: {num_monitoria, ...}} (modo incremental)
+        self.chave_unica = False  # Tabela com índice único da chave_monitoria (migração aplicada)
+        self.linhas_inseridas = 0
+        self.linhas_ignoradas = 0
+        self.linhas_atualizadas = 0  # Modo upsert
+        self.linhas_removidas = 0  # Modo upsert
+        self.cache = cache_leitura(pasta=self.__class__.pasta_cache_leitura,
+                                   tamanho_maximo_mb=self.__class__.tamanho_cache_leitura_mb,
+                                   versao=f'{self.__class__.versao_leitura}|{self.__class__.versao_layouts}')
+        self.layouts = registro_layouts(self.__class__.arquivo_registro_layouts, somente_leitura=somente_leitura,
+                                        versao=self.__class__.versao_layouts)
+    
+    
+    def arquivo_do_mes(self, nome_arquivo) -> bool:
+        """
+        Indica se o arquivo é uma ficha do mês/ano da data_extracao.
+        
+        Exemplo: "01-2025 FICHA RECEPTIVO.xls"
+        """
+        return nome_arquivo.endswith('.xls') and \
+            nome_arquivo.startswith('{:02d}-{:04d}'.format(self.data_atual.month, self.data_atual.year))
+
+    def listar_arquivos(self) -> list:
+        """
+        Lista os arquivos do mês no diretório (caminhos completos).
+        
+        Nota:
+            Também usado pela importação em pipeline para a varredura
+            final das fichas que não chegaram pela fila
+        """
         # Lista todos os arquivos do diretório
         lista_de_arquivos = os.listdir(self.__class__.caminho_relativo)
         
         # Filtra apenas .xls que começam com o mês/ano correto
-        # Exemplo: "01-2025 FICHA RECEPTIVO.xls"
-        self.lista_de_arquivos = [
+        return [
             os.path.join(self.__class__.caminho_relativo, linha) 
             for linha in lista_de_arquivos 
-            if linha.endswith('.xls') and linha.startswith('{:02d}-{:04d}'.format(self.data_atual.month, self.data_atual.year))
+            if self.arquivo_do_mes(linha)
         ]
-        
-        self.conexao = registers()  # Instância para comunicação com banco
-        self.colunas = ''  # Será preenchida na primeira iteração
-        self.tabela = 'public.fichas_monitoria'  # Tabela destino
-    
-    
-    def leitura(self, caminho, nome_ficha):
+
+    def resolver_colunas(self, cabecalho, nome_ficha):
         """
-        Lê arquivo Excel e extrai apenas as colunas relevantes.
+        Decide quais colunas do arquivo ficam, a partir só do cabeçalho.
         
         Args:
-            caminho (str): Caminho completo do arquivo .xls
+            cabecalho (list): Nomes das colunas já em minúsculas
             nome_ficha (str): Nome da ficha para tratamentos especiais
             
         Returns:
-            pandas.DataFrame: DataFrame com colunas padronizadas
+            dict | None: {'indices': posições a manter (fixas, assertividade,
+                          distribuidora, protocolo), 'protocolo': bool,
+                          'distribuidora': bool, 'regra_da_ficha': bool}
+                          ou None se o layout não é o previsto (o arquivo
+                          é lido inteiro e pulado)
             
         Lógica complexa:
-        1. Lê HTML do Excel (arquivos .xls são na verdade HTML)
-        2. Identifica colunas dinâmicas: assertividade, distribuidora, protocolo
-        3. Monta lista de colunas fixas + dinâmicas
-        4. Trata exceções para fichas específicas
-        5. Adiciona coluna 'protocolo' se não existir
-        6. Adiciona coluna 'distribuidora' vazia se não existir
-        """
-        # pandas.read_html lê tabelas de arquivos HTML/Excel
-        # keep_default_na=False: não converte strings vazias em NaN
-        # decimal=',': vírgula como separador decimal (padrão BR)
-        # thousands='.': ponto como separador de milhar
-        leitura = pandas.read_html(caminho, keep_default_na=False, decimal=',', thousands='.')
-        
-        # Validação: deveria ter apenas 1 planilha
-        if len(leitura) != 1:
-            pass  # Continua mesmo se tiver mais de uma
-        
-        leitura = leitura[0]  # Pega a primeira planilha
-        
-        # Normaliza nomes das colunas para lowercase
-        colunas = leitura.columns.tolist()
-        colunas = [str(coluna).lower() for coluna in colunas]
-        leitura.columns = colunas
+        1. Identifica colunas dinâmicas: assertividade, distribuidora, protocolo
+        2. Monta lista de colunas fixas + dinâmicas
+        3. Trata exceções para fichas específicas (fichas_com_*_repetida)
         
-        # Busca colunas que contêm palavras-chave (case-insensitive)
-        assertividade = leitura.columns.str.contains('assertividade', case=False).tolist()
-        distribuidora = leitura.columns.str.contains('distribuidora', case=False).tolist()
-        protocolo = leitura.columns.str.contains('protocolo', case=False).tolist()
+        Nota:
+            Chamado só para layouts que ainda não estão no registro_layouts
+            (layouts recusados não são registrados: passam aqui toda execução)
         
-        # Converte listas booleanas em índices das colunas encontradas
+        Raises:
+            KeyError: Se faltar alguma coluna fixa
+        """
+        # Busca colunas que contêm palavras-chave (case-insensitive)
         # Exemplo: [False, True, False] -> [1]
-        assertividade = [contagem for contagem, linha in enumerate(assertividade) if linha]
-        distribuidora = [contagem for contagem, linha in enumerate(distribuidora) if linha]
-        protocolo = [contagem for contagem, linha in enumerate(protocolo) if linha]
+        assertividade = [contagem for contagem, coluna in enumerate(cabecalho) if 'assertividade' in coluna]
+        distribuidora = [contagem for contagem, coluna in enumerate(cabecalho) if 'distribuidora' in coluna]
+        protocolo = [contagem for contagem, coluna in enumerate(cabecalho) if 'protocolo' in coluna]
         
         # Colunas fixas esperadas em todas as fichas
         lista_de_colunas = [
@@ -118,55 +202,91 @@ class main:
             'perfil_monitoria', 
             'nome_monitor'
         ]
+        for coluna in lista_de_colunas:
+            if coluna not in cabecalho:
+                raise KeyError(f"Coluna '{coluna}' não encontrada na ficha {nome_ficha}")
+        indices = [cabecalho.index(coluna) for coluna in lista_de_colunas]
         
         # TRATAMENTO ESPECIAL: Algumas fichas têm múltiplas colunas de assertividade
+        regra_da_ficha = False
         if len(assertividade) != 1:
             # Fichas conhecidas que têm duplicatas
-            if nome_ficha == 'CNR - COBE - REGIONAL 2022':
+            if nome_ficha in self.__class__.fichas_com_assertividade_repetida and assertividade:
                 assertividade = [assertividade[0]]  # Pega só a primeira
-            elif nome_ficha == 'CNR - SCOB - REGIONAL 2022':
-                assertividade = [assertividade[0]]
+                regra_da_ficha = True
             else:
                 # Se não é ficha conhecida, alerta e retorna sem processar
                 print(f'Assertividade diferente que o previsto = {len(assertividade)} - {nome_ficha}')
-                return leitura
+                return None
         
         # TRATAMENTO ESPECIAL: Algumas fichas têm múltiplas colunas de distribuidora
         if len(distribuidora) > 1:
-            # Bug no código original: o 'or' sempre retorna True
-            # Deveria ser 'if nome_ficha in [...]'
-            if nome_ficha in ['FICHA - HABILIDADE DE TRATAMENTO 2025 - NOTA RC', 'FICHA DA REC. HABILIDADE DE TRATAMENTO - NOTA RC']:
+            if nome_ficha in self.__class__.fichas_com_distribuidora_repetida:
                 distribuidora = [distribuidora[0]]
+                regra_da_ficha = True
             else:
                 print(f'Distribuidora maior que o previsto = {len(distribuidora)} - {nome_ficha}')
-                return leitura
+                return None
         
         # Adiciona as colunas dinâmicas encontradas
-        for linha in assertividade:
-            lista_de_colunas.append(leitura.columns[linha])
-        for linha in distribuidora:
-            lista_de_colunas.append(leitura.columns[linha])
-        
-        # Tratamento para protocolo (opcional)
-        if len(protocolo) > 0:
-            protocolo = [protocolo[0]]  # Pega só o primeiro
-            for linha in protocolo:
-                lista_de_colunas.append(leitura.columns[linha])
-        else:
-            # Se não tem coluna de protocolo, cria uma vazia
-            leitura['protocolo'] = [None] * len(leitura)
-            lista_de_colunas.append('protocolo')
+        # Protocolo é opcional: pega só o primeiro
+        indices += assertividade + distribuidora + protocolo[:1]
         
+        return {
+            'indices': indices,
+            'protocolo': len(protocolo) > 0,
+            'distribuidora': len(distribuidora) > 0,
+            'regra_da_ficha': regra_da_ficha,
+        }
+    
+    
+    def leitura(self, caminho, nome_ficha):
+        """
+        Lê arquivo Excel e extrai apenas as colunas relevantes.
         
-        # Seleciona apenas as colunas da lista_de_colunas (descarta o resto)
-        leitura = leitura.loc[:, lista_de_colunas]
+        Args:
+            caminho (str): Caminho completo do arquivo .xls
+            nome_ficha (str): Nome da ficha para tratamentos especiais
+            
+        Returns:
+            pandas.DataFrame: DataFrame com colunas padronizadas
+            
+        Lógica:
+        1. Lê o HTML do Excel em streaming (arquivos .xls são na verdade HTML);
+           ao ler o cabeçalho, o registro_layouts devolve as colunas mantidas
+           (resolver_colunas só roda para layout novo ou recusado) e o resto nem chega
+           a ser guardado
+        2. Adiciona coluna 'protocolo' se não existir
+        3. Adiciona coluna 'distribuidora' vazia se não existir
+        
+        Nota:
+            Mesmo resultado de pandas.read_html(keep_default_na=False,
+            decimal=',', thousands='.') seguido da seleção de colunas
+        """
+        resolucao = {}
+
+        def projetar(cabecalho):
+            # Normaliza nomes das colunas para lowercase
+            resolucao['colunas'] = self.layouts.resolver([str(coluna).lower() for coluna in cabecalho], nome_ficha,
+                                                         self.resolver_colunas)
+            return None if resolucao['colunas'] is None else resolucao['colunas']['indices']
+
+        leitura = ler_tabela_html(caminho, projetar=projetar, decimal=',', milhar='.')
+        leitura.columns = [str(coluna).lower() for coluna in leitura.columns]
+
+        # Layout não previsto: devolve o arquivo inteiro (run() pula pelo nº de colunas)
+        if resolucao['colunas'] is None:
+            return leitura
+        
+        # Se não tem coluna de protocolo, cria uma vazia
+        if not resolucao['colunas']['protocolo']:
+            leitura['protocolo'] = [None] * len(leitura)
         
         # Se não tem coluna distribuidora, cria uma vazia
-        if len(distribuidora) == 0:
+        if not resolucao['colunas']['distribuidora']:
             lista_nova_coluna = ['' for linha in range(leitura.shape[0])]
             leitura['distribuidora'] = lista_nova_coluna
         
-
         return leitura
     
     
@@ -259,62 +379,358 @@ class main:
         return df
     
     
-    def run(self):
+    def modo_do_dia(self) -> str:
         """
-        Método principal que executa todo o fluxo de processamento.
+        Escolhe o modo de carga da execução.
         
-        Fluxo:
-        1. Limpa dados do mês/ano no banco (resetando_mes)
-        2. Para cada arquivo Excel:
-           a. Extrai nome da ficha do nome do arquivo
-           b. Lê e processa o Excel
-           c. Valida se tem 11 colunas (padrão esperado)
-           d. Trata tipos de dados
-           e. Padroniza nomes
-           f. Adiciona metadados (tipo_ficha, ano, mes)
-           g. Insere linha por linha no banco
+        Returns:
+            str: 'completo' no dia_reconciliacao_completa ou quando a
+                 data_extracao é o último dia do mês, senão modo_padrao
+                 
+        Fechamento do mês:
+            A carga seguinte já é do mês novo; sem a reconciliação no último
+            dia, o que mudou no Optimus depois do último domingo do mês
+            nunca seria corrigido
         """
-        # Passo 1: Remove dados antigos do mês/ano
-        self.conexao.resetando_mes(self.tabela, self.data_atual.month, self.data_atual.year)
+        if datetime.date.today().weekday() == self.__class__.dia_reconciliacao_completa:
+            return 'completo'
+        if (self.data_atual + datetime.timedelta(days=1)).month != self.data_atual.month:
+            return 'completo'
+        return self.__class__.modo_padrao
+
+    def nome_da_ficha(self, caminho_ficha) -> str:
+        """
+        Extrai o nome da ficha do caminho completo.
         
-        # Passo 2: Processa cada arquivo
-        for caminho_ficha in self.lista_de_arquivos:
-            # Skip para ficha específica (provavelmente problemática)
-            if 'FICHA DA REC. HABILIDADE DE TRATAMENTO' in caminho_ficha:
-                pass  # Não faz nada, mas continua o loop
-            
-            # Extrai o nome da ficha do caminho completo
-            # Exemplo: "C:\path\01-2025 FICHA RECEPTIVO.xls" → "FICHA RECEPTIVO"
-            caminho_relativo_ficha = os.path.dirname(caminho_ficha)
-            nome_ficha = caminho_ficha.replace(caminho_relativo_ficha, '')
-            nome_ficha = nome_ficha.replace('.xls', '')
-            nome_ficha = nome_ficha.replace('\\', '')
-            nome_ficha = nome_ficha.replace('{:02d}-{:04d} '.format(self.data_atual.month, self.data_atual.year), '')
+        Exemplo: "C:\\path\\01-2025 FICHA RECEPTIVO.xls" → "FICHA RECEPTIVO"
+        """
+        caminho_relativo_ficha = os.path.dirname(caminho_ficha)
+        nome_ficha = caminho_ficha.replace(caminho_relativo_ficha, '')
+        nome_ficha = nome_ficha.replace('.xls', '')
+        nome_ficha = nome_ficha.replace('\\', '')
+        nome_ficha = nome_ficha.replace('{:02d}-{:04d} '.format(self.data_atual.month, self.data_atual.year), '')
+        return nome_ficha
+
+    def preparar_carga(self) -> None:
+        """
+        Prepara o banco conforme o modo.
+        
+        - completo + staging: cria a staging do mês (unlogged, salvo quando
+          o mês tem partição própria, que será trocada por detach/attach)
+        - completo + apagar: remove os dados do mês/ano (resetando_mes)
+        - upsert: exige a migração (hash_linha e índice único da
+          chave_monitoria) já aplicada
+        - incremental: carrega as monitorias já presentes por ficha no mês
+          (o Optimus não filtra por dia, então o arquivo sempre traz o mês
+          inteiro e o delta é calculado aqui)
+        """
+        print(f"🔹 Carga {self.modo} de {self.data_atual.month:02d}-{self.data_atual.year:04d}")
+        # Em qualquer modo: com o índice único, gravar_dataframe descarta as repetidas
+        self.chave_unica = self.conexao.upsert_disponivel(self.tabela, self.__class__.chave_monitoria)
+        if self.modo == 'completo' and self.__class__.recarga_completa == 'staging':
+            self.particao = self.conexao.particao_do_mes(self.tabela, self.data_atual.month, self.data_atual.year)
+            self.tabela_carga = self.conexao.criar_staging(self.tabela, self.data_atual.month, self.data_atual.year,
+                                                           unlogged=self.particao is None)
+            self.ja_carregadas = {}
+        elif self.modo == 'completo':
+            self.conexao.resetando_mes(self.tabela, self.data_atual.month, self.data_atual.year)
+            self.ja_carregadas = {}
+        elif self.modo == 'upsert':
+            if not self.chave_unica:
+                raise AssertionError(f'{self.tabela} sem hash_linha/índice único da chave: '
+                                     f'rode insercao_datamart/migracao_upsert.py antes do modo upsert')
+            self.ja_carregadas = {}
+        else:
+            self.ja_carregadas = self.conexao.monitorias_carregadas(self.tabela, self.data_atual.month,
+                                                                    self.data_atual.year)
+
+    def transformar_arquivo(self, caminho_ficha):
+        """
+        Lê e trata um arquivo de ficha (sem acessar o banco).
+        
+        Args:
+            caminho_ficha (str): Caminho completo do .xls
             
-            # Lê o Excel
-            df = self.leitura(caminho_ficha, nome_ficha)
-            if df.shape[1] != 11:
-                print(f" PULANDO: '{nome_ficha}' tem {df.shape[1]} colunas (esperado: 11)")
-                print(f"   Colunas encontradas: {df.columns.tolist()}")
-                continue
+        Returns:
+            DataFrame | None: No modelo do Datamart, com tipo_da_ficha, ano
+                              e mes; None se o layout não é o esperado
+        """
+        # Skip para ficha específica (provavelmente problemática)
+        if 'FICHA DA REC. HABILIDADE DE TRATAMENTO' in caminho_ficha:
+            pass  # Não faz nada, mas continua o loop
+        
+        nome_ficha = self.nome_da_ficha(caminho_ficha)
+        
+        # Lê o Excel (ou o resultado já guardado no cache); layout recusado não
+        # vai para o cache, para ser resolvido (e alertado) de novo a cada execução
+        df = self.cache.obter(caminho_ficha, lambda: self.leitura(caminho_ficha, nome_ficha),
+                              guardar=lambda lido: lido.shape[1] == 11)
+        if df.shape[1] != 11:
+            print(f" PULANDO: '{nome_ficha}' tem {df.shape[1]} colunas (esperado: 11)")
+            print(f"   Colunas encontradas: {df.columns.tolist()}")
+            return None
+        
+        # Pipeline de transformação
+        df = self.tratamento_do_dataframe(df=df)
+        df = self.deixando_no_modelo_datamart(df=df)
+        df = self.colunas_adicionais(df=df, nome_ficha=nome_ficha)
+        
+        # Adiciona metadados de período
+        df['ano'] = self.data_atual.year
+        df['mes'] = self.data_atual.month
+        return df
+
+    def gravar_dataframe(self, df, nome_ficha) -> int:
+        """
+        Insere no banco uma ficha já transformada.
+        
+        Args:
+            df (DataFrame): Resultado de transformar_arquivo
+            nome_ficha (str): Nome da ficha
             
-            # Pipeline de transformação
-            df = self.tratamento_do_dataframe(df=df)
-            df = self.deixando_no_modelo_datamart(df=df)
-            df = self.colunas_adicionais(df=df, nome_ficha=nome_ficha)
+        Returns:
+            int: Linhas inseridas
             
-            # Adiciona metadados de período
-            df['ano'] = self.data_atual.year
-            df['mes'] = self.data_atual.month
+        Modo incremental:
+            Linhas cujo num_monitoria já está no banco para a ficha/mês são
+            descartadas antes da inserção
             
-            # Na primeira iteração, captura os nomes das colunas
-            if self.colunas == '':
-                self.colunas = df.columns.tolist()
-                colunas_string = ','.join(self.colunas)
+        Modo upsert:
+            Gravação por gravar_upsert
             
+        Monitorias repetidas:
+            Só com a migração aplicada (chave_unica, que o modo upsert exige):
+            linhas com a mesma chave_monitoria no arquivo ficam só com a
+            última ocorrência, senão o índice único recusaria o arquivo.
+            Sem a migração, as repetidas são gravadas como vieram
+        """
+        if self.chave_unica:
+            total = df.shape[0]
+            df = df.drop_duplicates(subset=self.__class__.chave_monitoria, keep='last')
+            if df.shape[0] != total:
+                print(f" '{nome_ficha}': {total - df.shape[0]} monitorias repetidas descartadas")
+        
+        # Delta: descarta as monitorias já carregadas desta ficha
+        if self.modo == 'incremental':
+            ja_carregadas = self.ja_carregadas.get(nome_ficha, set())
+            total = df.shape[0]
+            df = df[~df['num_monitoria'].isin(list(ja_carregadas))]
+            self.linhas_ignoradas += total - df.shape[0]
+        
+        # Na primeira iteração, captura os nomes das colunas
+        if self.colunas == '':
+            self.colunas = df.columns.tolist()
+            self.colunas_string = ','.join(self.colunas)
+        
+        if self.modo == 'upsert':
+            return self.gravar_upsert(df, nome_ficha)
+
+        if self.__class__.metodo_insercao == 'copy':
+            # Arquivo inteiro num COPY e num commit
+            quantidade = self.conexao.registro_em_massa(self.tabela_carga, self.colunas, df[self.colunas])
+        else:
             # Converte DataFrame para lista de listas
             lista_insercao = df.values.tolist()
             
             # Insere cada linha no banco
             for linha in lista_insercao:
-                self.conexao.registro_sucesso_list(self.tabela, colunas_string, linha)
+                self.conexao.registro_sucesso_list(self.tabela_carga, self.colunas_string, linha)
+            quantidade = len(lista_insercao)
+        self.linhas_inseridas += quantidade
+        return quantidade
+
+    @staticmethod
+    def hash_das_linhas(df) -> list:
+        """
+        MD5 do conteúdo de cada linha (valores como texto, na ordem das colunas).
+        """
+        return [
+            hashlib.md5('\x1f'.join(str(valor) for valor in linha).encode('utf-8')).hexdigest()
+            for linha in df.itertuples(index=False, name=None)
+        ]
+
+    def gravar_upsert(self, df, nome_ficha) -> int:
+        """
+        Grava uma ficha no modo upsert.
+        
+        Args:
+            df (DataFrame): Resultado de transformar_arquivo (colunas em self.colunas)
+            nome_ficha (str): Nome da ficha
+            
+        Returns:
+            int: Linhas inseridas ou atualizadas
+            
+        Nota:
+            As monitorias repetidas no arquivo já saíram em gravar_dataframe
+            (o ON CONFLICT não aceita a mesma chave duas vezes)
+        """
+        df = df[self.colunas]
+        df = df.assign(hash_linha=self.hash_das_linhas(df))
+
+        contagem = self.conexao.upsert_por_hash(self.tabela, self.colunas + ['hash_linha'],
+                                                self.__class__.chave_monitoria, df.itertuples(index=False, name=None),
+                                                self.data_atual.month, self.data_atual.year, nome_ficha)
+        self.linhas_inseridas += contagem['inseridas']
+        self.linhas_atualizadas += contagem['atualizadas']
+        self.linhas_removidas += contagem['removidas']
+        self.linhas_ignoradas += contagem['inalteradas']
+        return contagem['inseridas'] + contagem['atualizadas']
+
+    def carregar_arquivo(self, caminho_ficha) -> int:
+        """
+        Lê, trata e insere um arquivo de ficha (no processo atual).
+        
+        Args:
+            caminho_ficha (str): Caminho completo do .xls
+            
+        Returns:
+            int: Linhas inseridas
+        """
+        df = self.transformar_arquivo(caminho_ficha)
+        if df is None:
+            return 0
+        return self.gravar_dataframe(df, self.nome_da_ficha(caminho_ficha))
+
+    def carregar_em_processos(self, processos) -> None:
+        """
+        Lê e transforma os arquivos em processos paralelos e grava aqui.
+        
+        Args:
+            processos (int): Quantidade de processos de leitura
+            
+        Lógica:
+        - Cada arquivo vira uma tarefa de transformar_em_processo
+        - Conforme as tarefas terminam (em qualquer ordem), o resultado
+          colunar volta a ser DataFrame e é gravado por gravar_dataframe
+        - Contagens do cache e layouts novos dos processos são somados aqui
+        - Erro em uma tarefa cancela as que ainda não começaram
+        """
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [
+                executor.submit(transformar_em_processo, self.__class__, self.data_atual, caminho_ficha)
+                for caminho_ficha in self.lista_de_arquivos
+            ]
+            try:
+                for futuro in as_completed(futuros):
+                    resultado = futuro.result()
+                    self.cache.somar(*resultado['cache'])
+                    self.layouts.mesclar(resultado['layouts'], conhecidos=resultado['layouts_conhecidos'])
+                    if resultado['colunas'] is None:
+                        continue
+                    df = pandas.DataFrame(dict(zip(resultado['colunas'], resultado['valores'])),
+                                          columns=resultado['colunas'])
+                    self.gravar_dataframe(df, resultado['nome_ficha'])
+            except Exception:
+                for futuro in futuros:
+                    futuro.cancel()
+                raise
+
+    def trocar_staging(self) -> None:
+        """
+        Publica o mês montado na staging (recarga completa).
+        
+        Nota:
+            Sem nenhuma ficha carregada, a staging é descartada e o mês
+            atual é mantido (evita zerar o mês por uma pasta vazia)
+        """
+        if self.tabela_carga == self.tabela:
+            return
+        if self.colunas == '':
+            print(" Nenhuma ficha carregada: mês mantido, staging descartada")
+            self.cancelar_carga()
+            return
+        inicio = datetime.datetime.now()
+        self.conexao.trocar_mes(self.tabela, self.tabela_carga, self.colunas, self.data_atual.month,
+                                self.data_atual.year, particao=self.particao)
+        print(f"🔁 Mês trocado via {'partição' if self.particao else 'staging'} "
+              f"em {(datetime.datetime.now() - inicio).total_seconds():.1f}s")
+        self.tabela_carga = self.tabela
+
+    def cancelar_carga(self) -> None:
+        """
+        Descarta a staging de uma recarga que falhou (o mês atual fica intacto).
+        """
+        if self.tabela_carga == self.tabela:
+            return
+        try:
+            self.conexao.descartar_staging(self.tabela_carga)
+        except Exception as e:
+            print(f" Não foi possível descartar {self.tabela_carga}: {str(e)}")
+        self.tabela_carga = self.tabela
+
+    def finalizar_carga(self) -> None:
+        """
+        Publica a recarga completa (trocar_staging) e imprime o resumo
+        (linhas novas e, no modo incremental, já existentes).
+        """
+        self.trocar_staging()
+        if self.modo == 'upsert':
+            print(f"✅ Carga upsert: {self.linhas_inseridas} inseridas, {self.linhas_atualizadas} atualizadas, "
+                  f"{self.linhas_removidas} removidas, {self.linhas_ignoradas} inalteradas")
+        else:
+            print(f"✅ Carga {self.modo}: {self.linhas_inseridas} linhas inseridas, "
+                  f"{self.linhas_ignoradas} já carregadas")
+        self.cache.imprimir_resumo()
+        self.layouts.imprimir_resumo()
+
+    def run(self):
+        """
+        Método principal que executa todo o fluxo de processamento.
+        
+        Fluxo:
+        1. Prepara a carga (completo: staging do mês ou limpa o mês; incremental: lê o que já existe)
+        2. Para cada arquivo Excel:
+           a. Extrai nome da ficha do nome do arquivo
+           b. Lê e processa o Excel
+           c. Valida se tem 11 colunas (padrão esperado)
+           d. Trata tipos de dados
+           e. Padroniza nomes
+           f. Adiciona metadados (tipo_ficha, ano, mes)
+           g. Descarta as monitorias já carregadas (incremental)
+           h. Insere no banco (COPY por arquivo ou linha por linha, conforme metodo_insercao)
+        3. Troca o mês pela staging (recarga completa) e imprime o resumo
+        
+        Em caso de erro a staging é descartada e o mês no banco não muda
+        
+        Nota:
+            Com processos_leitura > 1, as etapas a-f rodam em paralelo
+            (carregar_em_processos) e só g-h ficam no processo principal
+        """
+        self.preparar_carga()
+        try:
+            processos = min(self.__class__.processos_leitura, len(self.lista_de_arquivos))
+            if processos > 1:
+                self.carregar_em_processos(processos)
+            else:
+                for caminho_ficha in self.lista_de_arquivos:
+                    self.carregar_arquivo(caminho_ficha)
+        except Exception:
+            self.cancelar_carga()
+            raise
+        self.finalizar_carga()
+
+
+def transformar_em_processo(classe, data_extracao, caminho_ficha) -> dict:
+    """
+    Tarefa de um processo de leitura: lê e transforma um arquivo.
+    
+    Args:
+        classe (type): Classe do importador (main ou subclasse)
+        data_extracao (datetime): data_atual do importador
+        caminho_ficha (str): Caminho completo do .xls
+        
+    Returns:
+        dict: Resultado colunar (uma array NumPy por coluna, sem DataFrame
+              para serializar) mais as contagens do cache e os layouts
+              novos, que o processo principal mescla
+    """
+    processador = classe(data_extracao, modo='completo', somente_leitura=True)
+    df = processador.transformar_arquivo(caminho_ficha)
+    return {
+        'nome_ficha': processador.nome_da_ficha(caminho_ficha),
+        'colunas': None if df is None else df.columns.tolist(),
+        'valores': None if df is None else [df[coluna].to_numpy() for coluna in df.columns],
+        'cache': (processador.cache.acertos, processador.cache.faltas),
+        'layouts': processador.layouts.novas_entradas,
+        'layouts_conhecidos': processador.layouts.conhecidos,
+    }
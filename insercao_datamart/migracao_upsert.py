@@ -0,0 +1,70 @@
+"""
+Módulo: insercao_datamart/migracao_upsert.py
+Descrição: Migração (uma vez) de public.fichas_monitoria para o modo de carga 'upsert'
+Autor: Automação e Inovação - Contact Center
+Uso:
+    python insercao_datamart/migracao_upsert.py
+
+O que faz (numa transação):
+1. Confere se há monitorias repetidas na chave (num_monitoria, tipo_da_ficha,
+   ano, mes); se houver, lista alguns exemplos e não altera nada
+2. Adiciona a coluna hash_linha (texto, vazia nas linhas já existentes; o
+   primeiro upsert de cada mês as atualiza)
+3. Cria o índice único da chave
+
+Nota:
+    Não roda na carga diária: o modo upsert só confere se a migração foi
+    aplicada (registers.upsert_disponivel). Depois do índice, a tabela não
+    aceita mais monitorias repetidas em nenhum modo; a carga passa então a
+    descartar as repetidas do arquivo em gravar_dataframe (antes da
+    migração, elas continuam sendo gravadas como vieram)
+"""
+
+import os
+import sys
+
+# Adiciona o diretório pai ao path para permitir importar 'static' e 'insercao_datamart'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from static.registrar_consultar import registers
+
+tabela = 'public.fichas_monitoria'
+nome_indice = 'fichas_monitoria_chave_monitoria'
+
+
+def migrar(tabela, chave) -> None:
+    """
+    Aplica a migração (idempotente: pode rodar de novo sem efeito).
+
+    Args:
+        tabela (str): Tabela da carga
+        chave (list): Colunas da chave (main.chave_monitoria)
+
+    Raises:
+        AssertionError: Se a tabela tem monitorias repetidas na chave
+    """
+    inst_registers = registers()
+    colunas_chave = ','.join(chave)
+
+    repetidas = inst_registers.consultar_notas(
+        f'select {colunas_chave}, count(*) as quantidade from {tabela} '
+        f'group by {colunas_chave} having count(*) > 1 limit 10')
+    if repetidas:
+        for linha in repetidas:
+            print(f"   repetida: {linha}")
+        raise AssertionError(f'{tabela} tem monitorias repetidas na chave ({colunas_chave}); '
+                             f'remova-as antes de criar o índice único')
+
+    with inst_registers.conexao.transacao() as cur:
+        cur.execute(f'alter table {tabela} add column if not exists hash_linha text')
+        cur.execute(f'create unique index if not exists {nome_indice} on {tabela} ({colunas_chave})')
+
+    if not inst_registers.upsert_disponivel(tabela, chave):
+        raise AssertionError(f'Migração aplicada, mas {tabela} ainda não tem hash_linha/índice da chave')
+    print(f"✅ {tabela}: hash_linha e índice único ({colunas_chave}) prontos para o modo upsert")
+
+
+if __name__ == '__main__':
+    from insercao_datamart.main import main as insercao
+
+    migrar(tabela, insercao.chave_monitoria)
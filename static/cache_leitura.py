@@ -0,0 +1,171 @@
+"""
+Módulo: cache_leitura.py
+Descrição: Cache em disco (Parquet) das fichas já lidas, para não reprocessar o mesmo .xls
+Autor: Automação e Inovação - Contact Center
+Uso: insercao_datamart.main.carregar_arquivo (retentativas e execuções que encontram o mesmo arquivo)
+"""
+
+import os
+import hashlib
+import threading
+
+try:
+    import pyarrow  # noqa: F401 (motor do DataFrame.to_parquet/read_parquet)
+except ImportError:
+    pyarrow = None
+
+
+class cache_leitura:
+    """
+    Guarda o DataFrame lido de cada arquivo em Parquet numa pasta local.
+
+    Chave:
+        nome do arquivo + tamanho + mtime + versão do leitor. Um arquivo
+        baixado de novo (outro mtime/tamanho) ou uma mudança na leitura
+        (versao) geram outra chave; a entrada antiga sai pelo LRU.
+
+    Limite:
+        Quando a pasta passa de tamanho_maximo_mb, as entradas usadas há
+        mais tempo são apagadas (cada acerto atualiza o mtime da entrada).
+
+    Sem pyarrow:
+        O cache fica desligado (toda leitura é uma falta) e nada é gravado.
+    """
+
+    def __init__(self, pasta, tamanho_maximo_mb=512, versao='1') -> None:
+        """
+        Args:
+            pasta (str): Pasta local do cache
+            tamanho_maximo_mb (int): Tamanho máximo da pasta
+            versao (str): Versão da leitura (mudar invalida o cache)
+        """
+        self.pasta = pasta
+        self.tamanho_maximo_bytes = tamanho_maximo_mb * 1024 * 1024
+        self.versao = versao
+        self.ativo = pyarrow is not None
+        self.acertos = 0
+        self.faltas = 0
+        self._trava = threading.Lock()
+
+    def chave(self, caminho) -> str:
+        """
+        Chave do arquivo (hash de nome, tamanho, mtime e versão).
+        """
+        estado = os.stat(caminho)
+        identidade = f'{os.path.basename(caminho)}|{estado.st_size}|{estado.st_mtime_ns}|{self.versao}'
+        return hashlib.sha1(identidade.encode('utf-8')).hexdigest()
+
+    def caminho_entrada(self, caminho) -> str:
+        return os.path.join(self.pasta, self.chave(caminho) + '.parquet')
+
+    def carregar(self, caminho):
+        """
+        Lê o DataFrame do cache.
+
+        Returns:
+            pandas.DataFrame | None: None se não está no cache
+        """
+        import pandas
+
+        entrada = self.caminho_entrada(caminho)
+        if not os.path.exists(entrada):
+            return None
+        try:
+            df = pandas.read_parquet(entrada)
+            os.utime(entrada)  # Marca o uso (LRU)
+            return df
+        except Exception:
+            # Entrada corrompida: descarta e lê o arquivo de novo
+            self._remover(entrada)
+            return None
+
+    def gravar(self, caminho, df) -> None:
+        """
+        Grava o DataFrame no cache (arquivo temporário + os.replace) e aplica o limite.
+        """
+        os.makedirs(self.pasta, exist_ok=True)
+        entrada = self.caminho_entrada(caminho)
+        arquivo_temporario = f'{entrada}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            df.to_parquet(arquivo_temporario, index=False)
+            os.replace(arquivo_temporario, entrada)
+        except Exception as e:
+            # Tipos que o Parquet não representa: segue sem cache para este arquivo
+            self._remover(arquivo_temporario)
+            print(f" Cache de leitura: não foi possível gravar {os.path.basename(caminho)}: {str(e)}")
+            return
+        self.limpar()
+
+    def obter(self, caminho, leitor, guardar=None):
+        """
+        DataFrame do arquivo: do cache se houver, senão via leitor() (e guarda).
+
+        Args:
+            caminho (str): Arquivo .xls
+            leitor (callable): Função sem argumentos que lê o arquivo
+            guardar (callable): guardar(df) falso = resultado não vai para o
+                                cache (lido de novo na próxima vez)
+
+        Returns:
+            pandas.DataFrame
+        """
+        df = self.carregar(caminho) if self.ativo else None
+        with self._trava:
+            if df is None:
+                self.faltas += 1
+            else:
+                self.acertos += 1
+        if df is not None:
+            return df
+
+        df = leitor()
+        if self.ativo and (guardar is None or guardar(df)):
+            self.gravar(caminho, df)
+        return df
+
+    def somar(self, acertos, faltas) -> None:
+        """
+        Soma as contagens de um cache usado em outro processo (leitura paralela).
+        """
+        with self._trava:
+            self.acertos += acertos
+            self.faltas += faltas
+
+    def limpar(self) -> None:
+        """
+        Apaga as entradas menos usadas até a pasta caber em tamanho_maximo_mb.
+        """
+        with self._trava:
+            entradas = []
+            for nome in os.listdir(self.pasta):
+                if not nome.endswith('.parquet'):
+                    continue
+                try:
+                    estado = os.stat(os.path.join(self.pasta, nome))
+                except OSError:
+                    # Removida por outro processo de leitura
+                    continue
+                entradas.append((estado.st_mtime, estado.st_size, nome))
+
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            for _, tamanho, nome in sorted(entradas):
+                if total <= self.tamanho_maximo_bytes:
+                    break
+                self._remover(os.path.join(self.pasta, nome))
+                total -= tamanho
+
+    @staticmethod
+    def _remover(caminho) -> None:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+    def imprimir_resumo(self) -> None:
+        """
+        Acertos e faltas desta execução.
+        """
+        if not self.ativo:
+            print("🗃️ Cache de leitura desligado (pyarrow não instalado)")
+            return
+        print(f"🗃️ Cache de leitura: {self.acertos} acertos, {self.faltas} faltas")
@@ -0,0 +1,256 @@
+"""
+Módulo: leitor_xls_html.py
+Descrição: Leitor em streaming das exportações .xls do Optimus (tabelas HTML)
+Autor: Automação e Inovação - Contact Center
+Uso: Substitui pandas.read_html na leitura das fichas (insercao_datamart e att_importacao_datamart)
+"""
+
+import re
+from lxml import etree
+
+# Mesma normalização de espaços do pandas.read_html
+_espacos = re.compile(r"[\r\n]+|\s{2,}")
+_verdadeiros = frozenset(['True', 'TRUE', 'true'])
+_falsos = frozenset(['False', 'FALSE', 'false'])
+_tags_celula = frozenset(['td', 'th'])
+_atributos = etree._Element.keys
+
+
+def texto_da_celula(celula) -> str:
+    """
+    Texto de um <td>/<th> com os espaços normalizados (igual ao read_html).
+
+    Nota:
+        Caminho rápido para a célula sem tags internas (quase todas) e
+        regex só quando há quebra de linha, tab ou espaços repetidos
+    """
+    texto = (celula.text or '') if len(celula) == 0 else ''.join(celula.itertext())
+    texto = texto.strip()
+    if '  ' in texto or not texto.isprintable():
+        texto = _espacos.sub(' ', texto)
+    return texto
+
+
+def tem_span(celulas) -> bool:
+    """
+    Alguma célula da linha tem colspan/rowspan (sem atributos = resposta rápida).
+    """
+    if not any(map(_atributos, celulas)):
+        return False
+    return any('colspan' in nomes or 'rowspan' in nomes for nomes in map(_atributos, celulas))
+
+
+def expandir_spans(celulas, pendentes) -> tuple:
+    """
+    Textos de uma linha com colspan/rowspan expandidos como no read_html.
+
+    Args:
+        celulas (list): <td>/<th> da linha
+        pendentes (list): rowspan em aberto das linhas anteriores, como
+                          [(posição, texto, linhas restantes), ...]
+
+    Returns:
+        tuple: (textos, pendentes) → textos da linha, posição a posição, e
+               os rowspan em aberto para a próxima linha
+
+    Nota:
+        Só para linhas com span ou rowspan em aberto (tem_span); as demais
+        seguem o caminho rápido de ler_colunas_html
+    """
+    textos = []
+    proximos = []
+    pendentes = list(pendentes)
+    for celula in celulas:
+        # Textos de rowspan de linhas anteriores que vêm antes desta célula
+        while pendentes and pendentes[0][0] <= len(textos):
+            _, texto, restantes = pendentes.pop(0)
+            if restantes > 1:
+                proximos.append((len(textos), texto, restantes - 1))
+            textos.append(texto)
+
+        texto = texto_da_celula(celula)
+        linhas = int(celula.get('rowspan') or 1)
+        for _ in range(int(celula.get('colspan') or 1)):
+            if linhas > 1:
+                proximos.append((len(textos), texto, linhas - 1))
+            textos.append(texto)
+
+    # Rowspan em aberto depois da última célula
+    for _, texto, restantes in pendentes:
+        if restantes > 1:
+            proximos.append((len(textos), texto, restantes - 1))
+        textos.append(texto)
+    return textos, proximos
+
+
+def numero_do_read_html(decimal, milhar):
+    """
+    Regex com que o read_html (parser python) decide se um texto é número.
+    """
+    decimal = re.escape(decimal)
+    if not milhar:
+        return re.compile(rf"^[\-\+]?[0-9]*({decimal}[0-9]*)?([0-9]?(E|e)\-?[0-9]+)?$")
+    milhar = re.escape(milhar)
+    return re.compile(rf"^[\-\+]?([0-9]+{milhar}|[0-9])*({decimal}[0-9]*)?([0-9]?(E|e)\-?[0-9]+)?$")
+
+
+def converter_coluna(valores, decimal=',', milhar='.') -> list:
+    """
+    Tipa uma coluna de textos com as regras decimal/milhar do read_html.
+
+    Args:
+        valores (list): Textos da coluna
+        decimal (str): Separador decimal (padrão BR: ',')
+        milhar (str): Separador de milhar (padrão BR: '.')
+
+    Returns:
+        list: Números (int/float, pela mesma conversão do pandas) se todos
+              os valores são numéricos, bool se todos são True/False, senão
+              os textos. Como no read_html, os separadores saem de cada
+              texto com cara de número mesmo numa coluna de texto
+              ('1.000' → '1000') e, com keep_default_na=False, uma célula
+              vazia mantém a coluna como texto
+    """
+    if not valores:
+        return valores
+
+    import pandas
+
+    # Coluna sem nenhum separador (a maioria das de texto) não passa pelo laço
+    juntos = '\n'.join(valores)
+    trocar_milhar = bool(milhar) and milhar in juntos
+    trocar_decimal = decimal != '.' and decimal in juntos
+    textos = valores
+    if trocar_milhar or trocar_decimal:
+        numero = numero_do_read_html(decimal, milhar)
+        textos = []
+        for texto in valores:
+            if trocar_milhar and milhar in texto and numero.search(texto.strip()):
+                texto = texto.replace(milhar, '')
+            if trocar_decimal and decimal in texto and numero.search(texto.strip()):
+                texto = texto.replace(decimal, '.')
+            textos.append(texto)
+
+    if '' not in textos:
+        try:
+            return pandas.to_numeric(textos).tolist()
+        except (ValueError, TypeError):
+            pass
+    if all(texto in _verdadeiros or texto in _falsos for texto in textos):
+        return [texto in _verdadeiros for texto in textos]
+    return textos
+
+
+def ler_colunas_html(caminho, projetar=None, decimal=',', milhar='.') -> tuple:
+    """
+    Lê a tabela de um .xls HTML linha a linha, guardando só as colunas pedidas.
+
+    Args:
+        caminho (str): Arquivo .xls (tabela HTML)
+        projetar (callable): Recebe o cabeçalho (lista de nomes) e devolve os
+                             índices das colunas a manter, na ordem desejada
+                             (None = todas as colunas)
+        decimal (str): Separador decimal
+        milhar (str): Separador de milhar
+
+    Returns:
+        tuple: (nomes, colunas) → nomes das colunas mantidas e uma lista
+               tipada por coluna (ver converter_coluna)
+
+    Raises:
+        AssertionError: Se o arquivo não tem nenhuma linha de tabela
+
+    Memória:
+        Cada <tr> é descartado da árvore assim que lido (iterparse), então
+        o pico é o das colunas mantidas, não o do DOM inteiro
+
+    Spans:
+        colspan repete o texto nas colunas seguintes e rowspan nas linhas
+        seguintes (expandir_spans), como o read_html
+
+    Cabeçalho:
+        Sempre a primeira linha (as exportações do Optimus têm uma só)
+    """
+    cabecalho = None
+    indices = None
+    colunas = []
+    pendentes = []
+
+    def acrescentar_textos(textos):
+        # Linha já expandida (spans): textos prontos, posição a posição
+        quantidade = len(textos)
+        if quantidade == 0 or (quantidade == 1 and not textos[0].strip()):
+            return
+        for coluna, indice in zip(colunas, indices):
+            coluna.append(textos[indice] if indice < quantidade else '')
+
+    for _, linha in etree.iterparse(caminho, events=('end',), tag='tr', html=True):
+        celulas = [celula for celula in linha if celula.tag in _tags_celula]
+        expandida = bool(pendentes) or tem_span(celulas)
+        if expandida:
+            textos, pendentes = expandir_spans(celulas, pendentes)
+
+        if cabecalho is None:
+            cabecalho = textos if expandida else [texto_da_celula(celula) for celula in celulas]
+            indices = projetar(list(cabecalho)) if projetar is not None else None
+            if indices is None:
+                indices = list(range(len(cabecalho)))
+            colunas = [[] for _ in indices]
+        elif expandida:
+            acrescentar_textos(textos)
+        else:
+            # Linha sem células ou só com uma célula vazia é pulada, como no read_html
+            quantidade = len(celulas)
+            if quantidade > 1 or (quantidade == 1 and texto_da_celula(celulas[0])):
+                # Só as células projetadas têm o texto extraído
+                for coluna, indice in zip(colunas, indices):
+                    coluna.append(texto_da_celula(celulas[indice]) if indice < quantidade else '')
+
+        # Libera a linha já lida (e as anteriores) da árvore
+        linha.clear()
+        while linha.getprevious() is not None:
+            del linha.getparent()[0]
+
+    if cabecalho is None:
+        raise AssertionError(f'Nenhuma tabela encontrada em {caminho}')
+
+    # Linhas que só existem pelo rowspan da última linha (o read_html também as cria)
+    while pendentes:
+        textos, pendentes = expandir_spans([], pendentes)
+        acrescentar_textos(textos)
+
+    nomes = [cabecalho[indice] for indice in indices]
+    colunas = [converter_coluna(coluna, decimal=decimal, milhar=milhar) for coluna in colunas]
+    return (nomes, colunas)
+
+
+def nomes_unicos(nomes) -> list:
+    """
+    Renomeia colunas repetidas como o pandas ("x", "x.1", "x.2", ...).
+    """
+    vistos = {}
+    unicos = []
+    for nome in nomes:
+        if nome in vistos:
+            vistos[nome] += 1
+            unicos.append(f'{nome}.{vistos[nome]}')
+        else:
+            vistos[nome] = 0
+            unicos.append(nome)
+    return unicos
+
+
+def ler_tabela_html(caminho, projetar=None, decimal=',', milhar='.'):
+    """
+    ler_colunas_html devolvendo um pandas.DataFrame.
+
+    Exemplo (equivale a pandas.read_html(caminho, keep_default_na=False,
+    decimal=',', thousands='.')[0], lendo só duas colunas):
+        df = ler_tabela_html(caminho, projetar=lambda cabecalho: [cabecalho.index('MATRICULA'),
+                                                                  cabecalho.index('NUM_MONITORIA')])
+    """
+    import pandas
+
+    nomes, colunas = ler_colunas_html(caminho, projetar=projetar, decimal=decimal, milhar=milhar)
+    nomes = nomes_unicos(nomes)
+    return pandas.DataFrame(dict(zip(nomes, colunas)), columns=nomes)
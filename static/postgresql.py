@@ -2,26 +2,218 @@
 Módulo: postgresql.py
 Descrição: Classe para gerenciar conexões e operações no PostgreSQL
 Autor: Automação e Inovação - Contact Center
-Recursos: Reconexão automática, proteção contra SQL injection, retorno de dicionários
+Recursos: Pool de conexões compartilhado, reconexão automática, proteção contra SQL injection,
+          retorno de dicionários
 """
 
+import io
+import csv
+import time
+import datetime
+import threading
+from contextlib import contextmanager
 from typing import Any
 
 import psycopg2.extras
+import psycopg2.extensions
 from psycopg2 import connect
 
 
+class nulo_csv:
+    """
+    NULL de uma célula no CSV do COPY (valor_copy).
+
+    O csv.writer com QUOTE_NONNUMERIC põe aspas em tudo que não é número;
+    este valor conta como número (__float__), então sai sem aspas como
+    nulo_copy e é lido como NULL. Um texto igual a nulo_copy sai entre
+    aspas e continua sendo texto.
+    """
+
+    def __float__(self) -> float:
+        return float('nan')
+
+    def __str__(self) -> str:
+        return Conexao_postgresql.nulo_copy
+
+
+class pool_postgresql:
+    """
+    Pool de conexões do processo, um por servidor/banco/usuário.
+    
+    Características:
+    - Compartilhado por todas as instâncias de Conexao_postgresql (e de
+      registers) com as mesmas credenciais: obter() devolve sempre o mesmo
+    - Thread-safe e limitado a maximo_conexoes: quem pede uma conexão com
+      todas emprestadas espera uma ser devolvida
+    - Conexões abertas sob demanda e mantidas abertas para reuso
+    - Verificação de saúde ao emprestar: conexão fechada é descartada e a
+      que ficou parada mais de segundos_para_verificar responde a um
+      "select 1" antes de ser entregue
+    """
+    
+    # Conexões abertas ao mesmo tempo (por pool)
+    maximo_conexoes = 8
+    
+    # Conexão parada há mais que isso é testada antes de ser emprestada
+    segundos_para_verificar = 60
+    
+    _pools = {}
+    _trava_pools = threading.Lock()
+    
+    def __init__(self, mhost, db, usr, pwd) -> None:
+        self.mhost = mhost
+        self.db = db
+        self.usr = usr
+        self.pwd = pwd
+        self._livres = []  # [(conexão, time.monotonic() da devolução), ...]
+        self._trava = threading.Lock()
+        self._vagas = threading.BoundedSemaphore(self.__class__.maximo_conexoes)
+        self._fechado = False
+    
+    @classmethod
+    def obter(cls, mhost, db, usr, pwd):
+        """
+        Pool compartilhado das credenciais (criado no primeiro uso).
+        """
+        chave = (mhost, db, usr)
+        with cls._trava_pools:
+            if chave not in cls._pools:
+                cls._pools[chave] = cls(mhost, db, usr, pwd)
+            return cls._pools[chave]
+    
+    @classmethod
+    def fechar_todos(cls) -> None:
+        """
+        Fecha as conexões livres de todos os pools (fim do processo).
+        """
+        with cls._trava_pools:
+            pools = list(cls._pools.values())
+            cls._pools = {}
+        for pool in pools:
+            pool.fechar()
+    
+    def saudavel(self, conexao, parada_desde) -> bool:
+        """
+        Indica se a conexão livre pode ser emprestada.
+        """
+        if conexao.closed != 0:
+            return False
+        if time.monotonic() - parada_desde < self.__class__.segundos_para_verificar:
+            return True
+        try:
+            cur = conexao.cursor()
+            cur.execute('select 1')
+            cur.close()
+            conexao.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def emprestar(self):
+        """
+        Pega uma conexão saudável do pool (espera se todas estão emprestadas).
+        
+        Returns:
+            connection: Conexão livre verificada ou uma nova
+        """
+        self._vagas.acquire()
+        try:
+            while True:
+                with self._trava:
+                    livre = self._livres.pop() if self._livres else None
+                if livre is None:
+                    return connect(host=self.mhost, database=self.db, user=self.usr, password=self.pwd)
+                conexao, parada_desde = livre
+                if self.saudavel(conexao, parada_desde):
+                    return conexao
+                # Conexão morta: descarta e tenta a próxima
+                self._fechar_conexao(conexao)
+        except Exception:
+            self._vagas.release()
+            raise
+    
+    def devolver(self, conexao) -> None:
+        """
+        Devolve a conexão ao pool (fechada ou perdida = descartada; transação aberta = rollback).
+        """
+        try:
+            if conexao.closed != 0:
+                return
+            if self._fechado:
+                self._fechar_conexao(conexao)
+                return
+            status = conexao.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._fechar_conexao(conexao)
+                return
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conexao.rollback()
+            with self._trava:
+                self._livres.append((conexao, time.monotonic()))
+        except Exception:
+            self._fechar_conexao(conexao)
+        finally:
+            self._vagas.release()
+    
+    @contextmanager
+    def conexao(self):
+        """
+        Empresta uma conexão durante o bloco.
+        
+        Exemplo:
+            with pool.conexao() as db:
+                cur = db.cursor()
+        """
+        conexao = self.emprestar()
+        try:
+            yield conexao
+        finally:
+            self.devolver(conexao)
+    
+    def fechar(self) -> None:
+        """
+        Fecha as conexões livres; as emprestadas fecham ao serem devolvidas.
+        """
+        with self._trava:
+            self._fechado = True
+            livres, self._livres = self._livres, []
+        for conexao, _ in livres:
+            self._fechar_conexao(conexao)
+    
+    @staticmethod
+    def _fechar_conexao(conexao) -> None:
+        try:
+            conexao.close()
+        except Exception:
+            pass
+
+
 class Conexao_postgresql(object):
     """
     Classe de conexão PostgreSQL com gerenciamento automático de reconexão.
     
     Características:
-    - Reconexão automática em caso de perda de conexão
+    - Conexões emprestadas de um pool_postgresql compartilhado a cada operação
+    - Reconexão automática em caso de perda de conexão (nova tentativa com
+      outra conexão do pool)
     - Uso de cursores parametrizados (proteção contra SQL injection)
     - Retorno de consultas como lista de dicionários
+    - Consultas grandes em lotes (cursor no servidor) ou direto em DataFrame
     - Commit automático após cada operação
+    - Carga em massa via COPY (copiar) dentro de uma transação (transacao)
     """
     
+    # Linhas buscadas por vez do cursor no servidor (consultar_em_lotes)
+    tamanho_lote_consulta = 20000
+    
+    # Linhas por bloco de CSV enviado ao COPY (limita a memória do buffer)
+    linhas_por_bloco_copy = 50000
+    
+    # Marcador de NULL no CSV do COPY (string vazia continua sendo string vazia;
+    # só sai sem aspas para NULL, então o texto "\N" continua sendo texto)
+    nulo_copy = r'\N'
+    marca_nulo = nulo_csv()
+    
     def __init__(self, mhost, db, usr, pwd):
         """
         Inicializa a conexão com o PostgreSQL.
@@ -31,6 +223,10 @@ class Conexao_postgresql(object):
             db (str): Nome do banco de dados
             usr (str): Usuário do banco
             pwd (str): Senha do usuário
+            
+        Nota:
+            Não abre uma conexão própria: usa o pool do processo para
+            estas credenciais (criado na primeira instância)
         """
         # Armazena credenciais para reconexão automática
         self.pwd = pwd
@@ -38,16 +234,49 @@ class Conexao_postgresql(object):
         self.db = db
         self.mhost = mhost
         
-        # Estabelece a conexão inicial
-        self._db = connect(host=mhost, database=db, user=usr, password=pwd)
+        self.pool = pool_postgresql.obter(mhost, db, usr, pwd)
+    
+    def emprestar(self):
+        """
+        Context manager com uma conexão do pool (devolvida ao sair do bloco).
+        """
+        return self.pool.conexao()
+    
+    def executar(self, operacao):
+        """
+        Executa operacao(conexao) com uma conexão emprestada do pool.
+        
+        Args:
+            operacao (callable): Recebe a conexão e devolve o resultado
+            
+        Reconexão:
+            Se a conexão cair durante a operação, ela é descartada e a
+            operação é repetida uma vez com outra conexão do pool
+            
+        Raises:
+            AssertionError: Erro na execução (conexão ativa) ou nova queda
+        """
+        for tentativa in range(2):
+            with self.emprestar() as db:
+                try:
+                    return operacao(db)
+                except Exception as e:
+                    # db.closed: 0 = conexão aberta; != 0 = conexão fechada/perdida
+                    if db.closed != 0 and tentativa == 0:
+                        continue
+                    raise AssertionError(str(e))
 
-    def manipular(self, sql, _Vars):
+    def manipular(self, sql, _Vars, retornar_id=False):
         """
         Executa comandos SQL de manipulação (INSERT, UPDATE, DELETE).
         
         Args:
             sql (str): Comando SQL com placeholders (%s)
             _Vars (tuple): Valores para os placeholders
+            retornar_id (bool): Em INSERT, acrescenta RETURNING id e devolve o id
+            
+        Returns:
+            int | None: id do registro inserido (retornar_id) ou None
             
         Comportamento:
         - INSERT: Verifica se é insert nos primeiros 10 caracteres
@@ -57,46 +286,29 @@ class Conexao_postgresql(object):
         
         Raises:
             AssertionError: Se houver erro na execução e conexão estiver ativa
-            
-        Nota:
-            Código comentado mostra possibilidade de retornar ID do registro inserido
         """
-        try:
+        def operacao(db):
             # Detecta se é um INSERT (verifica primeiros 10 caracteres)
             if 'insert' in sql[:10]:
-                # Código comentado: retornaria o ID do registro inserido
-                # if 'RETURNING id' not in sql:
-                #     sql = sql + ' RETURNING id '
-                cur = self._db.cursor()
-                cur.execute(sql, _Vars)  # Execute com proteção contra SQL injection
-                # fk = cur.fetchone()[0]  # Pegaria o ID retornado
+                fk = None
+                comando = sql
+                if retornar_id and 'returning id' not in sql.lower():
+                    comando = sql + ' RETURNING id '
+                cur = db.cursor()
+                cur.execute(comando, _Vars)  # Execute com proteção contra SQL injection
+                if retornar_id:
+                    fk = cur.fetchone()[0]  # ID retornado
                 cur.close()
-                self._db.commit()  # Confirma a transação
-                # return fk
+                db.commit()  # Confirma a transação
+                return fk
             else:
                 # Para UPDATE, DELETE e outros comandos
-                cur = self._db.cursor()
+                cur = db.cursor()
                 cur.execute(sql, _Vars)
                 cur.close()
-                self._db.commit()
-                
-        except Exception as e:
-            # self._db.closed retorna:
-            # 0 = conexão aberta
-            # != 0 = conexão fechada/perdida
-            if self._db.closed != 0:
-                # Reconecta automaticamente
-                self._db = connect(host=self.mhost, database=self.db, user=self.usr, password=self.pwd)
-                # Tenta executar novamente (recursão)
-                return self.manipular(sql=sql, _Vars=_Vars)
-            else:
-                # Se conexão está ativa mas deu erro, é erro real
-                e = str(e)
-                try:
-                    cur.close()  # Tenta fechar cursor se existir
-                except:
-                    pass
-                raise AssertionError(e)  # Propaga o erro
+                db.commit()
+
+        return self.executar(operacao)
 
     def query(self, sql):
         """
@@ -116,24 +328,13 @@ class Conexao_postgresql(object):
         Aviso:
             Não use com dados do usuário (risco de SQL injection)
         """
-        try:
-            cur = self._db.cursor()
+        def operacao(db):
+            cur = db.cursor()
             cur.execute(sql)  # Executa SQL direto
             cur.close()
-            self._db.commit()
-            
-        except Exception as e:
-            # Mesma lógica de reconexão do método manipular()
-            if self._db.closed != 0:
-                self._db = connect(host=self.mhost, database=self.db, user=self.usr, password=self.pwd)
-                return self.query(sql=sql)
-            else:
-                e = str(e)
-                try:
-                    cur.close()
-                except:
-                    pass
-                raise AssertionError(e)
+            db.commit()
+
+        return self.executar(operacao)
 
     def consultar(self, sql) -> list[dict[Any, Any]]:
         """
@@ -157,10 +358,9 @@ class Conexao_postgresql(object):
         - Fácil de converter para JSON
         - Evita erros ao mudar ordem das colunas
         """
-        try:
-            rs = None
+        def operacao(db):
             # DictCursor: retorna linhas como dicionários ao invés de tuplas
-            cur = self._db.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            cur = db.cursor(cursor_factory=psycopg2.extras.DictCursor)
             cur.execute(sql)
             rs = cur.fetchall()  # Busca todos os resultados
             
@@ -170,30 +370,199 @@ class Conexao_postgresql(object):
                 ans.append(dict(row))
             cur.close()
             return ans
+
+        return self.executar(operacao)
+
+    def consultar_em_lotes(self, sql, tamanho_lote=None):
+        """
+        Executa SELECT num cursor do servidor e devolve as linhas em lotes.
+        
+        Args:
+            sql (str): Query SELECT
+            tamanho_lote (int): Linhas por lote (None = tamanho_lote_consulta)
             
-        except Exception as e:
-            # Mesma lógica de reconexão
-            if self._db.closed != 0:
-                self._db = connect(host=self.mhost, database=self.db, user=self.usr, password=self.pwd)
-                return self.consultar(sql=sql)
-            else:
-                e = str(e)
+        Yields:
+            tuple: (colunas, lote) → nomes das colunas e lista de tuplas; há
+                   sempre ao menos um lote (vazio se a consulta não tem linhas)
+            
+        Memória:
+            Só um lote fica no cliente por vez (FETCH no cursor nomeado),
+            sem o dict por linha do consultar()
+            
+        Nota:
+            A conexão fica emprestada até o fim da iteração; se cair no meio,
+            não há nova tentativa (parte das linhas já foi entregue)
+        """
+        tamanho_lote = tamanho_lote or self.__class__.tamanho_lote_consulta
+        with self.emprestar() as db:
+            # Cursor nomeado = cursor no servidor (precisa de nome único na conexão)
+            cur = db.cursor(name=f'consulta_em_lotes_{threading.get_ident()}_{id(db)}')
+            try:
+                cur.execute(sql)
+                primeiro = True
+                while True:
+                    lote = cur.fetchmany(tamanho_lote)
+                    if not lote and not primeiro:
+                        break
+                    primeiro = False
+                    yield ([coluna.name for coluna in cur.description], lote)
+                    if len(lote) < tamanho_lote:
+                        break
+            except Exception as e:
+                raise AssertionError(str(e))
+            finally:
+                # Também ao interromper a iteração (GeneratorExit)
+                try:
+                    cur.close()
+                except:
+                    pass
+
+    def consultar_dataframe(self, sql, tamanho_lote=None):
+        """
+        Executa SELECT e monta um pandas.DataFrame direto das tuplas, em lotes.
+        
+        Args:
+            sql (str): Query SELECT
+            tamanho_lote (int): Linhas por lote (None = tamanho_lote_consulta)
+            
+        Returns:
+            pandas.DataFrame: Uma coluna por coluna da consulta (vazio, mas
+                              com as colunas, se não houver linhas)
+            
+        Vantagem:
+            Sem lista de dicts intermediária: cada lote é transposto para
+            listas por coluna e descartado
+        """
+        import pandas
+
+        colunas = []
+        valores = []
+        for colunas, lote in self.consultar_em_lotes(sql, tamanho_lote=tamanho_lote):
+            if not valores:
+                valores = [[] for _ in colunas]
+            for lista, coluna in zip(valores, zip(*lote)):
+                lista.extend(coluna)
+        return pandas.DataFrame(dict(zip(colunas, valores)), columns=colunas)
+
+    @contextmanager
+    def transacao(self):
+        """
+        Abre uma transação: commit ao final do bloco, rollback se houver erro.
+        
+        Yields:
+            cursor: Cursor da transação
+            
+        Exemplo:
+            with conn.transacao() as cur:
+                cur.execute("delete from tabela where mes = 1")
+                conn.copiar('tabela', ['a', 'b'], linhas, cur=cur)
+                
+        Raises:
+            AssertionError: Erro dentro do bloco (a transação é desfeita)
+            
+        Nota:
+            Usa uma única conexão do pool durante todo o bloco; não repete
+            o bloco se a conexão cair, pois parte dele pode já ter sido executada
+        """
+        with self.emprestar() as db:
+            cur = db.cursor()
+            try:
+                yield cur
+                cur.close()
+                db.commit()
+            except Exception as e:
                 try:
                     cur.close()
+                    db.rollback()
                 except:
                     pass
-                raise AssertionError(e)
+                raise AssertionError(str(e))
+
+    @classmethod
+    def valor_copy(cls, valor):
+        """
+        Converte um valor Python/pandas para o texto do CSV do COPY.
+        
+        - None, NaN, NaT e pandas.NA → nulo_csv (nulo_copy sem aspas)
+        - datas/horas → ISO (2025-01-18 13:45:00)
+        - bool → true/false
+        """
+        if valor is None:
+            return cls.marca_nulo
+        try:
+            if valor != valor:  # NaN e NaT são diferentes de si mesmos
+                return cls.marca_nulo
+        except TypeError:
+            return cls.marca_nulo  # pandas.NA não tem valor lógico
+        if isinstance(valor, bool):
+            return 'true' if valor else 'false'
+        if isinstance(valor, datetime.datetime):
+            return valor.isoformat(sep=' ')
+        if isinstance(valor, datetime.date):
+            return valor.isoformat()
+        return valor
+
+    def copiar(self, tabela, colunas, linhas, cur=None) -> int:
+        """
+        Insere linhas em massa com COPY ... FROM STDIN (CSV em memória).
+        
+        Args:
+            tabela (str): Nome da tabela
+            colunas (list): Colunas na ordem dos valores de cada linha
+            linhas (iterable): Linhas (listas/tuplas); lido em blocos de
+                               linhas_por_bloco_copy, então pode ser um gerador
+            cur (cursor): Cursor de uma transacao() aberta (None = abre
+                          uma transação só para esta cópia)
+            
+        Returns:
+            int: Linhas copiadas
+            
+        Vantagem:
+            Um comando por bloco e um commit no total, em vez de um
+            INSERT e um commit por linha
+            
+        CSV:
+            Textos sempre entre aspas (QUOTE_NONNUMERIC); só o NULL
+            (nulo_csv) e os números saem sem aspas
+        """
+        if cur is None:
+            with self.transacao() as cur:
+                return self.copiar(tabela, colunas, linhas, cur=cur)
+
+        sql = (f"copy {tabela} ({','.join(colunas)}) from stdin "
+               f"with (format csv, null '{self.__class__.nulo_copy}')")
+        total = 0
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, lineterminator='\n', quoting=csv.QUOTE_NONNUMERIC)
+        quantidade = 0
+        for linha in linhas:
+            escritor.writerow([self.valor_copy(valor) for valor in linha])
+            quantidade += 1
+            if quantidade == self.__class__.linhas_por_bloco_copy:
+                buffer.seek(0)
+                cur.copy_expert(sql, buffer)
+                total += quantidade
+                buffer = io.StringIO()
+                escritor = csv.writer(buffer, lineterminator='\n', quoting=csv.QUOTE_NONNUMERIC)
+                quantidade = 0
+        if quantidade:
+            buffer.seek(0)
+            cur.copy_expert(sql, buffer)
+            total += quantidade
+        return total
 
     def fechar(self):
         """
-        Fecha a conexão com o banco de dados.
+        Fecha as conexões do pool destas credenciais.
         
         Uso:
-            Deve ser chamado ao final do script ou quando a conexão
-            não é mais necessária para liberar recursos.
+            Deve ser chamado ao final do script, quando nenhuma outra
+            instância vai mais usar o banco (o pool é compartilhado).
             
         Nota:
-            Na maioria dos casos do projeto, a conexão fica aberta
-            durante toda a execução do RPA.
+            Na maioria dos casos do projeto, o pool fica aberto durante
+            toda a execução do RPA (pool_postgresql.fechar_todos no final).
         """
-        self._db.close()
+        with pool_postgresql._trava_pools:
+            pool_postgresql._pools.pop((self.mhost, self.db, self.usr), None)
+        self.pool.fechar()
@@ -37,7 +37,8 @@ class registers:
         
         Atributos criados:
             data_atual: Data de hoje (para controle de execução)
-            conexao: Objeto de conexão PostgreSQL
+            conexao: Objeto de conexão PostgreSQL (empresta do pool do processo,
+                     compartilhado entre as instâncias)
         """
         self.data_atual = datetime.date.today()
 
@@ -46,16 +47,33 @@ class registers:
                                           self.__class__.nome_do_banco_de_dados_postgresql,
                                           self.__class__.usuario_datamart, self.__class__.senha_datamart)
 
-    def registro_sucesso(self, dicionario: dict, tabela: str) -> int:
+    def emprestar(self):
+        """
+        Context manager com uma conexão do pool compartilhado.
+        
+        Exemplo:
+            with inst_registers.emprestar() as db:
+                cur = db.cursor()
+                ...
+                db.commit()
+                
+        Nota:
+            Os demais métodos já emprestam e devolvem uma conexão por
+            operação; use este só para operações fora deles
+        """
+        return self.conexao.emprestar()
+
+    def registro_sucesso(self, dicionario: dict, tabela: str, retornar_id=False) -> int:
         """
         Insere um registro no banco a partir de um dicionário.
         
         Args:
             dicionario (dict): Dados a inserir {'coluna': valor}
             tabela (str): Nome da tabela (ex: 'monitoria.fichas')
+            retornar_id (bool): Devolve o id gerado (INSERT ... RETURNING id)
             
         Returns:
-            int: ID do registro inserido (se configurado RETURNING)
+            int: ID do registro inserido (retornar_id=True) ou None
             
         Exemplo:
             registro_sucesso(
@@ -79,7 +97,8 @@ class registers:
 
         # AsIs: Insere as colunas como SQL literal (não como string)
         # tuple(dicionario.values()): Converte valores em tupla
-        return self.conexao.manipular(sql_insert, (AsIs(colunas_string), tuple(dicionario.values())))
+        return self.conexao.manipular(sql_insert, (AsIs(colunas_string), tuple(dicionario.values())),
+                                      retornar_id=retornar_id)
 
     def registro_sucesso_list(self, tabela, colunas_string, linha) -> None:
         """
@@ -102,6 +121,79 @@ class registers:
         sql_insert = f'insert into {tabela} (%s) values %s'
         self.conexao.manipular(sql_insert, (AsIs(colunas_string), tuple(linha)))
 
+    def registro_em_massa(self, tabela, colunas, linhas) -> int:
+        """
+        Insere várias linhas de uma vez (COPY) numa única transação.
+        
+        Args:
+            tabela (str): Nome da tabela
+            colunas (list): Colunas na ordem dos valores (None = colunas do DataFrame)
+            linhas (DataFrame | iterable): DataFrame ou listas de valores
+            
+        Returns:
+            int: Linhas inseridas
+            
+        Exemplo:
+            registro_em_massa('public.fichas_monitoria', None, df)
+            
+        Uso:
+            Substitui o loop de registro_sucesso_list em cargas grandes
+            (um commit por arquivo em vez de um por linha)
+        """
+        if hasattr(linhas, 'itertuples'):
+            colunas = colunas or linhas.columns.tolist()
+            linhas = linhas.itertuples(index=False, name=None)
+        return self.conexao.copiar(tabela, colunas, linhas)
+
+    def carga_eav(self, ficha_fk, linhas) -> dict:
+        """
+        Grava os valores de uma ficha em monitoria.registros/registro_coluna por conjuntos.
+        
+        Args:
+            ficha_fk (int): id da ficha em monitoria.fichas
+            linhas (iterable): (num_monitoria, coluna_fk, valor) de cada célula,
+                               sem num_monitoria repetido com outro conteúdo
+            
+        Returns:
+            dict: {'celulas', 'registros', 'valores'} → células recebidas,
+                  registros e valores novos inseridos
+            
+        Lógica (uma transação por ficha):
+        1. COPY das células numa tabela temporária (tipos das tabelas reais)
+        2. insert em registros dos num_monitoria que ainda não existem na ficha
+        3. insert em registro_coluna dos pares (coluna, registro) que ainda
+           não existem, com o id do registro resolvido por join
+           
+        Nota:
+            "not exists" em vez de ON CONFLICT: não depende de índice único
+            em (ficha_fk, num_monitoria) ou (coluna_fk, registro_fk)
+        """
+        temporaria = 'carga_eav'
+        with self.conexao.transacao() as cur:
+            cur.execute(f"""create temp table {temporaria} on commit drop as
+                            select r.num_monitoria, rc.coluna_fk, rc.valor
+                            from monitoria.registros as r cross join monitoria.registro_coluna as rc
+                            with no data""")
+            celulas = self.conexao.copiar(temporaria, ['num_monitoria', 'coluna_fk', 'valor'], linhas, cur=cur)
+
+            cur.execute(f"""insert into monitoria.registros (num_monitoria, ficha_fk)
+                            select distinct c.num_monitoria, %s from {temporaria} as c
+                            where not exists (select 1 from monitoria.registros as r
+                                              where r.ficha_fk = %s and r.num_monitoria = c.num_monitoria)""",
+                        (ficha_fk, ficha_fk))
+            registros_novos = cur.rowcount
+
+            cur.execute(f"""insert into monitoria.registro_coluna (coluna_fk, registro_fk, valor)
+                            select c.coluna_fk, r.id, c.valor
+                            from {temporaria} as c
+                            join monitoria.registros as r on r.ficha_fk = %s and r.num_monitoria = c.num_monitoria
+                            where not exists (select 1 from monitoria.registro_coluna as rc
+                                              where rc.coluna_fk = c.coluna_fk and rc.registro_fk = r.id)""",
+                        (ficha_fk,))
+            valores_novos = cur.rowcount
+
+        return {'celulas': celulas, 'registros': registros_novos, 'valores': valores_novos}
+
     def atualizar_registro(self, dicionario: dict, tabela: str, id) -> None:
         """
         Atualiza um registro existente pelo ID.
@@ -153,6 +245,32 @@ class registers:
         lista = self.conexao.consultar(sql)
         return lista
 
+    def consultar_dataframe(self, sql):
+        """
+        Executa consulta SELECT e retorna um pandas.DataFrame.
+        
+        Args:
+            sql (str): Query SQL completa
+            
+        Returns:
+            pandas.DataFrame: Resultado (lido em lotes de um cursor no servidor)
+            
+        Uso:
+            Tabelas grandes que vão virar DataFrame (evita a lista de
+            dicionários de consultar_notas)
+        """
+        return self.conexao.consultar_dataframe(sql)
+
+    def consultar_em_lotes(self, sql, tamanho_lote=None):
+        """
+        Executa consulta SELECT e devolve (colunas, lote de tuplas) por vez.
+        
+        Exemplo:
+            for colunas, lote in inst_register.consultar_em_lotes('select * from monitoria.registros'):
+                ...
+        """
+        return self.conexao.consultar_em_lotes(sql, tamanho_lote=tamanho_lote)
+
     def procurar_historico_execucao(self, nome_do_relatorio):
         """
         Verifica se o RPA já foi executado hoje com sucesso.
@@ -232,3 +350,204 @@ class registers:
             Operação destrutiva! Não há como reverter.
         """
         self.conexao.query(f'delete from {tabela} where ano = {ano} and mes = {mes}')
+
+    def particao_do_mes(self, tabela, mes, ano):
+        """
+        Procura a partição que guarda só o mês/ano (tabela particionada).
+        
+        Args:
+            tabela (str): Nome da tabela
+            mes (int): Mês (1-12)
+            ano (int): Ano (ex: 2025)
+            
+        Returns:
+            dict | None: {'particao': nome, 'limite': "FOR VALUES ..."} ou None
+                         se a tabela não é particionada, se o mês ainda não
+                         tem dados ou se a partição guarda outros meses
+        """
+        tipo = self.conexao.consultar(f"select relkind from pg_class where oid = '{tabela}'::regclass")
+        if not tipo or tipo[0]['relkind'] != 'p':
+            return None
+
+        particao = self.conexao.consultar(
+            f'select tableoid::regclass::text as particao from {tabela} where ano = {ano} and mes = {mes} limit 1')
+        if not particao:
+            return None
+        particao = particao[0]['particao']
+
+        outros_meses = self.conexao.consultar(
+            f'select 1 from {particao} where not (ano = {ano} and mes = {mes}) limit 1')
+        if outros_meses:
+            return None
+
+        limite = self.conexao.consultar(
+            f"select pg_get_expr(relpartbound, oid) as limite from pg_class where oid = '{particao}'::regclass")
+        return {'particao': particao, 'limite': limite[0]['limite']}
+
+    def criar_staging(self, tabela, mes, ano, unlogged=True) -> str:
+        """
+        Cria (ou recria vazia) a tabela de staging da recarga de um mês.
+        
+        Args:
+            tabela (str): Tabela definitiva
+            mes (int): Mês (1-12)
+            ano (int): Ano (ex: 2025)
+            unlogged (bool): Sem WAL (mais rápida); não pode virar partição
+            
+        Returns:
+            str: Nome da staging (ex: public.fichas_monitoria_carga_2025_01)
+            
+        Nota:
+            Mesmas colunas, defaults e constraints da tabela definitiva;
+            uma staging que sobrou de uma execução com erro é descartada
+        """
+        staging = f'{tabela}_carga_{ano:04d}_{mes:02d}'
+        with self.conexao.transacao() as cur:
+            cur.execute(f'drop table if exists {staging}')
+            cur.execute(f'create {"unlogged " if unlogged else ""}table {staging} '
+                        f'(like {tabela} including defaults including constraints)')
+        return staging
+
+    def descartar_staging(self, staging) -> None:
+        """
+        Remove a tabela de staging (recarga cancelada).
+        """
+        self.conexao.query(f'drop table if exists {staging}')
+
+    def trocar_mes(self, tabela, staging, colunas, mes, ano, particao=None) -> None:
+        """
+        Substitui o mês da tabela pelo conteúdo da staging numa única transação.
+        
+        Args:
+            tabela (str): Tabela definitiva
+            staging (str): Tabela de staging já carregada (criar_staging)
+            colunas (list): Colunas copiadas da staging
+            mes (int): Mês (1-12)
+            ano (int): Ano (ex: 2025)
+            particao (dict): Resultado de particao_do_mes (None = sem partição)
+            
+        Com partição do mês:
+            detach da partição antiga, staging renomeada e anexada com o
+            mesmo limite; nenhuma linha é reescrita nem vira tupla morta
+            
+        Sem partição:
+            delete do mês + insert ... select da staging; os painéis veem
+            o mês antigo até o commit e o novo logo depois
+        """
+        with self.conexao.transacao() as cur:
+            if particao is not None:
+                nome_particao = particao['particao'].split('.')[-1]
+                cur.execute(f"alter table {tabela} detach partition {particao['particao']}")
+                cur.execute(f"drop table {particao['particao']}")
+                cur.execute(f'alter table {staging} rename to {nome_particao}')
+                staging = f"{staging.rsplit('.', 1)[0]}.{nome_particao}" if '.' in staging else nome_particao
+                cur.execute(f"alter table {tabela} attach partition {staging} {particao['limite']}")
+            else:
+                colunas_string = ','.join(colunas)
+                cur.execute(f'delete from {tabela} where ano = {ano} and mes = {mes}')
+                cur.execute(f'insert into {tabela} ({colunas_string}) select {colunas_string} from {staging}')
+                cur.execute(f'drop table {staging}')
+
+    def upsert_disponivel(self, tabela, chave) -> bool:
+        """
+        Verifica se a tabela já tem a coluna hash_linha e um índice único na chave.
+        
+        Args:
+            tabela (str): Nome da tabela
+            chave (list): Colunas da chave (ex: num_monitoria, tipo_da_ficha, ano, mes)
+            
+        Returns:
+            bool: True se o upsert pode rodar
+            
+        Nota:
+            Só consulta o catálogo; a coluna e o índice são criados uma vez
+            pela migração (insercao_datamart/migracao_upsert.py)
+        """
+        coluna = self.conexao.consultar(
+            f"""select 1 from pg_attribute
+                where attrelid = '{tabela}'::regclass and attname = 'hash_linha' and not attisdropped""")
+        colunas_chave = ','.join(f"'{coluna_chave}'" for coluna_chave in sorted(chave))
+        indice = self.conexao.consultar(
+            f"""select 1 from pg_index as i
+                where i.indrelid = '{tabela}'::regclass and i.indisunique
+                and (select array_agg(a.attname::text order by a.attname::text)
+                     from pg_attribute as a
+                     where a.attrelid = i.indrelid and a.attnum = any(i.indkey)) = array[{colunas_chave}]""")
+        return bool(coluna) and bool(indice)
+
+    def upsert_por_hash(self, tabela, colunas, chave, linhas, mes, ano, tipo_da_ficha) -> dict:
+        """
+        Grava uma ficha por upsert: só linhas novas ou com hash_linha diferente.
+        
+        Args:
+            tabela (str): Nome da tabela (com hash_linha e índice da migracao_upsert)
+            colunas (list): Colunas das linhas (incluindo hash_linha)
+            chave (list): Colunas da chave do ON CONFLICT
+            linhas (iterable): Valores na ordem de colunas, sem chaves repetidas
+            mes (int): Mês (1-12)
+            ano (int): Ano (ex: 2025)
+            tipo_da_ficha (str): Ficha das linhas (delimita a exclusão)
+            
+        Returns:
+            dict: {'inseridas', 'atualizadas', 'removidas', 'inalteradas'}
+            
+        Lógica (uma transação):
+        1. COPY das linhas numa tabela temporária
+        2. insert ... on conflict (chave) do update ... where o hash mudou
+           returning (xmax = 0): verdadeiro = inserida, falso = atualizada
+        3. delete das linhas da ficha/mês que não vieram no arquivo
+        """
+        colunas_string = ','.join(colunas)
+        atualizar = ','.join(f'{coluna} = excluded.{coluna}' for coluna in colunas if coluna not in chave)
+        temporaria = 'carga_upsert'
+
+        with self.conexao.transacao() as cur:
+            cur.execute(f'create temp table {temporaria} (like {tabela} including defaults) on commit drop')
+            total = self.conexao.copiar(temporaria, colunas, linhas, cur=cur)
+
+            cur.execute(f"""insert into {tabela} ({colunas_string})
+                            select {colunas_string} from {temporaria}
+                            on conflict ({','.join(chave)}) do update set {atualizar}
+                            where {tabela}.hash_linha is distinct from excluded.hash_linha
+                            returning (xmax = 0) as inserida""")
+            gravadas = [linha[0] for linha in cur.fetchall()]
+
+            cur.execute(f"""delete from {tabela} as t
+                            where t.ano = %s and t.mes = %s and t.tipo_da_ficha = %s
+                            and not exists (select 1 from {temporaria} as c
+                                            where c.num_monitoria = t.num_monitoria)""",
+                        (ano, mes, tipo_da_ficha))
+            removidas = cur.rowcount
+
+        inseridas = sum(1 for inserida in gravadas if inserida)
+        return {
+            'inseridas': inseridas,
+            'atualizadas': len(gravadas) - inseridas,
+            'removidas': removidas,
+            'inalteradas': total - len(gravadas),
+        }
+
+    def monitorias_carregadas(self, tabela, mes, ano) -> dict:
+        """
+        Lista as monitorias já carregadas de um mês/ano, por ficha.
+        
+        Args:
+            tabela (str): Nome da tabela
+            mes (int): Mês (1-12)
+            ano (int): Ano (ex: 2025)
+            
+        Returns:
+            dict: {tipo_da_ficha: {num_monitoria, ...}}
+            
+        Uso:
+            Carga incremental: só o que não está aqui é inserido
+        """
+        lista = self.conexao.consultar(
+            f'select tipo_da_ficha, num_monitoria from {tabela} where ano = {ano} and mes = {mes}')
+
+        # int(): o banco pode devolver Decimal; o DataFrame usa inteiros
+        carregadas = {}
+        for linha in lista:
+            if linha['num_monitoria'] is not None:
+                carregadas.setdefault(linha['tipo_da_ficha'], set()).add(int(linha['num_monitoria']))
+        return carregadas
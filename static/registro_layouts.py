@@ -0,0 +1,196 @@
+"""
+Módulo: registro_layouts.py
+Descrição: Registro (JSON) dos layouts de ficha já resolvidos, para não repetir a busca de colunas
+Autor: Automação e Inovação - Contact Center
+Uso: insercao_datamart.main.leitura (resolução das colunas pelo cabeçalho do arquivo)
+"""
+
+import os
+import json
+import hashlib
+import datetime
+import threading
+
+
+class registro_layouts:
+    """
+    Guarda a projeção de colunas resolvida para cada layout de ficha.
+
+    Arquivo:
+        {"versao": versao, "entradas": {chave: entrada}}. Registro de outra
+        versão (ou sem versão) é descartado na leitura: mudar a versão quando
+        o resolvedor passar a decidir de outra forma.
+
+    Chave de cada entrada:
+        Assinatura do layout (SHA-1 da lista de colunas, em ordem). Quando
+        a resolução dependeu do nome da ficha (regra específica da ficha),
+        a chave é "assinatura|nome da ficha", pois o mesmo cabeçalho pode
+        ser resolvido de outra forma em outra ficha.
+
+    Conteúdo de cada entrada:
+    - colunas: Cabeçalho completo do layout
+    - resolucao: Projeção devolvida pelo resolvedor
+    - ficha: Ficha em que o layout apareceu pela primeira vez
+    - carimbo: Momento do registro
+
+    Uso:
+        Layout conhecido devolve a resolução salva sem varrer o cabeçalho;
+        layout novo é resolvido uma vez, gravado e informado no resumo.
+        Layout recusado (None) não é gravado: é resolvido de novo a cada
+        execução, para o alerta do resolvedor continuar aparecendo e para
+        valer uma ficha incluída depois numa regra específica.
+    """
+
+    def __init__(self, arquivo, somente_leitura=False, versao='1') -> None:
+        """
+        Args:
+            arquivo (str): Caminho do arquivo JSON do registro
+            somente_leitura (bool): Não grava o arquivo; os layouts novos ficam
+                                    em novas_entradas para o processo principal
+                                    mesclar (leitura em processos paralelos)
+            versao (str): Versão da resolução (mudar descarta o registro)
+
+        Nota:
+            O arquivo só é lido no primeiro uso
+        """
+        self.arquivo = arquivo
+        self.somente_leitura = somente_leitura
+        self.versao = versao
+        self.entradas = None
+        self.conhecidos = 0
+        self.novos = []  # [(ficha, assinatura), ...] registrados nesta execução
+        self.novas_entradas = {}  # {chave: entrada} registradas nesta execução
+        self._trava = threading.Lock()
+
+    def _carregar(self) -> None:
+        """
+        Lê o registro do disco (uma vez). Arquivo ausente, corrompido ou de
+        outra versão = vazio.
+        """
+        if self.entradas is not None:
+            return
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as arquivo:
+                conteudo = json.load(arquivo)
+        except Exception:
+            conteudo = {}
+        if isinstance(conteudo, dict) and conteudo.get('versao') == self.versao:
+            self.entradas = conteudo.get('entradas', {})
+        else:
+            self.entradas = {}
+
+    def _gravar(self) -> None:
+        """
+        Grava o registro (arquivo temporário + os.replace).
+        """
+        arquivo_temporario = self.arquivo + '.tmp'
+        with open(arquivo_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'versao': self.versao, 'entradas': self.entradas}, arquivo, ensure_ascii=False, indent=1)
+        os.replace(arquivo_temporario, self.arquivo)
+
+    @staticmethod
+    def assinatura(cabecalho) -> str:
+        """
+        Assinatura do layout: SHA-1 dos nomes das colunas, em ordem.
+        """
+        return hashlib.sha1('\n'.join(cabecalho).encode('utf-8')).hexdigest()
+
+    def buscar(self, cabecalho, nome_ficha):
+        """
+        Procura o layout no registro.
+
+        Returns:
+            dict | None: Entrada registrada (primeiro a da ficha, depois a geral)
+        """
+        assinatura = self.assinatura(cabecalho)
+        with self._trava:
+            self._carregar()
+            entrada = self.entradas.get(f'{assinatura}|{nome_ficha}') or self.entradas.get(assinatura)
+        return entrada
+
+    def registrar(self, cabecalho, nome_ficha, resolucao) -> None:
+        """
+        Registra a resolução de um layout novo e grava o arquivo.
+
+        Args:
+            cabecalho (list): Colunas do layout
+            nome_ficha (str): Ficha em que o layout apareceu
+            resolucao (dict): Projeção resolvida; com 'regra_da_ficha'
+                              verdadeiro, vale só para a ficha
+        """
+        assinatura = self.assinatura(cabecalho)
+        chave = f'{assinatura}|{nome_ficha}' if resolucao.get('regra_da_ficha', False) else assinatura
+        entrada = {
+            'colunas': list(cabecalho),
+            'resolucao': resolucao,
+            'ficha': nome_ficha,
+            'carimbo': datetime.datetime.now().isoformat(),
+        }
+
+        with self._trava:
+            self._carregar()
+            self.entradas[chave] = entrada
+            self.novas_entradas[chave] = entrada
+            self.novos.append((nome_ficha, assinatura))
+            if not self.somente_leitura:
+                self._gravar()
+
+    def mesclar(self, novas_entradas, conhecidos=0) -> None:
+        """
+        Junta os layouts registrados por outro processo e grava o arquivo.
+
+        Args:
+            novas_entradas (dict): novas_entradas do registro do outro processo
+            conhecidos (int): Layouts conhecidos contados pelo outro processo
+        """
+        with self._trava:
+            self.conhecidos += conhecidos
+            if not novas_entradas:
+                return
+            self._carregar()
+            for chave, entrada in novas_entradas.items():
+                if chave in self.entradas:
+                    # Outro processo já registrou o mesmo layout nesta execução
+                    self.conhecidos += 1
+                    continue
+                self.entradas[chave] = entrada
+                self.novas_entradas[chave] = entrada
+                self.novos.append((entrada['ficha'], chave.split('|')[0]))
+            if not self.somente_leitura:
+                self._gravar()
+
+    def resolver(self, cabecalho, nome_ficha, resolvedor):
+        """
+        Resolução do layout: a salva, se conhecido, senão resolvedor(cabecalho, nome_ficha).
+
+        Args:
+            cabecalho (list): Colunas do arquivo
+            nome_ficha (str): Nome da ficha
+            resolvedor (callable): Devolve a projeção (dict | None); recusas
+                                   (None) e exceções (ex.: coluna fixa
+                                   ausente) não são registradas
+
+        Returns:
+            dict | None: Projeção resolvida (None = layout recusado)
+        """
+        entrada = self.buscar(cabecalho, nome_ficha)
+        if entrada is not None:
+            with self._trava:
+                self.conhecidos += 1
+            return entrada['resolucao']
+
+        resolucao = resolvedor(cabecalho, nome_ficha)
+        if resolucao is None:
+            return None
+        self.registrar(cabecalho, nome_ficha, resolucao)
+        print(f" Layout novo registrado: '{nome_ficha}' ({len(cabecalho)} colunas, "
+              f"{len(resolucao['indices'])} mantidas)")
+        return resolucao
+
+    def imprimir_resumo(self) -> None:
+        """
+        Layouts conhecidos e novos desta execução.
+        """
+        print(f"🗂️ Layouts: {self.conhecidos} conhecidos, {len(self.novos)} novos")
+        for nome_ficha, assinatura in self.novos:
+            print(f"   novo: {nome_ficha} ({assinatura[:12]})")